@@ -0,0 +1,320 @@
+# cli.py
+"""
+命令行入口，驱动与界面相同的处理逻辑，不依赖 PyQt5，可以在没有图形界面的服务器上批量处理：
+
+    python -m cli index 素材文件夹1 素材文件夹2 --workers 4
+    python -m cli search 关键字 --folder 素材文件夹
+    python -m cli clip 视频.mp4 00:01:02,000 00:01:10,500 --mode smart
+    python -m cli clip --jobs jobs.json --workers 4 --snap-scenes
+    python -m cli merge a.mp4 b.mp4 -o 输出文件夹
+    python -m cli merge --project 工程.json -o 输出文件夹
+    python -m cli jumpcut 视频.mp4 --drop-fillers -o 输出文件夹
+    python -m cli proxy 素材文件夹 --workers 2
+
+结果以 JSON 输出到标准输出，日志输出到标准错误；有任务失败时退出码为 1。
+"""
+import os
+import sys
+import json
+import argparse
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.settings import DEFAULT_MODEL, SUBTITLE_WORKERS, SUBTITLE_VAD, CLIP_MAX_WORKERS, SEMANTIC_TOP_K, \
+    JUMP_CUT_MAX_GAP_MS, JUMP_CUT_PADDING_MS, PROXY_WORKERS
+from utils.transcriber import DEFAULT_OFFSET_MS
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def output(result):
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+def parse_time(value):
+    """解析毫秒数或 HH:MM:SS,mmm 格式的时间，返回毫秒"""
+    from utils.subtitle_parser import timestamp_to_ms
+
+    if value.isdigit():
+        return int(value)
+    return timestamp_to_ms(value)
+
+
+def collect_videos(paths):
+    """展开命令行中的文件夹和视频文件，返回视频的绝对路径列表"""
+    from utils.indexer import find_videos
+
+    video_paths = []
+    for path in paths:
+        if os.path.isdir(path):
+            video_paths.extend(find_videos(path))
+        elif os.path.isfile(path):
+            video_paths.append(path)
+        else:
+            log(f"路径不存在: {path}")
+    log(f"共 {len(video_paths)} 个视频")
+    return [os.path.abspath(path) for path in video_paths]
+
+
+def cmd_index(args):
+    """为文件夹（或单个视频）生成字幕并更新搜索索引，所有文件夹共用一个进程池"""
+    from utils.indexer import SubtitleIndexer
+
+    indexer = SubtitleIndexer(args.model, args.format, args.workers, args.offset_ms, args.vad, log=log)
+    results = indexer.index_videos(collect_videos(args.paths))
+    output({
+        'total': results['total'],
+        'skipped': results['skipped'],
+        'done': [{'video': video, 'subtitle': subtitle} for video, subtitle in results['done']],
+        'failed': [{'video': video, 'error': error} for video, error in results['failed']],
+    })
+    return 1 if results['failed'] else 0
+
+
+def cmd_search(args):
+    """在已索引的字幕中搜索关键字，模糊和语义搜索时每个文件夹内按相关度排序"""
+    from utils.subtitle_index import SubtitleIndex, SEARCH_MODE_SEMANTIC, SEARCH_MODE_FUZZY
+
+    if args.mode == SEARCH_MODE_SEMANTIC:
+        return cmd_semantic_search(args)
+
+    matches = []
+    subtitle_index = SubtitleIndex()
+    try:
+        for folder in args.folder:
+            updated, removed = subtitle_index.sync_folder(folder)
+            if updated or removed:
+                log(f"索引已更新: {updated} 个文件更新，{removed} 个文件移除")
+            if args.limit and len(matches) >= args.limit:
+                break
+            search = subtitle_index.fuzzy_search if args.mode == SEARCH_MODE_FUZZY else subtitle_index.search
+            matches.extend(search(args.keyword, folder, args.limit - len(matches) if args.limit else 0))
+    finally:
+        subtitle_index.close()
+
+    output([{'video': video, 'subtitle': srt, 'text': text, 'start_ms': start, 'end_ms': end}
+            for video, srt, text, start, end in matches])
+    return 0
+
+
+def cmd_semantic_search(args):
+    """按语义搜索字幕，需要安装 sentence-transformers"""
+    from utils.semantic_index import SemanticIndex, semantic_search_available
+
+    if not semantic_search_available():
+        raise SystemExit("语义搜索需要安装 sentence-transformers")
+    limit = args.limit or SEMANTIC_TOP_K
+    matches = []
+    semantic_index = SemanticIndex()
+    try:
+        for folder in args.folder:
+            updated, removed = semantic_index.sync_folder(folder)
+            if updated or removed:
+                log(f"向量索引已更新: {updated} 个文件更新，{removed} 个文件移除")
+            matches.extend(semantic_index.search(args.keyword, folder, limit, with_scores=True))
+    finally:
+        semantic_index.close()
+
+    # 每个文件夹各自取前 limit 个，合并后按相似度重新排序
+    matches.sort(key=lambda match: match[-1], reverse=True)
+    output([{'video': video, 'subtitle': srt, 'text': text, 'start_ms': start, 'end_ms': end,
+             'score': round(score, 4)}
+            for video, srt, text, start, end, score in matches[:limit]])
+    return 0
+
+
+def load_clip_jobs(args):
+    """读取剪辑任务：命令行参数中的单个任务，或 JSON 文件中的任务列表"""
+    if args.jobs is None:
+        if not (args.video and args.start and args.end):
+            raise SystemExit("需要指定 视频 开始时间 结束时间，或者使用 --jobs")
+        return [{'video': args.video, 'start': args.start, 'end': args.end}]
+
+    if args.jobs == '-':
+        jobs = json.load(sys.stdin)
+    else:
+        with open(args.jobs, 'r', encoding='utf-8') as f:
+            jobs = json.load(f)
+    return jobs
+
+
+def cmd_clip(args):
+    """并发剪辑多个片段"""
+    from utils.ffmpeg_utils import FFmpegRunner
+    from utils.probe_cache import get_duration
+    from utils.video_clip import clip_video, clip_output_path
+    from utils.scene_detect import get_scenes, snap_range
+
+    jobs = []
+    reserved = set()
+    for job in load_clip_jobs(args):
+        # 任务中的时间既可以是毫秒数，也可以是 HH:MM:SS,mmm 字符串
+        start_ms = parse_time(str(job.get('start', job.get('start_ms'))))
+        end_ms = parse_time(str(job.get('end', job.get('end_ms'))))
+        output_file = clip_output_path(job['video'], start_ms, end_ms, args.output_folder, reserved)
+        reserved.add(output_file)
+        jobs.append((job['video'], start_ms, end_ms, output_file))
+
+    def run_job(job):
+        video_path, start_ms, end_ms, output_file = job
+        result = {'video': video_path, 'output': output_file, 'start_ms': start_ms, 'end_ms': end_ms, 'error': None}
+        try:
+            # 确保结束时间在视频时长范围内
+            video_duration = get_duration(video_path)
+            if video_duration is None:
+                raise RuntimeError("无法获取视频时长，无法剪辑")
+            end_ms = min(end_ms, int(video_duration * 1000))
+            if start_ms >= end_ms:
+                raise RuntimeError("开始时间超出视频时长")
+            if args.snap_scenes:
+                # 同一个视频的多个片段共用一次镜头检测的结果
+                start_ms, end_ms = snap_range(get_scenes(video_path), start_ms, end_ms)
+            result['start_ms'], result['end_ms'] = clip_video(video_path, start_ms, end_ms, output_file, args.mode,
+                                                              FFmpegRunner().run)
+            log(f"已完成: {output_file}")
+        except Exception as e:
+            result['error'] = str(e)
+            log(f"剪辑视频时发生错误: {video_path}: {str(e)}")
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        results = list(executor.map(run_job, jobs))
+    output(results)
+    return 1 if any(result['error'] for result in results) else 0
+
+
+def cmd_merge(args):
+    """合并多个视频文件，或导出时间线工程"""
+    from utils.video_merger import VideoMerger, merged_output_path
+    from utils.timeline import Timeline, export_timeline
+
+    if not (args.project or args.files):
+        raise SystemExit("需要指定要合并的视频文件，或者使用 --project")
+
+    os.makedirs(args.output_folder, exist_ok=True)
+    video_merger = VideoMerger(log, max_workers=args.workers)
+    try:
+        if args.project:
+            timeline = Timeline.load(args.project)
+            output_file = merged_output_path(args.output_folder, len(timeline))
+            export_timeline(timeline, output_file, args.copy, video_merger.new_runner().run, log)
+        else:
+            output_file = video_merger.merge_videos([os.path.abspath(path) for path in args.files],
+                                                    args.output_folder)
+    except Exception as e:
+        log(f"合并视频时发生错误: {str(e)}")
+        output({'output': None, 'error': str(e)})
+        return 1
+    output({'output': output_file, 'error': None})
+    return 0
+
+
+def cmd_jumpcut(args):
+    """根据字幕剪掉视频中的停顿，每个视频运行一次 ffmpeg"""
+    from utils.ffmpeg_utils import FFmpegRunner
+    from utils.jump_cut import export_jump_cut
+
+    os.makedirs(args.output_folder, exist_ok=True)
+    results = []
+    for video_path in args.videos:
+        result = {'video': video_path, 'output': None, 'removed_ms': None, 'error': None}
+        try:
+            result['output'], result['removed_ms'] = export_jump_cut(
+                os.path.abspath(video_path), args.output_folder, args.drop_fillers, args.max_gap_ms,
+                args.padding_ms, FFmpegRunner().run, log)
+        except Exception as e:
+            result['error'] = str(e)
+            log(f"剪掉停顿时发生错误: {video_path}: {str(e)}")
+        results.append(result)
+    output(results)
+    return 1 if any(result['error'] for result in results) else 0
+
+
+def cmd_proxy(args):
+    """为高分辨率或 HEVC 等素材生成预览代理文件，同时运行的 ffmpeg 进程数由 --workers 限制"""
+    from utils.proxy_media import ProxyBuilder
+
+    results = []
+
+    def on_done(path, proxy, error):
+        results.append({'video': path, 'proxy': proxy, 'error': error})
+        if error is None:
+            log(f"已生成代理文件: {path} -> {proxy}")
+        else:
+            log(f"生成代理文件失败: {path}: {error}")
+
+    ProxyBuilder(args.workers).build_all(collect_videos(args.paths), on_done)
+    output(results)
+    return 1 if any(result['error'] for result in results) else 0
+
+
+def build_parser():
+    from utils.video_clip import CLIP_MODE_NAMES, CLIP_MODE_REENCODE, video_clips_folder
+    from utils.subtitle_index import SEARCH_MODE_NAMES, SEARCH_MODE_EXACT
+
+    parser = argparse.ArgumentParser(prog='python -m cli', description='胡剪命令行工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    index_parser = subparsers.add_parser('index', help='生成字幕并创建索引')
+    index_parser.add_argument('paths', nargs='+', help='素材文件夹或视频文件')
+    index_parser.add_argument('--model', default=DEFAULT_MODEL, help='Whisper 模型名')
+    index_parser.add_argument('--format', default='srt', choices=['srt', 'vtt'], help='字幕格式')
+    index_parser.add_argument('--workers', type=int, default=SUBTITLE_WORKERS, help='并行转写的进程数')
+    index_parser.add_argument('--offset-ms', type=int, default=DEFAULT_OFFSET_MS, help='字幕时间偏移（毫秒）')
+    index_parser.add_argument('--vad', action='store_true', default=SUBTITLE_VAD, help='只转写检测到的语音区间')
+    index_parser.set_defaults(func=cmd_index)
+
+    search_parser = subparsers.add_parser('search', help='搜索字幕')
+    search_parser.add_argument('keyword', help='搜索关键字')
+    search_parser.add_argument('--folder', action='append', required=True, help='素材文件夹，可以指定多次')
+    search_parser.add_argument('--limit', type=int, default=0, help='最多输出的结果数，0 表示不限制')
+    search_parser.add_argument('--mode', default=SEARCH_MODE_EXACT, choices=list(SEARCH_MODE_NAMES),
+                               help='搜索模式：exact 精确匹配，fuzzy 容忍同音字、繁简差异和少量错字，semantic 按语义搜索')
+    search_parser.set_defaults(func=cmd_search)
+
+    clip_parser = subparsers.add_parser('clip', help='剪辑视频片段')
+    clip_parser.add_argument('video', nargs='?', help='视频文件')
+    clip_parser.add_argument('start', nargs='?', help='开始时间（毫秒或 HH:MM:SS,mmm）')
+    clip_parser.add_argument('end', nargs='?', help='结束时间（毫秒或 HH:MM:SS,mmm）')
+    clip_parser.add_argument('--jobs', help='JSON 任务列表文件，"-" 表示从标准输入读取；'
+                                            '格式为 [{"video": ..., "start": ..., "end": ...}]')
+    clip_parser.add_argument('--mode', default=CLIP_MODE_REENCODE, choices=list(CLIP_MODE_NAMES), help='剪辑模式')
+    clip_parser.add_argument('--output-folder', default=video_clips_folder, help='片段输出文件夹')
+    clip_parser.add_argument('--workers', type=int, default=CLIP_MAX_WORKERS, help='同时运行的 ffmpeg 进程数')
+    clip_parser.add_argument('--snap-scenes', action='store_true', help='把开始和结束时间对齐到附近的镜头切换点')
+    clip_parser.set_defaults(func=cmd_clip)
+
+    merge_parser = subparsers.add_parser('merge', help='合并视频或导出时间线工程')
+    merge_parser.add_argument('files', nargs='*', help='按顺序合并的视频文件')
+    merge_parser.add_argument('--project', help='时间线工程文件，指定后忽略 files')
+    merge_parser.add_argument('--copy', action='store_true', help='导出工程时直接复制源文件码流')
+    merge_parser.add_argument('-o', '--output-folder', required=True, help='输出文件夹')
+    merge_parser.add_argument('--workers', type=int, default=CLIP_MAX_WORKERS, help='同时转码的片段数')
+    merge_parser.set_defaults(func=cmd_merge)
+
+    jumpcut_parser = subparsers.add_parser('jumpcut', help='根据字幕剪掉停顿')
+    jumpcut_parser.add_argument('videos', nargs='+', help='有同名字幕文件的视频')
+    jumpcut_parser.add_argument('--drop-fillers', action='store_true', help='同时剪掉只包含语气词的字幕')
+    jumpcut_parser.add_argument('--max-gap-ms', type=int, default=JUMP_CUT_MAX_GAP_MS,
+                                help='间隔不超过该值（毫秒）的相邻字幕合并为一个片段')
+    jumpcut_parser.add_argument('--padding-ms', type=int, default=JUMP_CUT_PADDING_MS, help='每条字幕前后保留的余量（毫秒）')
+    jumpcut_parser.add_argument('-o', '--output-folder', required=True, help='输出文件夹')
+    jumpcut_parser.set_defaults(func=cmd_jumpcut)
+
+    proxy_parser = subparsers.add_parser('proxy', help='生成预览代理文件')
+    proxy_parser.add_argument('paths', nargs='+', help='素材文件夹或视频文件')
+    proxy_parser.add_argument('--workers', type=int, default=PROXY_WORKERS, help='同时转码的 ffmpeg 进程数')
+    proxy_parser.set_defaults(func=cmd_proxy)
+    return parser
+
+
+def main(argv=None):
+    multiprocessing.freeze_support()  # 打包后并行转写的子进程需要
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
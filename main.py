@@ -1,12 +1,48 @@
 # main.py
+import os
 import sys
+import time
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import QObject, QEvent, QTimer
 from ui.main_window import MainUi
+from utils.model_registry import warm_up
+from utils.settings import DEFAULT_MODEL, WARM_UP_MODEL
+
+# 设置该环境变量后，窗口第一次绘制完成时输出时间并退出，供 scripts/bench_startup.py 测量启动耗时
+STARTUP_BENCH_ENV = "MASTER_CUTTER_STARTUP_BENCH"
+
+
+class FirstPaintHook(QObject):
+    """窗口第一次绘制完成后执行回调，之后不再处理事件"""
+
+    def __init__(self, callback, parent=None):
+        super().__init__(parent)
+        self.callback = callback
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            obj.removeEventFilter(self)
+            # 等本次绘制结束后再执行回调
+            QTimer.singleShot(0, self.callback)
+        return False
+
+
+def on_first_paint(app):
+    if os.environ.get(STARTUP_BENCH_ENV):
+        print(f"first_paint={time.time():.6f}", flush=True)
+        app.quit()
+    elif WARM_UP_MODEL:
+        # 界面显示后再在后台预加载模型，避免导入 torch 拖慢第一次绘制
+        warm_up(DEFAULT_MODEL)
 
 
 def main():
+    multiprocessing.freeze_support()  # 打包后并行转写的子进程需要
     app = QApplication(sys.argv)
     gui = MainUi()
+    first_paint_hook = FirstPaintHook(lambda: on_first_paint(app), gui)
+    gui.installEventFilter(first_paint_hook)
     gui.show()
     sys.exit(app.exec_())
 
@@ -0,0 +1,73 @@
+# scripts/bench_startup.py
+"""
+启动耗时基准：多次启动程序，测量从启动进程到主窗口第一次绘制完成的时间，
+并检查启动时没有导入 whisper / torch / opencc 等较重的依赖。
+
+    python scripts/bench_startup.py --runs 5 --max-seconds 3
+
+超过时间上限或启动时导入了较重的依赖时退出码为 1。没有显示器的机器上可以加 --offscreen。
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+project_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 启动时不应该导入的模块，只能在创建索引等需要时再延迟导入
+HEAVY_MODULES = ('whisper', 'torch', 'opencc', 'gradio', 'numpy')
+
+IMPORT_CHECK = (
+    "import sys, main; "
+    f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+)
+
+
+def measure_once(env):
+    """启动一次程序，返回到第一次绘制的秒数"""
+    started = time.time()
+    result = subprocess.run([sys.executable, "main.py"], cwd=project_path, env=env, capture_output=True, text=True,
+                            timeout=120)
+    for line in result.stdout.splitlines():
+        if line.startswith("first_paint="):
+            return float(line.partition('=')[2]) - started
+    raise RuntimeError(f"没有检测到窗口绘制，程序输出:\n{result.stdout}\n{result.stderr}")
+
+
+def heavy_imports(env):
+    """导入主程序模块后检查已经加载的较重依赖"""
+    result = subprocess.run([sys.executable, "-c", IMPORT_CHECK], cwd=project_path, env=env, capture_output=True,
+                            text=True, check=True)
+    output = result.stdout.strip().splitlines()
+    return [m for m in output[-1].split(',') if m] if output else []
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量程序启动到主窗口第一次绘制的耗时')
+    parser.add_argument('--runs', type=int, default=5, help='启动次数')
+    parser.add_argument('--max-seconds', type=float, default=3.0, help='中位数耗时上限（秒）')
+    parser.add_argument('--offscreen', action='store_true', help='使用 Qt offscreen 平台，适用于没有显示器的机器')
+    args = parser.parse_args()
+
+    env = dict(os.environ, MASTER_CUTTER_STARTUP_BENCH="1")
+    if args.offscreen:
+        env['QT_QPA_PLATFORM'] = 'offscreen'
+
+    failed = False
+    imported = heavy_imports(env)
+    if imported:
+        print(f"启动时导入了较重的依赖: {', '.join(imported)}")
+        failed = True
+
+    timings = sorted(measure_once(env) for _ in range(args.runs))
+    median = timings[len(timings) // 2]
+    print(f"第一次绘制耗时: 中位数 {median:.3f}s，最快 {timings[0]:.3f}s，最慢 {timings[-1]:.3f}s")
+    if median > args.max_seconds:
+        print(f"超过上限 {args.max_seconds:.3f}s")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
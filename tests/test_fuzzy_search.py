@@ -0,0 +1,55 @@
+from utils.fuzzy_search import rank_texts, phonetic_key, max_errors
+from utils.subtitle_parser import CueTable
+
+
+def make_table(texts):
+    return CueTable.from_cues((i * 1000, i * 1000 + 900, text) for i, text in enumerate(texts))
+
+
+def rank(keyword, texts):
+    return rank_texts(keyword, ((text.lower(), phonetic_key(text).split()) for text in texts))
+
+
+def test_short_query_allows_no_errors():
+    assert max_errors(1) == 0
+    assert max_errors(2) == 0
+    assert max_errors(3) == 1
+
+
+def test_single_character_query_does_not_match_unrelated_cues():
+    table = make_table(['你好', '12', '我们走吧', '天气不错'])
+    assert table.find_fuzzy('你') == [0]
+
+
+def test_two_syllable_query_needs_more_than_one_shared_syllable():
+    assert rank('剪辑', ['剪刀', '编辑', '今天剪辑视频']) == [2]
+
+
+def test_traditional_text_matches_simplified_query():
+    assert rank('剪辑', ['學習剪輯技巧']) == [0]
+
+
+def test_panel_and_index_use_the_same_candidate_gate():
+    texts = ['我喜欢剪级视频', '完全无关的字幕']
+    expected = rank('喜欢剪辑', texts)
+    assert make_table(texts).find_fuzzy('喜欢剪辑') == expected
+    assert expected == [0]
+
+
+def test_polyphone_exact_hits_are_kept_by_panel_and_index(tmp_path):
+    from utils.subtitle_index import SubtitleIndex
+
+    texts = ['我去银行取钱', '重庆火锅很好吃']
+    folder = tmp_path / "media"
+    folder.mkdir()
+    (folder / "a.mp4").write_bytes(b"")
+    (folder / "a.srt").write_text(''.join(
+        f"{i + 1}\n00:00:0{i},000 --> 00:00:0{i},900\n{text}\n\n" for i, text in enumerate(texts)), encoding="utf-8")
+    index = SubtitleIndex(str(tmp_path / "index.db"))
+    try:
+        index.sync_folder(str(folder))
+        for keyword, expected in (('行', '我去银行取钱'), ('重', '重庆火锅很好吃')):
+            assert [text for _, _, text, *_ in index.fuzzy_search(keyword, str(folder))] == [expected]
+            assert [texts[i] for i in make_table(texts).find_fuzzy(keyword)] == [expected]
+    finally:
+        index.close()
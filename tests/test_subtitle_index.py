@@ -0,0 +1,36 @@
+import os
+
+from utils.subtitle_index import SubtitleIndex
+from utils.subtitle_parser import find_subtitle_file, list_subtitle_files
+
+SRT = "1\n00:00:01,000 --> 00:00:02,000\n今天剪辑视频\n"
+VTT = "WEBVTT\n\n00:00:01.000 --> 00:00:02.000\n今天剪辑视频\n"
+
+
+def make_folder(tmp_path):
+    (tmp_path / "a.mp4").write_bytes(b"")
+    (tmp_path / "a.srt").write_text(SRT, encoding="utf-8")
+    (tmp_path / "a.vtt").write_text(VTT, encoding="utf-8")
+    (tmp_path / "b.mp4").write_bytes(b"")
+    (tmp_path / "b.vtt").write_text(VTT, encoding="utf-8")
+    return tmp_path
+
+
+def test_list_subtitle_files_prefers_srt(tmp_path):
+    folder = make_folder(tmp_path)
+    files = list_subtitle_files(str(folder))
+    assert [os.path.basename(f) for f in files] == ["a.srt", "b.vtt"]
+    assert find_subtitle_file(str(folder / "a.mp4")) in files
+
+
+def test_srt_and_vtt_with_same_name_are_indexed_once(tmp_path):
+    (tmp_path / "media").mkdir()
+    folder = make_folder(tmp_path / "media")
+    index = SubtitleIndex(str(tmp_path / "index.db"))
+    try:
+        assert index.sync_folder(str(folder)) == (2, 0)
+        assert index.video_count(str(folder)) == 2
+        hits = index.search("剪辑", str(folder))
+        assert sorted(os.path.basename(srt_path) for _, srt_path, *_ in hits) == ["a.srt", "b.vtt"]
+    finally:
+        index.close()
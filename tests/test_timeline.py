@@ -0,0 +1,28 @@
+import re
+
+from utils import timeline
+from utils.timeline import Timeline, TimelineClip, source_runs, frame_ranges, build_filter_export, EXPORT_SAMPLE_RATE
+
+
+def test_far_apart_clips_start_a_new_run():
+    clips = [TimelineClip("a.mp4", 5000, 6000), TimelineClip("a.mp4", 8000, 9000),
+             TimelineClip("a.mp4", 5400000, 5401000)]
+    assert [len(run) for run in source_runs(clips)] == [2, 1]
+
+
+def test_frame_ranges_round_to_the_frame_grid():
+    run = [TimelineClip("a.mp4", 1000, 1050), TimelineClip("a.mp4", 1060, 1070), TimelineClip("a.mp4", 1100, 2000)]
+    assert frame_ranges(run, 30) == [(0, 2), (3, 30)]
+
+
+def test_audio_of_each_range_matches_its_frames(tmp_path, monkeypatch):
+    fps = 29.97
+    monkeypatch.setattr(timeline, "get_media_info", lambda source: {
+        'duration': 7200, 'video': {'width': 1280, 'height': 720, 'fps': fps}, 'audio': {'codec_name': 'aac'}})
+    clips = [TimelineClip("a.mp4", start, start + 733) for start in range(0, 500 * 1000, 1000)]
+    build_filter_export(Timeline(clips), str(tmp_path), str(tmp_path / "out.mp4"))
+    script = (tmp_path / "filter.txt").read_text(encoding="utf-8")
+
+    frames = sum(int(last) - int(first) + 1 for first, last in re.findall(r"between\(n,(\d+),(\d+)\)", script))
+    samples = sum(int(value) for value in re.findall(r"apad=whole_len=(\d+)", script))
+    assert abs(samples - frames * EXPORT_SAMPLE_RATE / fps) <= 1
@@ -1,13 +1,15 @@
-from PyQt5.QtWidgets import QWidget, QPushButton,QTextEdit, QVBoxLayout,QSizePolicy
+from PyQt5.QtWidgets import QWidget, QPushButton,QTextEdit, QVBoxLayout,QSizePolicy, QHBoxLayout, QProgressBar, QLabel
 from PyQt5.QtGui import QTextCursor
-from PyQt5.QtCore import QDateTime
+from PyQt5.QtCore import QDateTime, pyqtSignal
 from PyQt5.Qt import Qt
 
 class ConsoleBox(QWidget):
     """
     控制台日志输出组件，集成日志显示、日志级别、时间戳和清除功能。
     使用 QTextEdit 来显示日志信息，支持日志打印、日志清除以及控制最大日志长度。
+    同时提供 ffmpeg 任务的进度条、处理速度显示和取消按钮。
     """
+    cancel_requested = pyqtSignal()  # 用户点击取消按钮
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -38,7 +40,20 @@ class ConsoleBox(QWidget):
 
         # 使用垂直布局来排列日志框和按钮
 
+        # 任务进度条、处理速度和取消按钮，没有任务运行时隐藏
+        self.progressBar = QProgressBar(self)
+        self.progressBar.setRange(0, 100)
+        self.speedLabel = QLabel(self)
+        self.cancelButton = QPushButton("取消任务", self)
+        self.cancelButton.clicked.connect(self.cancel_requested.emit)
+        self.progressLayout = QHBoxLayout()
+        self.progressLayout.addWidget(self.progressBar)
+        self.progressLayout.addWidget(self.speedLabel)
+        self.progressLayout.addWidget(self.cancelButton)
+        self.reset_progress()
+
         self.layout.addWidget(self.consoleEditBox)  # 添加日志框
+        self.layout.addLayout(self.progressLayout)  # 添加任务进度
         self.layout.addWidget(self.clearButton, alignment=Qt.AlignCenter)  # 添加清除日志按钮，靠右对齐
         self.setLayout(self.layout)  # 设置布局
 
@@ -70,6 +85,33 @@ class ConsoleBox(QWidget):
         if len(self.consoleEditBox.toPlainText()) > self.max_log_size:
             self.trim_logs()
 
+    def set_progress(self, percent, speed=""):
+        """
+        显示任务进度。
+
+        参数:
+            percent (float): 进度百分比，为 None 或负数时显示为不确定进度。
+            speed (str): 处理速度，例如 ffmpeg 报告的 "2.5x"。
+        """
+        if percent is None or percent < 0:
+            self.progressBar.setRange(0, 0)  # 忙碌状态
+        else:
+            self.progressBar.setRange(0, 100)
+            self.progressBar.setValue(int(percent))
+        self.speedLabel.setText(f"速度: {speed}" if speed else "")
+        self.progressBar.show()
+        self.speedLabel.show()
+        self.cancelButton.show()
+
+    def reset_progress(self):
+        """任务结束后隐藏进度条"""
+        self.progressBar.setRange(0, 100)
+        self.progressBar.setValue(0)
+        self.speedLabel.clear()
+        self.progressBar.hide()
+        self.speedLabel.hide()
+        self.cancelButton.hide()
+
     def clear_logs(self):
         """
         清空日志框中的所有内容。
@@ -0,0 +1,173 @@
+# ui/components/list_models.py
+"""
+字幕列表、搜索结果和素材列表使用的数据模型。
+
+模型直接引用底层的字幕表和结果列表，只在视图需要显示某一行时才生成文本，
+不会为每一行创建 QListWidgetItem，几十万行也可以立即显示。
+配合 QListView.setUniformItemSizes(True) 使用，视图不需要逐行计算高度。
+搜索结果和素材列表可以传入 ThumbnailProvider，在每一行前显示缩略图。
+"""
+import os
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QSize
+from PyQt5.QtWidgets import QListView, QAbstractItemView
+
+# 列表中缩略图的显示尺寸
+LIST_ICON_SIZE = QSize(64, 36)
+
+
+def create_list_view(model, parent=None):
+    """创建显示指定模型的列表视图，所有行高度相同"""
+    view = QListView(parent)
+    view.setModel(model)
+    view.setUniformItemSizes(True)
+    view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+    if getattr(model, 'thumbnails', None) is not None:
+        view.setIconSize(LIST_ICON_SIZE)
+    return view
+
+
+class CueListModel(QAbstractListModel):
+    """
+    显示 CueTable 中的字幕。
+
+    DisplayRole 为字幕文本，UserRole 为 (视频文件, 开始毫秒, 结束毫秒)。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cues = None
+        self.video_file = None
+
+    def set_cues(self, cues, video_file):
+        self.beginResetModel()
+        self.cues = cues
+        self.video_file = video_file
+        self.endResetModel()
+
+    def clear(self):
+        self.set_cues(None, None)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.cues is None:
+            return 0
+        return len(self.cues)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or self.cues is None:
+            return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            return self.cues.text(row)
+        if role == Qt.UserRole:
+            return self.video_file, self.cues.starts[row], self.cues.ends[row]
+        return None
+
+
+class SearchResultModel(QAbstractListModel):
+    """
+    显示字幕搜索结果，每个结果为 (视频文件, 字幕文件, 字幕文本, 开始毫秒, 结束毫秒)。
+
+    DisplayRole 为显示文本，UserRole 为 (视频文件, 字幕文件, 开始毫秒, 结束毫秒)，
+    DecorationRole 为匹配位置附近的缩略图。
+    """
+
+    def __init__(self, parent=None, thumbnails=None):
+        super().__init__(parent)
+        self.matches = []
+        self.thumbnails = thumbnails
+        if thumbnails is not None:
+            thumbnails.thumbnail_ready.connect(self.on_thumbnail_ready)
+
+    def set_matches(self, matches):
+        self.beginResetModel()
+        self.matches = list(matches)
+        self.endResetModel()
+
+    def append_matches(self, matches):
+        """在末尾追加一批结果"""
+        if not matches:
+            return
+        first = len(self.matches)
+        self.beginInsertRows(QModelIndex(), first, first + len(matches) - 1)
+        self.matches.extend(matches)
+        self.endInsertRows()
+
+    def clear(self):
+        self.set_matches([])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.matches)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        video_path, srt_path, subtitle_text, start_time, end_time = self.matches[index.row()]
+        if role == Qt.DisplayRole:
+            # 展示视频文件名 + 字幕匹配文本
+            return f"{video_path} - {subtitle_text} ({start_time // 1000}s - {end_time // 1000}s)"
+        if role == Qt.UserRole:
+            return video_path, srt_path, start_time, end_time
+        if role == Qt.DecorationRole and self.thumbnails is not None:
+            return self.thumbnails.thumbnail_or_placeholder(video_path, start_time)
+        return None
+
+    def on_thumbnail_ready(self, video_path):
+        # 同一个视频的结果可能分散在各处，通知视图重新读取全部缩略图，视图只会重绘可见的行
+        if self.matches:
+            self.dataChanged.emit(self.index(0), self.index(len(self.matches) - 1), [Qt.DecorationRole])
+
+
+class MaterialListModel(QAbstractListModel):
+    """显示素材文件名，ToolTipRole 为探测到的媒体信息，DecorationRole 为视频中间的缩略图"""
+
+    def __init__(self, parent=None, thumbnails=None):
+        super().__init__(parent)
+        self.folder = None
+        self.files = []
+        self.rows = {}  # 文件名 -> 行号
+        self.tooltips = {}
+        self.thumbnails = thumbnails
+        if thumbnails is not None:
+            thumbnails.thumbnail_ready.connect(self.on_thumbnail_ready)
+
+    def set_files(self, files, folder=None):
+        self.beginResetModel()
+        self.folder = folder
+        self.files = list(files)
+        self.rows = {name: row for row, name in enumerate(self.files)}
+        self.tooltips = {}
+        self.endResetModel()
+
+    def clear(self):
+        self.set_files([])
+
+    def set_tooltip(self, name, tooltip):
+        row = self.rows.get(name)
+        if row is None:
+            return
+        self.tooltips[name] = tooltip
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.ToolTipRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.files)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self.files[index.row()]
+        if role == Qt.DisplayRole:
+            return name
+        if role == Qt.ToolTipRole:
+            return self.tooltips.get(name)
+        if role == Qt.DecorationRole and self.thumbnails is not None and self.folder:
+            return self.thumbnails.thumbnail_or_placeholder(os.path.join(self.folder, name))
+        return None
+
+    def on_thumbnail_ready(self, video_path):
+        if self.folder and os.path.dirname(video_path) == self.folder:
+            row = self.rows.get(os.path.basename(video_path))
+            if row is not None:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
@@ -0,0 +1,140 @@
+import time
+from collections import OrderedDict, deque
+
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import QObject, QThread, pyqtSignal, QRect, Qt
+
+from utils.thumbnails import get_sprite_sheet, TILE_WIDTH, TILE_HEIGHT
+
+# 内存中最多保留的胶片条图片数量
+PIXMAP_CACHE_SIZE = 32
+# 生成失败后间隔多少秒再重新尝试
+RETRY_INTERVAL = 60
+
+
+class SpriteSheetWorker(QThread):
+    """在后台依次生成胶片条，每个视频运行一次 ffmpeg"""
+    sheet_ready = pyqtSignal(str, object)  # 视频路径, SpriteSheet
+    sheet_failed = pyqtSignal(str)  # 视频路径
+
+    def __init__(self, queue):
+        super().__init__()
+        self.queue = queue  # 与 ThumbnailProvider 共享的待处理队列，只在主线程中添加
+
+    def run(self):
+        while self.queue:
+            video_path = self.queue.popleft()
+            try:
+                self.sheet_ready.emit(video_path, get_sprite_sheet(video_path))
+            except Exception:
+                self.sheet_failed.emit(video_path)
+
+
+class ThumbnailProvider(QObject):
+    """
+    为列表和进度条提供缩略图。
+
+    thumbnail() 立即返回已加载的缩略图，没有时返回 None 并在后台生成胶片条，
+    生成后发出 thumbnail_ready，界面收到后重新读取即可。
+    """
+    thumbnail_ready = pyqtSignal(str)  # 视频路径
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.sheets = {}  # 视频路径 -> SpriteSheet
+        self.failures = {}  # 视频路径 -> 最近一次生成失败的时间
+        self.pixmaps = OrderedDict()  # 胶片条图片路径 -> QPixmap，最近使用的在后面
+        self.pending = deque()
+        self.requested = set()
+        self.worker = None
+        self._placeholder = None
+
+    def thumbnail(self, video_path, position_ms=None):
+        """返回视频在指定时间附近关键帧的缩略图，position_ms 为 None 时返回视频中间的缩略图"""
+        sheet = self.sheets.get(video_path)
+        if sheet is None:
+            failed_at = self.failures.get(video_path)
+            if failed_at is None or time.monotonic() - failed_at >= RETRY_INTERVAL:
+                self.request(video_path)
+            return None
+        if not len(sheet):
+            return None
+        pixmap = self.sheet_pixmap(sheet)
+        if pixmap.isNull():
+            # 胶片条已被 LRU 淘汰或清除缓存时删除，重新生成
+            self.forget(video_path)
+            self.request(video_path)
+            return None
+        index = len(sheet) // 2 if position_ms is None else sheet.index_at(position_ms)
+        return pixmap.copy(QRect(*sheet.tile_rect(index)))
+
+    def thumbnail_or_placeholder(self, video_path, position_ms=None):
+        """缩略图尚未生成时返回同样大小的透明图片，使列表的行高保持一致"""
+        pixmap = self.thumbnail(video_path, position_ms)
+        if pixmap is not None:
+            return pixmap
+        if self._placeholder is None:
+            self._placeholder = QPixmap(TILE_WIDTH, TILE_HEIGHT)
+            self._placeholder.fill(Qt.transparent)
+        return self._placeholder
+
+    def sheet_pixmap(self, sheet):
+        pixmap = self.pixmaps.get(sheet.image_path)
+        if pixmap is None:
+            pixmap = QPixmap(sheet.image_path)
+            if pixmap.isNull():
+                return pixmap  # 文件不存在或已损坏，不放入缓存
+            self.pixmaps[sheet.image_path] = pixmap
+            if len(self.pixmaps) > PIXMAP_CACHE_SIZE:
+                self.pixmaps.popitem(last=False)
+        self.pixmaps.move_to_end(sheet.image_path)
+        return pixmap
+
+    def forget(self, video_path):
+        """丢弃视频已加载的胶片条，下次请求时重新读取或生成"""
+        sheet = self.sheets.pop(video_path, None)
+        if sheet is not None:
+            self.pixmaps.pop(sheet.image_path, None)
+        self.requested.discard(video_path)
+
+    def request(self, video_path):
+        """把视频加入后台生成队列"""
+        if video_path in self.requested:
+            return
+        self.requested.add(video_path)
+        self.pending.append(video_path)
+        if self.worker is None or not self.worker.isRunning():
+            self.start_worker()
+
+    def start_worker(self):
+        self.worker = SpriteSheetWorker(self.pending)
+        self.worker.sheet_ready.connect(self.on_sheet_ready)
+        self.worker.sheet_failed.connect(self.on_sheet_failed)
+        self.worker.finished.connect(self.on_worker_finished)
+        self.worker.start()
+
+    def on_sheet_ready(self, video_path, sheet):
+        self.sheets[video_path] = sheet
+        self.failures.pop(video_path, None)
+        self.thumbnail_ready.emit(video_path)
+
+    def on_sheet_failed(self, video_path):
+        # 记录失败时间，RETRY_INTERVAL 秒内不再重复尝试
+        self.failures[video_path] = time.monotonic()
+        self.requested.discard(video_path)
+
+    def on_worker_finished(self):
+        # 线程退出前可能又有新的请求加入队列
+        if self.pending:
+            self.start_worker()
+
+
+_provider = None
+
+
+def thumbnail_provider():
+    """所有界面共用的缩略图提供者，需要在主线程中调用"""
+    global _provider
+    if _provider is None:
+        _provider = ThumbnailProvider()
+    return _provider
@@ -4,6 +4,10 @@ from PyQt5.QtMultimedia import *
 from PyQt5.QtGui import *
 from PyQt5.QtCore import *
 from PyQt5.QtMultimediaWidgets import QVideoWidget
+from ui.components.waveform_strip import WaveformStrip
+from ui.components.thumbnails import thumbnail_provider
+from utils.thumbnails import extract_frame
+from utils.proxy_media import preview_source
 import sys
 
 
@@ -36,6 +40,16 @@ class VideoPlayerWidget(QWidget):
         self.lab_video.setAlignment(Qt.AlignRight | Qt.AlignVCenter)  # 设置百分比显示右对齐并垂直居中
         self.gridLayout.addWidget(self.lab_video, 1, 1, 1, 1)  # 放在第二列
 
+        # 进度条下方的音频波形，方便找到停顿等剪辑点
+        self.waveform_strip = WaveformStrip(self)
+        self.gridLayout.addWidget(self.waveform_strip, 2, 0, 1, 1)
+
+        # 鼠标悬停在进度条上时显示该位置的缩略图
+        self.hover_preview = QLabel(self, Qt.ToolTip | Qt.FramelessWindowHint)
+        self.hover_preview.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.hover_preview.hide()
+        self.hover_value = None
+
         # 控制区
         self.setupControlPanel()
 
@@ -44,6 +58,7 @@ class VideoPlayerWidget(QWidget):
         self.sld_audio.setValue(100)
 
         # 创建播放器
+        self.current_video = None  # 当前播放的视频文件，通过“打开”按钮选择的文件为 None
         self.player = QMediaPlayer(self)
         self.player.setVideoOutput(self.wgt_video)
 
@@ -79,7 +94,7 @@ class VideoPlayerWidget(QWidget):
         self.btn_cast = QPushButton("截图", self.splitter)
         self.btn_cast.show()  # 显示截图按钮
 
-        self.gridLayout.addWidget(self.splitter, 2, 0, 1, 2)
+        self.gridLayout.addWidget(self.splitter, 3, 0, 1, 2)
 
     def connectSignals(self):
         """绑定控件与相应的功能"""
@@ -88,20 +103,58 @@ class VideoPlayerWidget(QWidget):
         self.btn_stop.clicked.connect(self.pauseVideo)
         self.sld_audio.valueChanged.connect(self.volumeChange)
         self.player.positionChanged.connect(self.changeSlide)
+        self.player.positionChanged.connect(self.waveform_strip.set_position)
+        self.waveform_strip.seek_requested.connect(self.player.setPosition)
         self.sld_video.ClickedValue.connect(self.clickedSlider)
+        self.sld_video.HoveredValue.connect(self.showHoverPreview)
+        self.sld_video.HoverLeft.connect(self.hideHoverPreview)
+        thumbnail_provider().thumbnail_ready.connect(self.refreshHoverPreview)
         self.btn_cast.clicked.connect(self.castVideo)  # 绑定截图功能
 
     def castVideo(self):
-        """视频截图功能"""
-        screen = QGuiApplication.primaryScreen()
+        """视频截图功能，优先从源文件解码当前帧，得到原始分辨率的画面"""
         cast_jpg = './' + QDateTime.currentDateTime().toString("yyyy-MM-dd_hh-mm-ss") + '.jpg'
+        if self.current_video:
+            try:
+                extract_frame(self.current_video, self.player.position(), cast_jpg)
+                return
+            except Exception:
+                pass
+        screen = QGuiApplication.primaryScreen()
         screen.grabWindow(self.wgt_video.winId()).save(cast_jpg)
 
+    def showHoverPreview(self, ratio, global_pos):
+        """在进度条上方显示鼠标位置对应的缩略图，缩略图还没有生成时在后台生成"""
+        self.hover_value = (ratio, global_pos)
+        if not self.current_video or self.player.duration() <= 0:
+            self.hover_preview.hide()
+            return
+        pixmap = thumbnail_provider().thumbnail(self.current_video, int(ratio * self.player.duration()))
+        if pixmap is None:
+            self.hover_preview.hide()
+            return
+        self.hover_preview.setPixmap(pixmap)
+        self.hover_preview.adjustSize()
+        self.hover_preview.move(global_pos.x() - pixmap.width() // 2, global_pos.y() - pixmap.height() - 12)
+        self.hover_preview.show()
+
+    def hideHoverPreview(self):
+        self.hover_value = None
+        self.hover_preview.hide()
+
+    def refreshHoverPreview(self, video_path):
+        """缩略图生成完成时，如果鼠标仍停在进度条上则立即显示"""
+        if self.hover_value is not None and video_path == self.current_video:
+            self.showHoverPreview(*self.hover_value)
+
     def openVideoFile(self):
         """打开视频文件"""
         file_url, _ = QFileDialog.getOpenFileUrl(self, "选择视频文件")
         if file_url:
+            self.current_video = None
             self.player.setMedia(QMediaContent(file_url))
+            if file_url.isLocalFile():
+                self.waveform_strip.load(file_url.toLocalFile())
             self.player.play()
 
     def playVideo(self):
@@ -132,8 +185,11 @@ class VideoPlayerWidget(QWidget):
             self.lab_video.setText(f"{round((position / video_length) * 100, 2)}%")
 
     def play_video(self, video_path, start_time=None, end_time=None):
-        """播放整个视频或指定片段"""
-        self.player.setMedia(QMediaContent(QUrl.fromLocalFile(video_path)))
+        """播放整个视频或指定片段，已生成预览代理文件时播放代理文件，时间与源文件一致"""
+        self.current_video = os.path.abspath(video_path)
+        self.player.setMedia(QMediaContent(QUrl.fromLocalFile(preview_source(self.current_video))))
+        if self.waveform_strip.video_path != self.current_video:
+            self.waveform_strip.load(self.current_video)
 
         # 如果有指定的开始时间，跳转到该时间
         if start_time is not None:
@@ -149,6 +205,18 @@ class VideoPlayerWidget(QWidget):
             self.player.play()
 
 
+    def use_proxy(self, video_path, proxy_path):
+        """正在预览的视频生成代理文件后切换到代理文件，保持播放位置和状态"""
+        if self.current_video != os.path.abspath(video_path):
+            return
+        position = self.player.position()
+        playing = self.player.state() == QMediaPlayer.PlayingState
+        self.player.setMedia(QMediaContent(QUrl.fromLocalFile(proxy_path)))
+        self.player.setPosition(position)
+        if playing:
+            self.player.play()
+
+
 class myVideoWidget(QVideoWidget):
     """自定义视频显示部件，支持双击全屏"""
     doubleClickedItem = pyqtSignal(str)
@@ -161,11 +229,23 @@ class myVideoWidget(QVideoWidget):
 
 
 class myVideoSlider(QSlider):
-    """自定义进度条控件，支持点击跳转"""
+    """自定义进度条控件，支持点击跳转和悬停预览"""
     ClickedValue = pyqtSignal(int)
+    HoveredValue = pyqtSignal(float, QPoint)  # 鼠标位置占进度条长度的比例, 全局坐标
+    HoverLeft = pyqtSignal()
 
     def __init__(self, parent=None):
         super().__init__(Qt.Horizontal, parent)
+        self.setMouseTracking(True)
+
+    def mouseMoveEvent(self, event):
+        super().mouseMoveEvent(event)
+        ratio = min(1.0, max(0.0, event.localPos().x() / max(1, self.width())))
+        self.HoveredValue.emit(ratio, self.mapToGlobal(QPoint(event.pos().x(), 0)))
+
+    def leaveEvent(self, event):
+        super().leaveEvent(event)
+        self.HoverLeft.emit()
 
     def mousePressEvent(self, event):
         super().mousePressEvent(event)
@@ -0,0 +1,136 @@
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtGui import QPainter, QColor, QPen
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize
+
+from utils.waveform import get_waveform, SILENCE_DB
+
+
+class WaveformWorker(QThread):
+    """在后台读取或计算波形缓存，一个视频只解码一次音频"""
+    waveform_ready = pyqtSignal(str, object)  # 视频路径, Waveform
+    log_signal = pyqtSignal(str)
+
+    def __init__(self, video_paths):
+        super().__init__()
+        self.video_paths = video_paths
+
+    def run(self):
+        for video_path in self.video_paths:
+            if self.isInterruptionRequested():
+                return
+            try:
+                self.waveform_ready.emit(video_path, get_waveform(video_path))
+            except Exception as e:
+                self.log_signal.emit(f"计算波形时发生错误: {video_path}: {str(e)}")
+
+
+class WaveformStrip(QWidget):
+    """
+    显示在播放进度条下方的音频波形，颜色较浅的背景为 RMS 响度。
+
+    数据来自预计算的多级峰值缓存，缩放时只读取当前可见范围。
+    滚轮以鼠标位置为中心缩放，双击恢复显示整个视频，单击跳转到对应位置。
+    """
+    seek_requested = pyqtSignal(int)  # 毫秒
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.video_path = None
+        self.waveform = None
+        self.worker = None  # 正在运行的后台任务，线程退出前需要保留引用
+        self.position = 0
+        self.view_start = 0  # 可见范围（毫秒）
+        self.view_end = 0
+
+    def sizeHint(self):
+        return QSize(300, 48)
+
+    def load(self, video_path):
+        """显示指定视频的波形，没有缓存时在后台计算"""
+        self.video_path = video_path
+        self.waveform = None
+        self.update()
+        # 同时只运行一个后台任务：正在计算其他视频时等它结束，再计算最后选择的视频，
+        # 快速切换视频时不会同时解码多个文件
+        if self.worker is not None and self.worker.isRunning():
+            return
+        self.start_worker()
+
+    def start_worker(self):
+        self.worker = WaveformWorker([self.video_path])
+        self.worker.waveform_ready.connect(self.set_waveform)
+        self.worker.finished.connect(self.on_worker_finished)
+        self.worker.start()
+
+    def on_worker_finished(self):
+        if self.waveform is None and self.video_path is not None and self.worker.video_paths != [self.video_path]:
+            self.start_worker()
+
+    def set_waveform(self, video_path, waveform):
+        if video_path != self.video_path:
+            return  # 已经切换到其他视频
+        self.waveform = waveform
+        self.view_start, self.view_end = 0, waveform.duration_ms()
+        self.update()
+
+    def set_position(self, position):
+        """更新播放位置；播放位置移出可见范围时平移视图"""
+        self.position = position
+        span = self.view_end - self.view_start
+        if self.waveform is not None and span and not self.view_start <= position <= self.view_end:
+            self.view_start = max(0, min(position - span // 2, self.waveform.duration_ms() - span))
+            self.view_end = self.view_start + span
+        self.update()
+
+    def x_to_ms(self, x):
+        return int(self.view_start + (self.view_end - self.view_start) * x / max(1, self.width()))
+
+    def mousePressEvent(self, event):
+        if self.waveform is not None and event.button() == Qt.LeftButton:
+            self.seek_requested.emit(self.x_to_ms(event.localPos().x()))
+
+    def mouseDoubleClickEvent(self, event):
+        if self.waveform is not None:
+            self.view_start, self.view_end = 0, self.waveform.duration_ms()
+            self.update()
+
+    def wheelEvent(self, event):
+        if self.waveform is None:
+            return
+        duration = self.waveform.duration_ms()
+        anchor = self.x_to_ms(event.pos().x())
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        span = min(duration, max(200, int((self.view_end - self.view_start) * factor)))
+        # 保持鼠标下的时间点位置不变
+        ratio = event.pos().x() / max(1, self.width())
+        self.view_start = max(0, min(int(anchor - span * ratio), duration - span))
+        self.view_end = self.view_start + span
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor(30, 30, 30))
+        width, height = self.width(), self.height()
+        if self.waveform is None or self.view_end <= self.view_start or width <= 0:
+            return
+        middle = height / 2
+
+        # RMS 响度：从静音下限到 0 dBFS 映射为高度
+        loudness = self.waveform.rms_for_range(self.view_start, self.view_end, width)
+        painter.setPen(QPen(QColor(60, 90, 120)))
+        for x, db in enumerate(loudness.tolist()):
+            half = (db - SILENCE_DB) / -SILENCE_DB * middle
+            painter.drawLine(x, int(middle - half), x, int(middle + half))
+
+        # 峰值波形
+        mins, maxs = self.waveform.peaks_for_range(self.view_start, self.view_end, width)
+        painter.setPen(QPen(QColor(120, 200, 255)))
+        for x, (low, high) in enumerate(zip(mins.tolist(), maxs.tolist())):
+            painter.drawLine(x, int(middle - high * middle), x, int(middle - low * middle))
+
+        # 播放位置
+        if self.view_start <= self.position <= self.view_end:
+            x = int((self.position - self.view_start) / (self.view_end - self.view_start) * width)
+            painter.setPen(QPen(QColor(255, 80, 80)))
+            painter.drawLine(x, 0, x, height)
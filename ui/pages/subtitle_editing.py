@@ -2,260 +2,422 @@ import os
 import datetime
 import shutil
 import re
-import whisper
 from PyQt5.QtWidgets import QWidget, QGridLayout, QLineEdit, QLabel, QPushButton, QFileDialog, \
-    QListWidget, QMessageBox, QHBoxLayout, QCheckBox, QVBoxLayout, QListWidgetItem, QDialog
+    QListWidget, QMessageBox, QHBoxLayout, QCheckBox, QVBoxLayout, QListWidgetItem, QDialog, QComboBox, \
+    QSpinBox, QAbstractItemView
 from PyQt5.QtCore import Qt, QThread, pyqtSignal,QObject
-import opencc
 
 from ui.components.console import ConsoleBox  # 假设这是自定义的ConsoleBox类
 import subprocess
 import platform
 from ui.components.video_player import VideoPlayerWidget  # 导入封装好的视频播放器
+from ui.components.list_models import CueListModel, SearchResultModel, MaterialListModel, create_list_view
+from ui.components.waveform_strip import WaveformWorker
+from ui.components.thumbnails import thumbnail_provider
 from utils.util import *
 from utils.paths_internal import *
+from utils.ffmpeg_utils import ffmpeg_path, ffprobe_path, ffplay_path, FFmpegRunner, FFmpegCancelled
+from utils.subtitle_index import SubtitleIndex, SEARCH_MODE_NAMES, SEARCH_MODE_EXACT, SEARCH_MODE_FUZZY, \
+    SEARCH_MODE_SEMANTIC
+from utils.subtitle_parser import CueTable, find_subtitle_file
+from utils.transcriber import DEFAULT_OFFSET_MS
+from utils.indexer import SubtitleIndexer
+from utils.settings import SUBTITLE_WORKERS, SUBTITLE_VAD, DEFAULT_MODEL, CLIP_MAX_WORKERS, CLIP_WORKERS_LIMIT, \
+    SEARCH_RESULT_LIMIT, SEARCH_BATCH_INTERVAL, SEMANTIC_TOP_K, WAVEFORM_PRECOMPUTE, PROXY_MEDIA
+from utils.video_clip import clip_video, clip_output_path, video_clips_folder, CLIP_MODE_NAMES, CLIP_MODE_REENCODE, \
+    CLIP_MODE_COPY
+from utils.probe_cache import get_probe_cache, close_probe_cache, describe_media_info, \
+    get_duration as get_video_duration
+from utils.video_merger import VideoMerger, merged_output_path
+from utils.timeline import Timeline, TimelineClip, export_timeline
+from utils.jump_cut import export_jump_cut, jump_cut_ranges, jump_cut_timeline
+from utils.proxy_media import ProxyBuilder
+from utils.scene_detect import get_scenes, load_scenes, snap_range
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+import threading
+import time
+
+
+class MergeWorker(QThread):
+    """在后台线程中导出时间线，实时汇报 ffmpeg 进度，支持取消"""
+    progress = pyqtSignal(object, str)  # 完成百分比, 处理速度
+    log_signal = pyqtSignal(str)
+    merge_finished = pyqtSignal(str)  # 输出文件
+    merge_failed = pyqtSignal(str)  # 错误信息
 
-
-if platform.system() == "Windows":
-    ffmpeg_path = os.path.join(plugins_dir, "ffmpeg/ffmpeg.exe")
-    ffplay_path = os.path.join(plugins_dir, "ffmpeg/ffplay.exe")
-    ffprobe_path = os.path.join(plugins_dir, "ffmpeg/ffprobe.exe")
-else :  # macOS
-    # 对于 macOS 或 Linux，优先使用系统安装的 ffmpeg 工具
-    ffmpeg_path = shutil.which("ffmpeg")  # 从环境变量中寻找 ffmpeg 可执行文件
-    ffplay_path = shutil.which("ffplay")  # 从环境变量中寻找 ffplay 可执行文件
-    ffprobe_path = shutil.which("ffprobe")  # 从环境变量中寻找 ffprobe 可执行文件
-
-    # 如果未找到系统中的 ffmpeg、ffplay、ffprobe，则使用插件目录中的版本
-    if not ffmpeg_path:
-        ffmpeg_path = "ffmpeg"
-    if not ffplay_path:
-        ffplay_path = "ffplay"
-    if not ffprobe_path:
-        ffprobe_path = "ffprobe"
-
-# 输出检测的路径
-print(f"ffmpeg path: {ffmpeg_path}")
-print(f"ffplay path: {ffplay_path}")
-print(f"ffprobe path: {ffprobe_path}")
-
-class VideoMerger:
-    def __init__(self,console):
+    def __init__(self, timeline, output_folder, max_workers=CLIP_MAX_WORKERS, stream_copy=False):
         super().__init__()
-        self.console = console
+        self.timeline = timeline
+        self.output_folder = output_folder
+        self.stream_copy = stream_copy  # 时间线导出时是否直接复制源文件码流
+        # 自动判断哪些片段可以直接复制码流，只有参数不一致的片段才并行转码
+        self.video_merger = VideoMerger(self.log_signal.emit, self.progress.emit, max_workers)
+
+    def run(self):
+        try:
+            if self.timeline.is_whole_files():
+                # 全部是完整的文件（已渲染的片段）时按文件合并
+                file_list = [clip.source for clip in self.timeline.clips]
+                output_file = self.video_merger.merge_videos(file_list, self.output_folder)
+            else:
+                # 否则直接从源文件一次性导出，不生成中间文件
+                output_file = merged_output_path(self.output_folder, len(self.timeline))
+                runner = self.video_merger.new_runner(lambda percent, speed, _: self.progress.emit(percent, speed))
+                export_timeline(self.timeline, output_file, self.stream_copy, runner.run, self.log_signal.emit)
+            self.merge_finished.emit(output_file)
+        except FFmpegCancelled:
+            self.merge_failed.emit("已取消")
+        except subprocess.CalledProcessError as e:
+            self.merge_failed.emit(f"{str(e)}\n{e.stderr or ''}".strip())
+        except (OSError, ValueError) as e:
+            self.merge_failed.emit(str(e))
 
-    def merge_videos(self, file_list, output_folder, reencode=False, resolution=None):
-        """合并视频文件"""
-        file_list_path = self.generate_file_list(file_list)
+    def cancel(self):
+        self.video_merger.cancel()
 
-        # 设置输出文件名
-        timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-        output_file = os.path.join(output_folder, f"merged_{len(file_list)}_videos_{timestamp}.mp4")
 
-        # 根据是否重新编码生成不同的合并命令
-        if reencode:
-            command = self.generate_reencode_command(file_list_path, output_file, resolution)
-        else:
-            command = self.generate_concat_command(file_list_path, output_file)
-
-        # 执行合并命令
-        self.console.log(f"执行合并命令: {' '.join(command)}")
-        subprocess.run(command, check=True)
-
-    def generate_file_list(self, file_list):
-        """生成一个临时的 file_list.txt 文件"""
-        file_list_folder = os.path.join(cache_dir, "cache_video_files")
-
-        # 检查并创建缓存文件夹和文件列表文件夹
-        os.makedirs(file_list_folder, exist_ok=True)
-
-        # 在缓存文件夹中生成 file_list.txt
-        file_list_path = os.path.join(file_list_folder, "file_list.txt")
-        with open(file_list_path, 'w', encoding='utf-8') as f:
-            for video in file_list:
-                f.write(f"file '{video}'\n")
-        return file_list_path
-
-    def generate_concat_command(self, file_list_path, output_file):
-        """生成无损合并命令"""
-        return [
-            ffmpeg_path, "-f", "concat", "-safe", "0", "-i", file_list_path,
-            "-c", "copy", output_file
-        ]
-
-    def generate_reencode_command(self, file_list_path, output_file, resolution):
-        """生成重新编码的合并命令"""
-        command = [
-            ffmpeg_path, "-f", "concat", "-safe", "0", "-i", file_list_path,
-            "-c:v", "libx264", "-preset", "medium", "-crf", "23",  # 使用 libx264 进行编码
-            "-vf", f"scale={resolution}" if resolution else "scale=1920x1080",  # 分辨率
-            "-c:a", "aac", "-b:a", "192k",  # 音频编码
-            output_file
-        ]
-        return command
+class JumpCutWorker(QThread):
+    """在后台逐个导出剪掉停顿后的视频，每个视频只运行一次 ffmpeg，支持取消"""
+    progress = pyqtSignal(object, str)  # 完成百分比, 处理速度
+    log_signal = pyqtSignal(str)
+    file_finished = pyqtSignal(str)  # 输出文件
+    all_finished = pyqtSignal()
+
+    def __init__(self, video_paths, output_folder, drop_fillers=False):
+        super().__init__()
+        self.video_paths = video_paths
+        self.output_folder = output_folder
+        self.drop_fillers = drop_fillers
+        self.runner = FFmpegRunner(lambda percent, speed, _: self.progress.emit(percent, speed))
+
+    def run(self):
+        for index, video_path in enumerate(self.video_paths):
+            self.log_signal.emit(f"正在剪掉停顿 {index + 1}/{len(self.video_paths)}: {video_path}")
+            try:
+                output_file, removed_ms = export_jump_cut(video_path, self.output_folder, self.drop_fillers,
+                                                          run=self.runner.run, log=self.log_signal.emit)
+            except FFmpegCancelled:
+                self.log_signal.emit("已取消")
+                break
+            except subprocess.CalledProcessError as e:
+                self.log_signal.emit(f"剪掉停顿时发生错误: {video_path}: {str(e)}\n{e.stderr or ''}".strip())
+                continue
+            except (OSError, ValueError) as e:
+                self.log_signal.emit(f"剪掉停顿时发生错误: {video_path}: {str(e)}")
+                continue
+            self.log_signal.emit(f"已剪掉 {removed_ms / 1000:.1f} 秒停顿，保存到: {output_file}")
+            self.file_finished.emit(output_file)
+        self.all_finished.emit()
 
+    def cancel(self):
+        self.runner.cancel()
 
 
 class SubtitleWorker(QThread):
     progress = pyqtSignal(int)
     log_signal = pyqtSignal(str)
 
-    def __init__(self, video_files, material_folder, model_name, output_format):
+    def __init__(self, video_files, material_folder, model_name, output_format, workers=1,
+                 offset_ms=DEFAULT_OFFSET_MS, vad=False):
         super().__init__()
         self.video_files = video_files
         self.material_folder = material_folder
-        self.model_name = model_name
-        self.output_format = output_format
-        self.model = None
+        # 大于 1 个 workers 时使用进程池并行转写；vad 表示跳过静音，只转写语音区间
+        self.indexer = SubtitleIndexer(model_name, output_format, workers, offset_ms, vad,
+                                       log=self.log_signal.emit, on_progress=lambda done, _: self.progress.emit(done))
 
     def run(self):
-        self.log_signal.emit("正在加载模型...")
         try:
-            self.model = whisper.load_model(self.model_name)  # 延迟加载模型
-            self.log_signal.emit(f"模型加载完成")
-
-            total_files = len(self.video_files)
-            for index, video in enumerate(self.video_files):
-                video_path = os.path.join(self.material_folder, video)
-                subtitle_path = re.sub(r'\.mp4$', f'.{self.output_format}', video_path, flags=re.IGNORECASE)
-                # 生成字幕并保存
-                self.generate_subtitles(video_path, subtitle_path)
-                self.progress.emit(index + 1)
-                self.log_signal.emit(f"已完成 {index + 1}/{total_files}: {subtitle_path}")
+            video_paths = [os.path.join(self.material_folder, video) for video in self.video_files]
+            self.indexer.index_videos(video_paths)
             self.log_signal.emit(f"创建索引已完成")
         except Exception as e:
             self.log_signal.emit(f"处理时发生错误: {str(e)}")
 
-    def generate_subtitles(self, video_path, output_path):
-        """从视频生成字幕并保存为指定格式"""
-        subtitles = self.model.transcribe(video_path, language="zh")  # 当模型认为视频中无语音时，不生成字幕。默认0.5灵敏度适中
-        # result = self.adjust_subtitle_time(subtitles, offset_seconds=1.02)
-        # 向前偏移 300 毫秒，向后偏移 500 毫秒
-        result = self.adjust_subtitle_time(subtitles, offset_ms=960)
-
-        # 创建转换器
-        converter = opencc.OpenCC('t2s')  # 't2s' 表示繁体转简体，'s2t' 表示简体转繁体
-
-        # 假设 result['text'] 是 Whisper 生成的字幕
-
-        subtitles = []
-        for i, segment in enumerate(result['segments']):
-            start = self.format_time(segment['start'])
-            end = self.format_time(segment['end'])
-            # text = segment['text']
-            text = converter.convert(segment['text'])
-            if self.output_format == 'srt':
-                subtitles.append(f"{i + 1}\n{start} --> {end}\n{text}\n\n")
-            elif self.output_format == 'vtt':
-                subtitles.append(f"{i + 1}\n{start} --> {end}\n{text}\n\n")
-
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.writelines(subtitles)
-
-    def adjust_subtitle_time(self, subtitles, offset_ms):
-        """
-        调整字幕的时间戳，可以向前或向后偏移。
 
-        :param subtitles: Whisper 模型生成的字幕结果
-        :param offset_ms: 偏移时间，单位为毫秒。正数表示向后（延迟），负数表示向前（提前）。
-                          建议范围：-1000 到 1000 毫秒（即最多提前或延迟 1 秒）。
-        :return: 调整后的字幕
+class SubtitleSearchWorker(QThread):
+    """在后台搜索字幕，边搜索边分批发送结果，可以随时取消"""
+    results_found = pyqtSignal(list)  # 一批搜索结果
+    search_finished = pyqtSignal(int)  # 结果总数，取消时不发送
+    log_signal = pyqtSignal(str)
+
+    def __init__(self, keyword, material_folder, limit=SEARCH_RESULT_LIMIT, mode=SEARCH_MODE_EXACT):
+        """
+        :param mode: 搜索模式，见 SEARCH_MODE_*；模糊和语义搜索的结果按相关度排序
         """
-        # 确保偏移值在合理范围内（避免过大偏移）
-        if offset_ms < -1000 or offset_ms > 1000:
-            raise ValueError("偏移时间应在 -1000 到 1000 毫秒之间")
+        super().__init__()
+        self.keyword = keyword.lower()
+        self.material_folder = material_folder
+        self.limit = limit
+        self.mode = mode
 
-        for segment in subtitles['segments']:
-            start_ms = segment['start'] * 1000  # 秒转毫秒
-            end_ms = segment['end'] * 1000  # 秒转毫秒
+    def run(self):
+        """执行字幕搜索操作"""
+        self.log_signal.emit(f"开始搜索关键字: {self.keyword}")
+
+        subtitle_index = SubtitleIndex()
+        count = 0
+        try:
+            # 只重新索引新增或修改过的字幕文件，其余直接使用持久化索引
+            updated, removed = subtitle_index.sync_folder(self.material_folder)
+            if updated or removed:
+                self.log_signal.emit(f"索引已更新: {updated} 个文件更新，{removed} 个文件移除")
+
+            if not subtitle_index.video_count(self.material_folder):
+                self.log_signal.emit("没有找到任何索引文件，请先创建索引。")
+                return
+
+            if self.mode == SEARCH_MODE_SEMANTIC:
+                batches = [self.semantic_search()]
+            elif self.mode == SEARCH_MODE_FUZZY:
+                # 模糊搜索需要先对全部候选结果排序，排序后一次返回
+                batches = [subtitle_index.fuzzy_search(self.keyword, self.material_folder, self.limit)]
+            else:
+                batches = subtitle_index.iter_search(self.keyword, self.material_folder, self.limit)
+
+            # 合并相邻视频的结果，避免每个视频发送一次信号使界面频繁刷新；
+            # 第一批结果找到后立即发送，之后每批至少间隔 SEARCH_BATCH_INTERVAL 秒
+            pending = []
+            last_emit = float('-inf')
+            for batch in batches:
+                if self.isInterruptionRequested():
+                    return
+                pending.extend(batch)
+                if pending and time.monotonic() - last_emit >= SEARCH_BATCH_INTERVAL:
+                    count += len(pending)
+                    self.results_found.emit(pending)
+                    pending = []
+                    last_emit = time.monotonic()
+            if self.isInterruptionRequested():
+                return
+            if pending:
+                count += len(pending)
+                self.results_found.emit(pending)
+        finally:
+            subtitle_index.close()
+
+        self.search_finished.emit(count)
+        if self.limit and count >= self.limit:
+            self.log_signal.emit(f"搜索完成，只显示前 {count} 个匹配结果。")
+        else:
+            self.log_signal.emit(f"搜索完成，共找到 {count} 个匹配结果。")
 
-            # 调整时间，根据 offset_ms 的正负来向前或向后偏移
-            start_ms += offset_ms
-            end_ms += offset_ms
+    def semantic_search(self):
+        """在向量索引中按语义搜索，先为尚未计算向量的字幕文件补充向量"""
+        from utils.semantic_index import SemanticIndex, semantic_search_available
 
-            # 确保时间戳不低于 0
-            if start_ms < 0:
-                start_ms = 0
-            if end_ms < 0:
-                end_ms = 0
+        if not semantic_search_available():
+            self.log_signal.emit("语义搜索需要安装 sentence-transformers")
+            return []
+        semantic_index = SemanticIndex()
+        try:
+            updated, removed = semantic_index.sync_folder(self.material_folder)
+            if updated or removed:
+                self.log_signal.emit(f"向量索引已更新: {updated} 个文件更新，{removed} 个文件移除")
+            return semantic_index.search(self.keyword, self.material_folder, min(self.limit or SEMANTIC_TOP_K,
+                                                                                 SEMANTIC_TOP_K))
+        finally:
+            semantic_index.close()
+
+    def cancel(self):
+        """停止搜索，已经发出的结果不受影响"""
+        self.requestInterruption()
+
+
+class ProbeWorker(QThread):
+    """在后台并行探测素材文件的媒体信息并写入缓存"""
+    file_probed = pyqtSignal(str, object)  # 文件路径, 媒体信息
+    log_signal = pyqtSignal(str)
 
-            # 毫秒转回秒并更新
-            segment['start'] = start_ms / 1000
-            segment['end'] = end_ms / 1000
+    def __init__(self, video_paths, max_workers=4):
+        super().__init__()
+        self.video_paths = video_paths
+        self.max_workers = max_workers
 
-        return subtitles
+    def run(self):
+        def on_done(path, info, error):
+            if error is None:
+                self.file_probed.emit(path, info)
+            else:
+                self.log_signal.emit(f"读取媒体信息失败: {path}: {error}")
 
-    @staticmethod
-    def format_time(seconds):
-        """格式化时间为字幕格式"""
-        hours, remainder = divmod(seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-        milliseconds = int((seconds % 1) * 1000)
-        seconds = int(seconds)
-        return f"{int(hours):02}:{int(minutes):02}:{seconds:02},{milliseconds:03}"
+        get_probe_cache().populate(self.video_paths, self.max_workers, on_done, self.isInterruptionRequested)
 
 
-class SubtitleSearchWorker(QThread):
-    search_finished = pyqtSignal(list)
+class ProxyWorker(QThread):
+    """在后台用有限的并发数为高分辨率素材生成预览代理文件，支持取消"""
+    proxy_ready = pyqtSignal(str, str)  # 视频路径, 代理文件路径
     log_signal = pyqtSignal(str)
 
-    def __init__(self, keyword, material_folder):
+    def __init__(self, video_paths):
         super().__init__()
-        self.keyword = keyword.lower()
-        self.material_folder = material_folder
+        self.video_paths = video_paths
+        self.builder = ProxyBuilder()
 
     def run(self):
-        """执行字幕搜索操作"""
-        self.log_signal.emit(f"开始搜索关键字: {self.keyword}")
+        def on_done(path, proxy, error):
+            if error is None:
+                self.proxy_ready.emit(path, proxy)
+            else:
+                self.log_signal.emit(f"生成预览代理文件失败: {path}: {error}")
 
-        subtitle_files = [f for f in os.listdir(self.material_folder) if f.endswith('.srt')]
-        matches = []
+        self.builder.build_all(self.video_paths, on_done)
 
-        if not subtitle_files:
-            self.log_signal.emit("没有找到任何索引文件，请先创建索引。")
-            return
+    def cancel(self):
+        self.builder.cancel()
 
-        for subtitle_file in subtitle_files:
-            srt_path = os.path.join(self.material_folder, subtitle_file)
-            video_file = os.path.splitext(subtitle_file)[0] + '.mp4'
-            video_path = os.path.join(self.material_folder, video_file)
 
-            with open(srt_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                for i in range(0, len(lines), 4):  # 假设每个字幕块由4行组成
-                    timestamp = lines[i + 1].strip()  # 第二行是时间戳
-                    text = lines[i + 2].strip()  # 第三行是字幕内容
+class SceneDetectWorker(QThread):
+    """在后台依次检测素材的镜头切换点，每个视频运行一次 ffmpeg"""
+    scenes_ready = pyqtSignal(str, object)  # 视频路径, 镜头切换时间列表（毫秒）
+    log_signal = pyqtSignal(str)
 
-                    if self.keyword in text.lower():
-                        # 解析时间戳，获取开始和结束时间
-                        start_time, end_time = self.parse_srt_timestamp(timestamp)
-                        matches.append((video_path, srt_path, text, start_time, end_time))
+    def __init__(self, queue):
+        super().__init__()
+        self.queue = queue  # 与界面共享的待检测队列，只在主线程中添加
 
-        self.search_finished.emit(matches)
-        self.log_signal.emit(f"搜索完成，共找到 {len(matches)} 个匹配结果。")
+    def run(self):
+        while self.queue and not self.isInterruptionRequested():
+            video_path = self.queue.popleft()
+            try:
+                self.scenes_ready.emit(video_path, get_scenes(video_path))
+            except Exception as e:
+                self.log_signal.emit(f"检测镜头切换时发生错误: {video_path}: {str(e)}")
 
-    @staticmethod
-    def time_to_milliseconds(time_str):
-        """将时间字符串转换为毫秒数"""
-        hours, minutes, seconds = time_str.split(':')
-        seconds, milliseconds = seconds.split(',')
-        total_ms = (int(hours) * 3600 + int(minutes) * 60 + int(seconds)) * 1000 + int(milliseconds)
-        return total_ms
 
-    def parse_srt_timestamp(self, timestamp):
-        """解析 SRT 文件中的时间戳"""
-        start, end = timestamp.split(' --> ')
-        start_ms = self.time_to_milliseconds(start)
-        end_ms = self.time_to_milliseconds(end)
-        return start_ms, end_ms
+class ClipJobQueue(QObject):
+    """剪辑任务队列：在后台线程中并发执行 ffmpeg，不阻塞界面，并发数量可以随时调整"""
+    job_finished = pyqtSignal(str, str, int, int)  # 视频路径, 输出文件, 实际开始时间, 请求的开始时间
+    job_failed = pyqtSignal(str, str)  # 视频路径, 错误信息
+    progress = pyqtSignal(int, int)  # 已完成数, 总数
+    job_progress = pyqtSignal(object, str)  # 整个队列的完成百分比, 最近一次报告的处理速度
+    log_signal = pyqtSignal(str)
+    _job_done = pyqtSignal(object, object, object)  # 任务, 实际时间范围, 错误信息（由工作线程发出）
+    _job_progress = pyqtSignal(str, object, str)  # 输出文件, 百分比, 速度（由工作线程发出）
+
+    def __init__(self, max_workers=CLIP_MAX_WORKERS, parent=None):
+        super().__init__(parent)
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=CLIP_WORKERS_LIMIT)
+        self.pending = deque()  # 等待执行的任务
+        self.reserved_outputs = set()  # 已分配给未完成任务的输出路径
+        self.running = 0
+        self.done = 0
+        self.total = 0
+        self.runners = {}  # 输出文件 -> 正在执行的 FFmpegRunner
+        self.runners_lock = threading.Lock()
+        self.job_percents = {}  # 输出文件 -> 正在执行的任务的完成百分比
+        self._job_done.connect(self.on_job_done)
+        self._job_progress.connect(self.on_job_progress)
+
+    def set_max_workers(self, max_workers):
+        """调整同时运行的 ffmpeg 进程数量"""
+        self.max_workers = max(1, min(max_workers, CLIP_WORKERS_LIMIT))
+        self.dispatch()
+
+    def enqueue(self, video_path, start_time, end_time, mode=CLIP_MODE_REENCODE):
+        """加入一个剪辑任务，时间单位为毫秒"""
+        if self.running == 0 and not self.pending:
+            self.done = self.total = 0  # 队列空闲后重新开始计数
+        output_file = clip_output_path(video_path, start_time, end_time, reserved=self.reserved_outputs)
+        self.reserved_outputs.add(output_file)
+        self.pending.append((video_path, start_time, end_time, output_file, mode))
+        self.total += 1
+        self.dispatch()
+
+    def cancel_all(self):
+        """取消等待中的任务，并终止正在运行的 ffmpeg 进程"""
+        while self.pending:
+            _, _, _, output_file, _ = self.pending.popleft()
+            self.reserved_outputs.discard(output_file)
+            self.total -= 1
+        with self.runners_lock:
+            runners = list(self.runners.values())
+        for runner in runners:
+            runner.cancel()
+        if runners:
+            self.log_signal.emit(f"正在取消 {len(runners)} 个剪辑任务")
+        self.progress.emit(self.done, self.total)
+
+    def dispatch(self):
+        while self.pending and self.running < self.max_workers:
+            job = self.pending.popleft()
+            self.running += 1
+            self.executor.submit(self.run_job, job)
+
+    def run_job(self, job):
+        """在工作线程中执行单个剪辑任务"""
+        video_path, start_time, end_time, output_file, mode = job
+        runner = FFmpegRunner(lambda percent, speed, _: self._job_progress.emit(output_file, percent, speed))
+        with self.runners_lock:
+            self.runners[output_file] = runner
+
+        def run(command):
+            self.log_signal.emit(f"执行命令: {' '.join(command)}")
+            runner.run(command)
+
+        try:
+            # 先获取视频的时长，确保开始时间和结束时间在视频时长范围内
+            video_duration = get_video_duration(video_path)
+            if video_duration is None:
+                raise RuntimeError("无法获取视频时长，无法剪辑")
+            end_time = min(end_time, int(video_duration * 1000))
+            if start_time >= end_time:
+                raise RuntimeError("开始时间超出视频时长")
+            actual = clip_video(video_path, start_time, end_time, output_file, mode, run)
+            self._job_done.emit(job, actual, None)
+        except FFmpegCancelled:
+            # 删除取消时残留的不完整文件
+            if os.path.exists(output_file):
+                os.remove(output_file)
+            self._job_done.emit(job, None, "已取消")
+        except Exception as e:
+            self._job_done.emit(job, None, str(e))
+        finally:
+            with self.runners_lock:
+                self.runners.pop(output_file, None)
+
+    def on_job_progress(self, output_file, percent, speed):
+        """汇总所有正在执行的任务进度，换算为整个队列的完成百分比"""
+        if output_file not in self.reserved_outputs:
+            return
+        self.job_percents[output_file] = percent or 0
+        if self.total:
+            overall = (self.done * 100 + sum(self.job_percents.values())) / self.total
+            self.job_progress.emit(overall, speed)
+
+    def on_job_done(self, job, actual, error):
+        """任务完成后回到主线程汇报结果，并启动下一个任务"""
+        video_path, start_time, _, output_file, _ = job
+        self.running -= 1
+        self.done += 1
+        self.reserved_outputs.discard(output_file)
+        self.job_percents.pop(output_file, None)
+        if error is None:
+            self.job_finished.emit(video_path, output_file, actual[0], start_time)
+        else:
+            self.job_failed.emit(video_path, error)
+        self.progress.emit(self.done, self.total)
+        self.dispatch()
 
 
 class subtitle_editing(QWidget):
     def __init__(self):
         super().__init__()
         self.init_ui()
-        self.subtitle_items = []  # 存储字幕信息的列表
+        self.subtitle_cues = CueTable()  # 字幕列表中显示的字幕
+        self.subtitle_video = None  # 字幕列表对应的视频文件
+        self.current_cue_index = -1  # 当前播放位置所在字幕的序号
         self.last_focused_input = None  # 记录最后一次获得焦点的输入框
+        self.search_worker = None  # 正在进行的字幕搜索
+        self.cancelled_search_workers = set()  # 已取消但线程尚未退出的搜索，退出前需要保留引用
+        self.waveform_workers = set()  # 后台预计算波形的任务
+        self.proxy_workers = set()  # 后台生成预览代理文件的任务
+        self.probe_workers = set()  # 后台探测素材媒体信息的任务，线程退出前需要保留引用
+        self.scene_queue = deque()  # 等待检测镜头切换的视频
+        self.scene_requested = set()  # 已加入检测队列的视频，避免重复检测
+        self.scene_worker = None
         self.search_results = []  # 保存搜索匹配项的索引
         self.current_search_index = -1  # 当前搜索结果的索引
 
@@ -324,8 +486,9 @@ class subtitle_editing(QWidget):
         self.first_layout.addLayout(button_layout, 6, 0, 1, 3)
         # 素材列表部分
         material_list_label = QLabel("素材列表")  # 标签，提示用户素材列表
-        self.material_list = QListWidget()  # 列表控件，显示素材文件列表
-        self.material_list.itemClicked.connect(self.on_material_item_clicked)  # 绑定素材列表点击事件
+        self.material_model = MaterialListModel(self, thumbnail_provider())
+        self.material_list = create_list_view(self.material_model)  # 列表控件，显示素材文件列表
+        self.material_list.clicked.connect(self.on_material_item_clicked)  # 绑定素材列表点击事件
 
         # 将素材列表控件添加到 first_layout 中
         self.first_layout.addWidget(material_list_label, 7, 0, 1, 3)  # 标签，占据第6行，跨3列
@@ -335,9 +498,28 @@ class subtitle_editing(QWidget):
         refresh_button = QPushButton("刷新")  # 刷新按钮
         self.first_layout.addWidget(refresh_button, 9, 1, 1, 1)  # 刷新按钮，占据第8行第1列
 
+        # 剪辑模式选择
+        self.clip_mode_combo = QComboBox()
+        for mode, name in CLIP_MODE_NAMES.items():
+            self.clip_mode_combo.addItem(name, mode)
+        self.first_layout.addWidget(QLabel("剪辑模式:"), 10, 0, 1, 1)
+        self.first_layout.addWidget(self.clip_mode_combo, 10, 1, 1, 2)
+
+        # 根据字幕自动剪掉停顿
+        jump_cut_button = QPushButton("剪掉停顿")
+        jump_cut_button.clicked.connect(self.jump_cut_selected_material)
+        self.drop_fillers_checkbox = QCheckBox("去掉语气词")
+        self.first_layout.addWidget(jump_cut_button, 11, 0, 1, 1)
+        self.first_layout.addWidget(self.drop_fillers_checkbox, 11, 1, 1, 2)
+
         # 搜索字幕区域
         self.search_input = QLineEdit()  # 搜索输入框
-        self.second_layout.addWidget(self.search_input, 0, 0, 1, 2)  # 搜索输入框，占据第1行第0列
+        self.second_layout.addWidget(self.search_input, 0, 0, 1, 1)  # 搜索输入框，占据第1行第0列
+        # 搜索模式：精确匹配、模糊（容忍同音字、繁简差异和少量错字）、语义（按内容搜索）
+        self.search_mode_combo = QComboBox()
+        for mode, name in SEARCH_MODE_NAMES.items():
+            self.search_mode_combo.addItem(name, mode)
+        self.second_layout.addWidget(self.search_mode_combo, 0, 1, 1, 1)
         search_button = QPushButton('搜索字幕')  # 搜索按钮
         search_button.clicked.connect(self.search_subtitle)  # 绑定搜索按钮点击事件
         self.second_layout.addWidget(search_button, 0, 2, 1, 1)  # 搜索按钮，占据第1行第1列
@@ -353,18 +535,53 @@ class subtitle_editing(QWidget):
         self.second_layout.addWidget(display_clip_button, 1, 2, 1, 1)  # 列表控件，占据第2行，跨2列
 
         # 搜索结果展示区域
-        self.display_area = QListWidget()  # 搜索结果展示列表
+        self.search_result_model = SearchResultModel(self, thumbnail_provider())
+        self.display_area = create_list_view(self.search_result_model)  # 搜索结果展示列表
+        self.display_area.setSelectionMode(QAbstractItemView.ExtendedSelection)  # 支持多选后批量剪辑
         # self.display_area = ListWidgetWithButtons()  # 使用封装的带按钮和右键菜单的列表
         self.second_layout.addWidget(self.display_area, 2, 0, 1, 3)  # 列表控件，占据第2行，跨2列
-        self.display_area.itemClicked.connect(self.on_video_selected)  # 绑定点击事件
+        self.display_area.clicked.connect(self.on_video_selected)  # 绑定点击事件
 
         # 日志显示区域
         # ------ Console 上方添加 Label ------
+        # 批量剪辑：把选中的搜索结果一次性加入剪辑队列，并发数可调
+        batch_clip_layout = QHBoxLayout()
+        batch_clip_button = QPushButton("批量剪辑")
+        batch_clip_button.clicked.connect(self.clip_selected_results)
+        self.clip_workers_spin = QSpinBox()
+        self.clip_workers_spin.setRange(1, CLIP_WORKERS_LIMIT)
+        self.clip_workers_spin.setValue(CLIP_MAX_WORKERS)
+        # 默认只把片段加入时间线，勾选后才把每个片段渲染为文件
+        self.render_clips_checkbox = QCheckBox("渲染为文件")
+        batch_clip_layout.addWidget(batch_clip_button)
+        batch_clip_layout.addWidget(self.render_clips_checkbox)
+        # 勾选后剪辑的开始和结束时间对齐到附近的镜头切换点，并在后台检测素材的镜头切换
+        self.snap_scenes_checkbox = QCheckBox("对齐镜头")
+        self.snap_scenes_checkbox.toggled.connect(self.on_snap_scenes_toggled)
+        batch_clip_layout.addWidget(self.snap_scenes_checkbox)
+        batch_clip_layout.addWidget(QLabel("并发数:"))
+        batch_clip_layout.addWidget(self.clip_workers_spin)
+        self.search_count_label = QLabel()  # 搜索过程中实时显示已找到的结果数
+        batch_clip_layout.addWidget(self.search_count_label)
+        self.second_layout.addLayout(batch_clip_layout, 3, 0, 1, 3)
+
         console_label = QLabel("日志信息")
-        self.second_layout.addWidget(console_label, 3, 0, 1, 3)  # 将 Label 放到日志显示区域上方
+        self.second_layout.addWidget(console_label, 4, 0, 1, 3)  # 将 Label 放到日志显示区域上方
         self.console = ConsoleBox(self)  # 日志显示控件
         self.second_layout.addWidget(self.console, 5, 0, 2, 3)  # 日志控件占据第5行和第6行，跨2列
 
+        # 剪辑任务队列
+        self.clip_queue = ClipJobQueue(CLIP_MAX_WORKERS, self)
+        self.clip_queue.job_finished.connect(self.on_clip_finished)
+        self.clip_queue.job_failed.connect(self.on_clip_failed)
+        self.clip_queue.progress.connect(self.on_clip_progress)
+        self.clip_queue.log_signal.connect(self.console.log)
+        self.clip_queue.job_progress.connect(self.console.set_progress)
+        self.merge_worker = None
+        self.jump_cut_worker = None
+        self.console.cancel_requested.connect(self.cancel_tasks)
+        self.clip_workers_spin.valueChanged.connect(self.clip_queue.set_max_workers)
+
         # 字幕搜索区域（第三列上部）
         search_layout = QHBoxLayout()  # 水平布局，放置字幕搜索相关控件
         self.subtitle_search_input = QLineEdit()  # 字幕搜索输入框
@@ -379,7 +596,9 @@ class subtitle_editing(QWidget):
         next_button.clicked.connect(self.select_next_result)  # 绑定下一个按钮点击事件
 
         # 将所有控件添加到字幕搜索布局中
+        self.subtitle_fuzzy_checkbox = QCheckBox("模糊")
         search_layout.addWidget(self.subtitle_search_input)
+        search_layout.addWidget(self.subtitle_fuzzy_checkbox)
         search_layout.addWidget(search_button)
         search_layout.addWidget(prev_button)
         search_layout.addWidget(next_button)
@@ -408,15 +627,18 @@ class subtitle_editing(QWidget):
         self.thirdly_layout.addWidget(clip_section_btn, 1, 3, 2, 1)  # 将结束时间布局放在第2行，占据4列
 
         # 字幕展示区域（用于显示字幕列表）
-        self.subtitle_list = QListWidget()  # 列表控件，用于显示字幕列表
+        self.subtitle_model = CueListModel(self)
+        self.subtitle_list = create_list_view(self.subtitle_model)  # 列表控件，用于显示字幕列表
         self.thirdly_layout.addWidget(self.subtitle_list, 3, 0, 1, 4)  # 列表控件放在第3行，占据4列
         # 用户点击字幕列表中的某个字幕时播放对应的视频片段
-        self.subtitle_list.itemClicked.connect(self.on_subtitle_selected)  # 绑定单击事件
-        self.subtitle_list.itemDoubleClicked.connect(self.on_subtitle_double_clicked)  # 绑定双击事件
+        self.subtitle_list.clicked.connect(self.on_subtitle_selected)  # 绑定单击事件
+        self.subtitle_list.doubleClicked.connect(self.on_subtitle_double_clicked)  # 绑定双击事件
 
         # 视频播放器部分（第四列上部）
         self.video_player = VideoPlayerWidget(self)  # 视频播放器控件
         self.fourthly_layout.addWidget(self.video_player, 0, 0, 1, 4)  # 视频播放器占据第0行，占4列
+        # 播放时自动选中并滚动到当前播放位置的字幕
+        self.video_player.player.positionChanged.connect(self.update_subtitle_selection)
 
         # 操作按钮组部分
         operate_button_group = QHBoxLayout()  # 水平布局，用于放置操作按钮
@@ -428,6 +650,8 @@ class subtitle_editing(QWidget):
         top_btn = QPushButton("置顶")  # 置顶按钮，用于操作字幕列表
         bottom_button = QPushButton("置底")  # 置底按钮，用于操作字幕列表
         marge_button = QPushButton("合并")  # 合并按钮，用于操作字幕合并
+        save_project_button = QPushButton("保存工程")  # 把时间线保存为工程文件
+        open_project_button = QPushButton("打开工程")  # 从工程文件恢复时间线
         operate_button_group.addWidget(delete_button)  # 将"向上"按钮加入布局
         operate_button_group.addWidget(clear_cache_button)  # 将按钮添加到按钮组布局中
         operate_button_group.addWidget(refresh_button)  # 将按钮添加到按钮组布局中
@@ -436,6 +660,8 @@ class subtitle_editing(QWidget):
         operate_button_group.addWidget(top_btn)  # 将"置顶"按钮加入布局
         operate_button_group.addWidget(bottom_button)  # 将"置底"按钮加入布局
         operate_button_group.addWidget(marge_button)  # 将"合并"按钮加入布局
+        operate_button_group.addWidget(save_project_button)
+        operate_button_group.addWidget(open_project_button)
 
         delete_button.clicked.connect(self.delete_item)  # 绑定“删除”按钮事件
         clear_cache_button.clicked.connect(self.clear_cache)  # 绑定按钮点击事件
@@ -445,8 +671,10 @@ class subtitle_editing(QWidget):
         top_btn.clicked.connect(self.move_to_top)  # 绑定“置顶”按钮事件
         bottom_button.clicked.connect(self.move_to_bottom)  # 绑定“置底”按钮事件
         marge_button.clicked.connect(self.merge_videos)  # 绑定“合并”按钮事件
+        save_project_button.clicked.connect(self.save_project)
+        open_project_button.clicked.connect(self.open_project)
 
-        # 结果显示区域，用于显示操作结果（第三列和第四列的下半部分）
+        # 结果显示区域（时间线），每个条目保存一个 TimelineClip（第三列和第四列的下半部分）
         self.result_display = QListWidget()  # 列表控件，用于显示操作结果
         self.result_display.itemClicked.connect(self.on_result_item_clicked)
         # 调整行高，扩大显示区域，跨越第三列和第四列的下半部分
@@ -463,7 +691,7 @@ class subtitle_editing(QWidget):
         self.setLayout(self.main_layout)  # 设置窗口的主布局为主网格布局
 
     def merge_videos(self):
-        """合并 result_display 中的所有视频条目，确认合并并选择导出目录"""
+        """导出 result_display 中的时间线，确认合并并选择导出目录"""
         output_folder = self.output_folder.text()
         if not output_folder or not os.path.exists(output_folder):
             QMessageBox.warning(self, "错误", "请选择有效的输出文件夹")
@@ -497,49 +725,73 @@ class subtitle_editing(QWidget):
                     return
                 output_folder = custom_folder  # 使用用户选择的导出目录
 
-            # 收集 result_display 中的视频文件路径
-            file_list = []
-            for i in range(self.result_display.count()):
-                video_path = self.result_display.item(i).text()
-                file_list.append(video_path)
-
-            # 询问是否重新编码
-            reencode = self.ask_user_for_reencode()
-
-            # 获取原始分辨率，如果需要重新编码
-            if reencode:
-                resolution = self.get_original_resolution(file_list[0])  # 获取第一个视频的分辨率
-            else:
-                resolution = None
-
-            # 调用 VideoMerger 类中的方法来合并视频
-            video_merger = VideoMerger(self.console)  # 假设 console 是日志控件
-            try:
-                video_merger.merge_videos(file_list, output_folder, reencode=reencode, resolution=resolution)
-                self.console.log(f"视频已成功合并并保存到: {output_folder}")
-                QMessageBox.information(self, "成功", f"视频已成功合并并保存到: {output_folder}")
-            except subprocess.CalledProcessError as e:
-                self.console.log(f"合并视频时发生错误: {str(e)}")
-                QMessageBox.warning(self, "合并错误", "视频合并失败，请检查ffmpeg配置")
-
-    def ask_user_for_reencode(self):
-        """询问用户是否需要重新编码"""
-        reply = QMessageBox.question(self, '重新编码', '是否需要重新编码视频？', QMessageBox.Yes | QMessageBox.No,
-                                     QMessageBox.No)
-        return reply == QMessageBox.Yes
+            # 在后台线程中导出时间线，进度显示在日志区域；快速剪辑模式下直接复制源文件码流
+            stream_copy = self.clip_mode_combo.currentData() == CLIP_MODE_COPY
+            self.merge_worker = MergeWorker(self.current_timeline(), output_folder, self.clip_workers_spin.value(),
+                                            stream_copy)
+            self.merge_worker.log_signal.connect(self.console.log)
+            self.merge_worker.progress.connect(self.console.set_progress)
+            self.merge_worker.merge_finished.connect(self.on_merge_finished)
+            self.merge_worker.merge_failed.connect(self.on_merge_failed)
+            self.merge_worker.start()
+
+    def on_merge_finished(self, output_file):
+        self.console.reset_progress()
+        self.console.log(f"视频已成功合并并保存到: {output_file}")
+        QMessageBox.information(self, "成功", f"视频已成功合并并保存到: {output_file}")
+
+    def on_merge_failed(self, error):
+        self.console.reset_progress()
+        self.console.log(f"合并视频时发生错误: {error}")
+        if error != "已取消":
+            QMessageBox.warning(self, "合并错误", "视频合并失败，请检查ffmpeg配置")
+
+    def cancel_tasks(self):
+        """取消正在进行的剪辑和合并任务"""
+        self.clip_queue.cancel_all()
+        if self.merge_worker is not None and self.merge_worker.isRunning():
+            self.merge_worker.cancel()
+        if self.jump_cut_worker is not None and self.jump_cut_worker.isRunning():
+            self.jump_cut_worker.cancel()
+
+    def jump_cut_selected_material(self):
+        """
+        根据字幕剪掉素材列表中选中视频的停顿：默认把保留的片段加入时间线，
+        勾选“渲染为文件”时直接导出剪掉停顿后的视频
+        """
+        selected_index = self.material_list.currentIndex()
+        if not selected_index.isValid():
+            QMessageBox.warning(self, "错误", "请先在素材列表中选择一个视频")
+            return
+        video_path = os.path.join(self.material_folder.text(), selected_index.data())
+        drop_fillers = self.drop_fillers_checkbox.isChecked()
+
+        if self.render_clips_checkbox.isChecked():
+            output_folder = self.output_folder.text()
+            if not output_folder or not os.path.exists(output_folder):
+                QMessageBox.warning(self, "错误", "请选择有效的输出文件夹")
+                return
+            # 上一次导出还在进行时不再启动新的任务，避免替换掉正在运行的线程
+            if self.jump_cut_worker is not None and self.jump_cut_worker.isRunning():
+                QMessageBox.warning(self, "提示", "正在剪掉停顿，请等待完成或取消后再试")
+                return
+            self.jump_cut_worker = JumpCutWorker([video_path], output_folder, drop_fillers)
+            self.jump_cut_worker.log_signal.connect(self.console.log)
+            self.jump_cut_worker.progress.connect(self.console.set_progress)
+            self.jump_cut_worker.all_finished.connect(self.console.reset_progress)
+            self.jump_cut_worker.start()
+            return
 
-    def get_original_resolution(self, video_path):
-        """获取视频的原始分辨率"""
-        try:
-            command = [
-                ffprobe_path, "-v", "error", "-select_streams", "v:0", "-show_entries", "stream=width,height",
-                "-of", "csv=s=x:p=0", video_path
-            ]
-            output = subprocess.check_output(command).decode('utf-8').strip()
-            return output  # 返回类似 "1920x1080" 的分辨率
-        except subprocess.CalledProcessError as e:
-            self.console.log(f"获取分辨率时出错: {str(e)}")
-            return "1920x1080"  # 默认分辨率
+        subtitle_file = find_subtitle_file(video_path)
+        if subtitle_file is None:
+            QMessageBox.warning(self, "错误", "该视频没有字幕文件，请先创建索引")
+            return
+        duration = get_video_duration(video_path)
+        range_starts, range_ends = jump_cut_ranges(CueTable.load(subtitle_file), drop_fillers,
+                                                   duration_ms=int(duration * 1000) if duration else None)
+        for clip in jump_cut_timeline(video_path, range_starts, range_ends).clips:
+            self.add_timeline_clip(clip)
+        self.console.log(f"已把 {len(range_starts)} 个保留片段加入时间线")
 
     def clear_cache(self):
         """清除缓存目录中的所有文件和文件夹"""
@@ -555,6 +807,7 @@ class subtitle_editing(QWidget):
 
         if reply == QMessageBox.Yes:
             try:
+                close_probe_cache()  # 先关闭媒体信息缓存的数据库连接，才能删除数据库文件
                 # 清除缓存目录中的所有内容（不删除缓存目录本身）
                 for root, dirs, files in os.walk(cache_dir):
                     for file in files:
@@ -565,7 +818,10 @@ class subtitle_editing(QWidget):
                         shutil.rmtree(dir_path)
 
                 self.console.log("缓存目录已成功清空")
-                self.result_display.clear()
+                # 已渲染的片段文件随缓存一起删除，只保留引用素材文件的时间线片段
+                for row in reversed(range(self.result_display.count())):
+                    if not os.path.exists(self.result_display.item(row).data(Qt.UserRole).source):
+                        self.result_display.takeItem(row)
             except Exception as e:
                 self.console.log(f"清空缓存目录时发生错误: {str(e)}")
                 QMessageBox.warning(self, "清除错误", f"无法清除缓存: {str(e)}")
@@ -573,17 +829,16 @@ class subtitle_editing(QWidget):
             self.console.log("取消清除缓存操作")
 
     def refresh_cache(self):
-        """刷新 result_display，加载缓存目录下的视频片段"""
-        # 获取项目根目录下的缓存目录
-        video_clips_folder = os.path.join(cache_dir, "cache_video_fragment")
-
+        """刷新 result_display，重新加载缓存目录下已渲染的视频片段"""
         # 如果缓存目录或视频片段目录不存在，提示用户
         if not os.path.exists(video_clips_folder):
             self.console.log("缓存已刷新")
             return
 
-        # 清空 result_display
-        self.result_display.clear()
+        # 移除已渲染的片段条目，引用素材文件的时间线片段保持不变
+        for row in reversed(range(self.result_display.count())):
+            if self.is_rendered_clip(self.result_display.item(row).data(Qt.UserRole)):
+                self.result_display.takeItem(row)
 
         # 定义正则表达式来匹配视频文件扩展名，并忽略大小写
         pattern = re.compile(r'\.(mp4|avi|mkv|mov)$', re.IGNORECASE)
@@ -595,18 +850,68 @@ class subtitle_editing(QWidget):
             for video in video_files:
                 # 构造每个视频的完整路径
                 video_path = os.path.join(video_clips_folder, video)
-                self.result_display.addItem(video_path)  # 将视频路径添加到 result_display
+                self.add_timeline_clip(TimelineClip(video_path))  # 将视频添加到 result_display
             self.console.log(f"找到 {len(video_files)} 个视频片段并加载到列表中")
         else:
             self.console.log("缓存目录中没有找到任何视频文件")
 
+    def add_timeline_clip(self, clip):
+        """在 result_display 末尾添加一个时间线片段"""
+        item = QListWidgetItem(clip.label())
+        item.setData(Qt.UserRole, clip)
+        item.setToolTip(clip.source)
+        self.result_display.addItem(item)
+
+    def current_timeline(self):
+        """按 result_display 中的顺序生成时间线"""
+        return Timeline(self.result_display.item(i).data(Qt.UserRole) for i in range(self.result_display.count()))
+
+    @staticmethod
+    def is_rendered_clip(clip):
+        """是否是渲染到缓存文件夹中的片段文件"""
+        return clip.is_whole_file() and os.path.dirname(clip.source) == os.path.abspath(video_clips_folder)
+
+    def save_project(self):
+        """把时间线保存为工程文件"""
+        if self.result_display.count() == 0:
+            QMessageBox.warning(self, "错误", "时间线为空")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, '保存工程', '', '工程文件 (*.json)')
+        if not path:
+            return
+        try:
+            self.current_timeline().save(path)
+            self.console.log(f"工程已保存到: {path}")
+        except OSError as e:
+            QMessageBox.warning(self, "错误", f"保存工程失败: {str(e)}")
+
+    def open_project(self):
+        """打开工程文件，替换当前的时间线"""
+        path, _ = QFileDialog.getOpenFileName(self, '打开工程', '', '工程文件 (*.json)')
+        if not path:
+            return
+        try:
+            timeline = Timeline.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.warning(self, "错误", f"打开工程失败: {str(e)}")
+            return
+        self.result_display.clear()
+        for clip in timeline.clips:
+            self.add_timeline_clip(clip)
+        missing = [clip.source for clip in timeline.clips if not os.path.exists(clip.source)]
+        if missing:
+            self.console.log(f"以下源文件不存在: {', '.join(sorted(set(missing)))}")
+        self.console.log(f"已打开工程: {path}，共 {len(timeline)} 个片段")
+
     def on_result_item_clicked(self, item):
-        """当用户点击 result_display 中的某个视频时播放该视频"""
-        video_path = item.text()  # 获取条目中文件的路径
-        if os.path.exists(video_path):
-            self.play_video(video_path)
+        """当用户点击 result_display 中的某个片段时，在源文件中跳转播放该片段"""
+        clip = item.data(Qt.UserRole)
+        if not os.path.exists(clip.source):
+            self.console.log(f"视频文件不存在: {clip.source}")
+        elif clip.is_whole_file():
+            self.play_video(clip.source)
         else:
-            self.console.log(f"视频文件不存在: {video_path}")
+            self.play_video(clip.source, clip.start_ms, clip.end_ms)
 
     def move_up(self):
         """将选中的视频条目向上移动"""
@@ -646,17 +951,19 @@ class subtitle_editing(QWidget):
         if current_row >= 0:
             # 获取选中的条目
             item = self.result_display.item(current_row)
-            video_path = item.text()  # 获取文件路径
+            clip = item.data(Qt.UserRole)
+            video_path = clip.source  # 获取文件路径
 
             # 弹出确认对话框
             dialog = QMessageBox(self)
             dialog.setWindowTitle("确认删除")
-            dialog.setText(f"是否确认删除选中的文件？\n{video_path}")
+            dialog.setText(f"是否确认删除选中的片段？\n{item.text()}")
             dialog.setIcon(QMessageBox.Warning)
 
-            # 添加复选框，用户选择是否删除本地文件
+            # 添加复选框，用户选择是否删除本地文件；引用素材文件的片段只从时间线中移除，不提供删除源文件
             delete_local_file_checkbox = QCheckBox("同时删除本地目录中的文件", dialog)
-            dialog.setCheckBox(delete_local_file_checkbox)
+            if self.is_rendered_clip(clip):
+                dialog.setCheckBox(delete_local_file_checkbox)
 
             # 添加确认和取消按钮
             dialog.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
@@ -680,9 +987,9 @@ class subtitle_editing(QWidget):
                 # 从 result_display 列表中删除条目
                 self.result_display.takeItem(current_row)
 
-    def on_material_item_clicked(self, item):
+    def on_material_item_clicked(self, index):
         """当用户点击素材列表中的某个视频时，弹出视频播放对话框"""
-        video_file = item.text()
+        video_file = index.data()
         material_folder = self.material_folder.text()
         video_path = os.path.join(material_folder, video_file)
 
@@ -729,17 +1036,74 @@ class subtitle_editing(QWidget):
 
     def update_material_list(self, folder):
         """根据选择的素材文件夹更新素材列表"""
-        self.material_list.clear()  # 清空现有的列表内容
         pattern = re.compile(r'\.(mp4|avi|mkv|mov)$', re.IGNORECASE)
         video_files = [f for f in os.listdir(folder) if pattern.search(f)]
+        self.material_model.set_files(video_files, folder)
+        self.cancel_material_probes()
 
         if video_files:
-            for video in video_files:
-                self.material_list.addItem(video)
             self.console.log(f"找到 {len(video_files)} 个视频文件")
+
+            # 后台并行探测媒体信息（时长、编码、关键帧等）并写入缓存，之后剪辑合并无需再调用 ffprobe
+            video_paths = [os.path.join(folder, video) for video in video_files]
+            self.probe_materials(video_paths)
         else:
             self.console.log("未找到任何视频文件")
 
+    def cancel_material_probes(self):
+        """停止之前文件夹的探测任务，线程退出前仍保留在 probe_workers 中"""
+        for worker in self.probe_workers:
+            if not worker.isInterruptionRequested():
+                worker.requestInterruption()
+                # 之前文件夹的探测结果不再显示到当前的素材列表中
+                worker.file_probed.disconnect(self.on_material_probed)
+
+    def probe_materials(self, video_paths):
+        """在后台探测素材的媒体信息"""
+        worker = ProbeWorker(video_paths)
+        worker.file_probed.connect(self.on_material_probed)
+        worker.log_signal.connect(self.console.log)
+        self.probe_workers.add(worker)
+        worker.finished.connect(lambda: self.on_probe_finished(worker))
+        worker.start()
+
+    def on_probe_finished(self, worker):
+        """探测完成后开始计算波形和生成代理文件，已被新文件夹替换的任务直接丢弃"""
+        self.probe_workers.discard(worker)
+        if worker.isInterruptionRequested():
+            return
+        if WAVEFORM_PRECOMPUTE:
+            # 探测完成后再逐个解码音频计算波形，避免与探测同时争抢磁盘
+            self.precompute_waveforms(worker.video_paths)
+        if PROXY_MEDIA:
+            # 代理文件需要探测得到的分辨率和编码来判断是否需要生成
+            self.generate_proxies(worker.video_paths)
+
+    def precompute_waveforms(self, video_paths):
+        """在后台为素材计算波形缓存，切换素材文件夹时停止之前的任务"""
+        for worker in self.waveform_workers:
+            worker.requestInterruption()
+        worker = WaveformWorker(video_paths)
+        worker.log_signal.connect(self.console.log)
+        self.waveform_workers.add(worker)
+        worker.finished.connect(lambda: self.waveform_workers.discard(worker))
+        worker.start()
+
+    def generate_proxies(self, video_paths):
+        """在后台为高分辨率素材生成预览代理文件，切换素材文件夹时停止之前的任务"""
+        for worker in self.proxy_workers:
+            worker.cancel()
+        worker = ProxyWorker(video_paths)
+        worker.log_signal.connect(self.console.log)
+        worker.proxy_ready.connect(self.video_player.use_proxy)
+        self.proxy_workers.add(worker)
+        worker.finished.connect(lambda: self.proxy_workers.discard(worker))
+        worker.start()
+
+    def on_material_probed(self, video_path, info):
+        """在素材列表的提示信息中显示媒体信息"""
+        self.material_model.set_tooltip(os.path.basename(video_path), describe_media_info(info))
+
     def browse_output_folder(self):
         """浏览输出文件夹"""
         folder = QFileDialog.getExistingDirectory(self, '选择输出文件夹')
@@ -772,9 +1136,9 @@ class subtitle_editing(QWidget):
     #     elif system_platform == "Linux":  # Linux
     #         subprocess.run(["xdg-open", folder])
 
-    def on_video_selected(self, item):
+    def on_video_selected(self, index):
         """当用户点击搜索结果中的某个字幕片段时，打开子窗口播放视频"""
-        video_file, _, start_time, end_time = item.data(Qt.UserRole)
+        video_file, _, start_time, end_time = index.data(Qt.UserRole)
         # # 将开始时间和结束时间从毫秒转化为秒
         # start_time_seconds = start_time / 1000
         # end_time_seconds = end_time / 1000
@@ -788,51 +1152,34 @@ class subtitle_editing(QWidget):
         self.play_video(video_file, start_time, end_time)
 
     def show_subtitles(self,video_file):
-        # 清空字幕展示区域
-        self.subtitle_list.clear()
-        self.subtitle_items = []  # 清空字幕列表
-
-        # 假设有个方法 load_subtitles_for_video 从视频加载字幕
-        subtitles = self.load_subtitles_for_video(video_file)
-        for subtitle in subtitles:
-            subtitle_item = QListWidgetItem(subtitle['text'])
-            subtitle_item.setData(Qt.UserRole, (video_file, subtitle['start_time'], subtitle['end_time']))
-            self.subtitle_list.addItem(subtitle_item)
-            self.subtitle_items.append(subtitle)  # 保存字幕信息
+        # 从视频同名的字幕文件加载字幕，列表按需从字幕表中读取每一行
+        self.subtitle_cues = self.load_subtitles_for_video(video_file)
+        self.subtitle_video = os.path.abspath(video_file)
+        self.current_cue_index = -1
+        self.subtitle_model.set_cues(self.subtitle_cues, video_file)
 
     def load_subtitles_for_video(self, video_file):
-        """从视频文件加载字幕（假设有对应的 .srt 文件）"""
-        # 假设字幕文件是 .srt 格式，并与视频文件同名
-        srt_file = os.path.splitext(video_file)[0] + '.srt'
-        subtitles = []
-        if os.path.exists(srt_file):
-            with open(srt_file, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                for i in range(0, len(lines), 4):  # 假设每4行是一个字幕块
-                    timestamp = lines[i + 1].strip()
-                    text = lines[i + 2].strip()
-                    start_time, end_time = self.parse_srt_timestamp(timestamp)
-                    subtitles.append({'start_time': start_time, 'end_time': end_time, 'text': text})
-        return subtitles
-
-    def update_subtitle_selection(self):
-        """根据当前视频的播放时间更新右侧字幕选中状态"""
-        current_position = self.player.position()  # 获取当前播放时间 (毫秒)
-        for i, subtitle in enumerate(self.subtitle_items):
-            start_time = subtitle['start_time']
-            end_time = subtitle['end_time']
-            if start_time <= current_position <= end_time:
-                self.subtitle_list.setCurrentRow(i)  # 自动选中当前播放的字幕
-                self.subtitle_list.scrollToItem(self.subtitle_list.currentItem(), QListWidget.PositionAtCenter)
-                break
-
-    @staticmethod
-    def parse_srt_timestamp(timestamp):
-        """解析 SRT 文件中的时间戳"""
-        start, end = timestamp.split(' --> ')
-        start_ms = SubtitleSearchWorker.time_to_milliseconds(start)
-        end_ms = SubtitleSearchWorker.time_to_milliseconds(end)
-        return start_ms, end_ms
+        """从视频同名的 .srt / .vtt 文件加载字幕，没有字幕文件时返回空的 CueTable"""
+        subtitle_file = find_subtitle_file(video_file)
+        if subtitle_file is None:
+            return CueTable()
+        return CueTable.load(subtitle_file)
+
+    def update_subtitle_selection(self, position):
+        """根据当前视频的播放时间（毫秒）更新右侧字幕选中状态，每次只做一次二分查找"""
+        if self.subtitle_video is None or self.video_player.current_video != self.subtitle_video:
+            return  # 播放的不是字幕列表对应的视频
+        index = self.subtitle_cues.index_at(position)
+        if index < 0 or index == self.current_cue_index:
+            return  # 处于字幕间隙时保持上一条字幕的选中状态
+        self.current_cue_index = index
+        self.select_subtitle_row(index)  # 自动选中当前播放的字幕
+
+    def select_subtitle_row(self, row):
+        """选中字幕列表中的指定行并滚动到列表中间"""
+        index = self.subtitle_model.index(row)
+        self.subtitle_list.setCurrentIndex(index)
+        self.subtitle_list.scrollTo(index, QAbstractItemView.PositionAtCenter)
 
     def eventFilter(self, obj, event):
         """捕获焦点事件"""
@@ -855,14 +1202,11 @@ class subtitle_editing(QWidget):
         self.search_results = []
         self.current_search_index = -1
 
-        # 遍历字幕列表，找到所有匹配的项
-        for i in range(self.subtitle_list.count()):
-            item = self.subtitle_list.item(i)
-            subtitle_text = item.text().lower()  # 将字幕内容转换为小写进行匹配
-
-            if search_text in subtitle_text:
-                # 保存匹配的项的索引
-                self.search_results.append(i)
+        # 在字幕文本中查找所有匹配的字幕，模糊搜索的结果按相关度排序
+        if self.subtitle_fuzzy_checkbox.isChecked():
+            self.search_results = self.subtitle_cues.find_fuzzy(search_text)
+        else:
+            self.search_results = self.subtitle_cues.find(search_text)
 
         if self.search_results:
             self.console.log(f"找到 {len(self.search_results)} 个匹配结果")
@@ -876,10 +1220,8 @@ class subtitle_editing(QWidget):
         """根据给定的索引选中并滚动到对应的字幕项"""
         if index >= 0 and index < len(self.search_results):
             result_index = self.search_results[index]
-            item = self.subtitle_list.item(result_index)
-            self.subtitle_list.setCurrentRow(result_index)
-            self.subtitle_list.scrollToItem(item, QListWidget.PositionAtCenter)
-            self.console.log(f"当前选择: {item.text()}")
+            self.select_subtitle_row(result_index)
+            self.console.log(f"当前选择: {self.subtitle_cues.text(result_index)}")
 
     def select_next_result(self):
         """选择下一个匹配的搜索结果"""
@@ -905,10 +1247,10 @@ class subtitle_editing(QWidget):
         else:
             self.console.log("已到第一个匹配结果")
 
-    def on_subtitle_double_clicked(self, item):
+    def on_subtitle_double_clicked(self, index):
         """当用户双击字幕时，将时间显示到最后一个获得焦点的输入框"""
-        video_file, start_time, end_time = item.data(Qt.UserRole)
-        text = item.text()  # 获取字幕文本内容
+        video_file, start_time, end_time = index.data(Qt.UserRole)
+        text = index.data()  # 获取字幕文本内容
 
         # 判断最后一次获得焦点的输入框
         if self.last_focused_input == self.start_time_input:
@@ -930,10 +1272,10 @@ class subtitle_editing(QWidget):
         milliseconds = ms % 1000
         return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
 
-    def on_subtitle_selected(self, item):
+    def on_subtitle_selected(self, index):
         """当用户点击字幕列表中的某个字幕时，播放对应的视频片段"""
         """当用户点击字幕列表中的某个字幕时，播放对应的视频片段"""
-        video_file, start_time, end_time = item.data(Qt.UserRole)
+        video_file, start_time, end_time = index.data(Qt.UserRole)
         self.play_video(video_file, start_time, end_time)
 
     def start_processing(self):
@@ -956,8 +1298,10 @@ class subtitle_editing(QWidget):
             material_folder=material_folder,
             # model_name=self.model_combo.currentText(),
             # output_format=self.format_combo.currentText()
-            model_name='base',
-            output_format='srt'
+            model_name=DEFAULT_MODEL,
+            output_format='srt',
+            workers=SUBTITLE_WORKERS,
+            vad=SUBTITLE_VAD
         )
         self.worker.log_signal.connect(self.console.log)
         self.worker.start()
@@ -970,22 +1314,31 @@ class subtitle_editing(QWidget):
             QMessageBox.warning(self, "错误", "请输入搜索关键字和素材文件夹")
             return
 
-        self.display_area.clear()
-
-        self.search_worker = SubtitleSearchWorker(keyword, material_folder)
-        self.search_worker.search_finished.connect(self.display_search_results)
+        # 开始新的搜索时取消正在进行的搜索，旧搜索之后发出的结果不再显示
+        if self.search_worker is not None:
+            old_worker = self.search_worker
+            old_worker.cancel()
+            old_worker.results_found.disconnect()
+            old_worker.search_finished.disconnect()
+            self.cancelled_search_workers.add(old_worker)
+            old_worker.finished.connect(lambda: self.cancelled_search_workers.discard(old_worker))
+        self.search_result_model.clear()
+        self.search_count_label.setText("搜索中...")
+
+        self.search_worker = SubtitleSearchWorker(keyword, material_folder,
+                                                  mode=self.search_mode_combo.currentData())
+        self.search_worker.results_found.connect(self.display_search_results)
+        self.search_worker.search_finished.connect(self.on_search_finished)
         self.search_worker.log_signal.connect(self.console.log)
         self.search_worker.start()
 
     def display_search_results(self, matches):
-        """显示搜索结果"""
-        for video_path, srt_path, subtitle_text, start_time, end_time in matches:
-            # 展示视频文件名 + 字幕匹配文本
-            display_text = f"{video_path} - {subtitle_text} ({start_time // 1000}s - {end_time // 1000}s)"
-            item = QListWidgetItem(display_text)
-            # 为每个 QListWidgetItem 存储实际的视频路径、开始和结束时间，便于播放时使用
-            item.setData(Qt.UserRole, (video_path, srt_path, start_time, end_time))
-            self.display_area.addItem(item)
+        """追加一批搜索结果，显示文本由模型在滚动到对应行时再生成"""
+        self.search_result_model.append_matches(matches)
+        self.search_count_label.setText(f"已找到 {self.search_result_model.rowCount()} 个结果...")
+
+    def on_search_finished(self, count):
+        self.search_count_label.setText(f"共 {count} 个结果")
 
     def clip_selected_video(self):
         """根据 display_area 中选中的视频，结合输入框中的开始和结束时间进行剪辑"""
@@ -1007,9 +1360,9 @@ class subtitle_editing(QWidget):
             return
 
         # 获取选中的视频文件
-        selected_item = self.display_area.currentItem()
-        if selected_item is not None:
-            video_path, _, _, _ = selected_item.data(Qt.UserRole)
+        selected_index = self.display_area.currentIndex()
+        if selected_index.isValid():
+            video_path, _, _, _ = selected_index.data(Qt.UserRole)
             self.clip_video_segment(video_path, start_time, end_time)
         else:
             QMessageBox.warning(self, "错误", "请先选择一个视频片段")
@@ -1035,14 +1388,14 @@ class subtitle_editing(QWidget):
             return
 
         # 获取选中的视频文件
-        selected_item = self.display_area.currentItem()
-        selected_item2 = self.material_list.currentItem()
-        if selected_item:
-            video_path, _, _, _ = selected_item.data(Qt.UserRole)
+        selected_index = self.display_area.currentIndex()
+        selected_index2 = self.material_list.currentIndex()
+        if selected_index.isValid():
+            video_path, _, _, _ = selected_index.data(Qt.UserRole)
             self.clip_video_segment(video_path, start_time, end_time)
-        elif selected_item2:
+        elif selected_index2.isValid():
             material_folder = self.material_folder.text()
-            video_path = os.path.join(material_folder, selected_item2.text())
+            video_path = os.path.join(material_folder, selected_index2.data())
             self.clip_video_segment(video_path, start_time, end_time)
         else:
             QMessageBox.warning(self, "错误", "请先选择一个视频片段")
@@ -1069,88 +1422,109 @@ class subtitle_editing(QWidget):
             return None
 
     def on_clipping(self):
-        selected_item = self.display_area.currentItem()
-        if selected_item:
-            video_path, srt_path, start_time, end_time = selected_item.data(Qt.UserRole)
+        selected_index = self.display_area.currentIndex()
+        if selected_index.isValid():
+            video_path, srt_path, start_time, end_time = selected_index.data(Qt.UserRole)
             self.console.log(
                 f"开始剪辑视频片段: {video_path} 从 {self.format_time2(start_time)} 到 {self.format_time2(end_time)}")
             self.clip_video_segment(video_path, start_time, end_time)
         else:
             QMessageBox.warning(self, "错误", "请先选择要剪辑的字幕片段")
 
-    def get_video_duration(self, video_path):
-        command = [ffprobe_path, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", video_path]
-        try:
-            duration = float(subprocess.check_output(command).decode().strip())
-            return duration
-        except subprocess.CalledProcessError:
-            self.console.log(f"获取视频时长失败: {video_path}")
-            return None
-
     def clip_video_segment(self, video_path, start_time, end_time):
-        """使用 ffmpeg 剪辑视频片段并将其保存到项目根目录下的缓存文件夹中"""
-
-        # 先获取视频的时长，确保开始时间和结束时间在视频时长范围内
-        video_duration = self.get_video_duration(video_path)
-        if video_duration is None:
-            QMessageBox.warning(self, "错误", "无法获取视频时长，无法剪辑")
-            return
-
+        """
+        把片段加入时间线；勾选“渲染为文件”时把剪辑任务加入队列，
+        由后台线程使用 ffmpeg 剪辑并保存到项目根目录下的缓存文件夹中
+        """
         if start_time >= end_time:
             QMessageBox.warning(self, "错误", "开始时间不能晚于或等于结束时间")
             return
+        start_time, end_time = self.snap_to_scenes(video_path, start_time, end_time)
+        if self.render_clips_checkbox.isChecked():
+            self.clip_queue.enqueue(video_path, start_time, end_time, self.clip_mode_combo.currentData())
+        else:
+            clip = TimelineClip(video_path, start_time, end_time)
+            self.add_timeline_clip(clip)
+            self.console.log(f"已加入时间线: {clip.label()}")
+
+    def clip_selected_results(self):
+        """把 display_area 中选中的搜索结果（未选中时为全部结果）批量加入时间线或剪辑队列"""
+        rows = sorted(index.row() for index in self.display_area.selectionModel().selectedRows())
+        if not rows:
+            rows = range(self.search_result_model.rowCount())
+        if not rows:
+            QMessageBox.warning(self, "错误", "没有可剪辑的搜索结果")
+            return
 
-        # 创建缓存文件夹路径
-        video_clips_folder = os.path.join(cache_dir, "cache_video_fragment")
-
-        # 检查并创建缓存文件夹和视频片段文件夹
-        os.makedirs(video_clips_folder, exist_ok=True)
-
-        # 获取原视频文件名（不带扩展名）
-        base_name = os.path.splitext(os.path.basename(video_path))[0]
-
-        # 生成时间戳作为文件名的一部分
-        start_time_str = self.format_time2(start_time).replace(",", "_").replace(":", "-")
-        end_time_str = self.format_time2(end_time).replace(",", "_").replace(":", "-")
-
-        # 构造初始文件名并放入缓存文件夹的“视频片段”子文件夹中
-        output_file_name = f"single_{base_name}_{start_time_str}_to_{end_time_str}.mp4"
-        output_file = os.path.join(video_clips_folder, output_file_name)
-
-        # 检查文件是否存在，如果存在，则添加 (1), (2), (3)... 以避免覆盖
-        counter = 1
-        while os.path.exists(output_file):
-            output_file_name = f"single_{base_name}_{start_time_str}_to_{end_time_str}({counter}).mp4"
-            output_file = os.path.join(video_clips_folder, output_file_name)
-            counter += 1
-
-        # 将毫秒转换为秒（ffmpeg 使用秒为单位）
-        start_time_seconds = start_time / 1000
-        duration_seconds = (end_time - start_time) / 1000
-
-        # 使用 ffmpeg 剪辑视频片段
-        command = [
-            ffmpeg_path, "-y",  # -y 表示覆盖输出文件
-            "-ss", str(start_time_seconds),  # 开始时间，提前指定位置
-            "-i", video_path,  # 输入视频路径
-            "-t", str(duration_seconds),  # 持续时间
-            "-c:v", "libx264",  # 使用 libx264 进行视频编码
-            "-preset", "fast",  # 编码速度，fast 为较快速度与质量平衡
-            "-crf", "23",  # CRF 值越低质量越好，23 是默认值
-            "-c:a", "aac",  # 使用 AAC 进行音频编码
-            "-b:a", "192k",  # 音频比特率为 192 kbps
-            output_file  # 输出文件路径
-        ]
+        mode = self.clip_mode_combo.currentData()
+        render = self.render_clips_checkbox.isChecked()
+        items = [self.search_result_model.index(row).data(Qt.UserRole) for row in rows]
+        for video_path, _, start_time, end_time in items:
+            start_time, end_time = self.snap_to_scenes(video_path, start_time, end_time, quiet=True)
+            if render:
+                self.clip_queue.enqueue(video_path, start_time, end_time, mode)
+            else:
+                self.add_timeline_clip(TimelineClip(video_path, start_time, end_time))
+        self.console.log(f"已加入 {len(items)} 个剪辑任务" if render else f"已加入 {len(items)} 个片段到时间线")
 
+    def snap_to_scenes(self, video_path, start_time, end_time, quiet=False):
+        """
+        勾选“对齐镜头”时把片段的开始和结束时间对齐到附近的镜头切换点。
+        视频还没有检测过时在后台检测，本次使用原来的时间。
+        """
+        if not self.snap_scenes_checkbox.isChecked():
+            return start_time, end_time
         try:
-            self.console.log(f"执行命令: {' '.join(command)}")
-            subprocess.run(command, check=True)
-            self.console.log(f"视频片段已剪辑并保存到: {output_file}")
-            self.result_display.addItem(output_file)  # 在 result_display 区域显示剪辑后的文件路径
-            QMessageBox.information(self, "成功", f"视频片段已剪辑并保存到: {output_file}")
-        except subprocess.CalledProcessError as e:
-            self.console.log(f"剪辑视频时发生错误: {str(e)}")
-            QMessageBox.warning(self, "剪辑错误", "视频剪辑失败，请检查ffmpeg配置")
+            scenes = load_scenes(video_path)
+        except OSError:
+            return start_time, end_time
+        if scenes is None:
+            self.start_scene_detection([video_path])
+            if not quiet:
+                self.console.log(f"正在检测镜头切换，本次未对齐: {video_path}")
+            return start_time, end_time
+        snapped = snap_range(scenes, start_time, end_time)
+        if snapped != (start_time, end_time) and not quiet:
+            self.console.log(f"已对齐到镜头切换: {self.format_time2(snapped[0])} - {self.format_time2(snapped[1])}")
+        return snapped
+
+    def on_snap_scenes_toggled(self, checked):
+        """勾选“对齐镜头”后在后台检测当前素材文件夹中所有视频的镜头切换"""
+        folder = self.material_folder.text()
+        if checked and folder and os.path.isdir(folder):
+            self.start_scene_detection([os.path.join(folder, name) for name in self.material_model.files])
+
+    def start_scene_detection(self, video_paths):
+        """把视频加入镜头检测队列，后台任务没有运行时启动"""
+        for video_path in video_paths:
+            if video_path not in self.scene_requested:
+                self.scene_requested.add(video_path)
+                self.scene_queue.append(video_path)
+        if self.scene_queue and (self.scene_worker is None or not self.scene_worker.isRunning()):
+            self.scene_worker = SceneDetectWorker(self.scene_queue)
+            self.scene_worker.scenes_ready.connect(self.on_scenes_ready)
+            self.scene_worker.log_signal.connect(self.console.log)
+            # 后台任务退出前刚加入队列的视频由新的任务继续处理
+            self.scene_worker.finished.connect(lambda: self.start_scene_detection([]))
+            self.scene_worker.start()
+
+    def on_scenes_ready(self, video_path, scenes):
+        self.console.log(f"镜头检测完成: {os.path.basename(video_path)}，{len(scenes)} 个切换点")
+
+    def on_clip_finished(self, video_path, output_file, actual_start, requested_start):
+        """剪辑任务完成后立即把片段加入 result_display"""
+        if actual_start != requested_start:
+            self.console.log(f"开始时间已对齐到关键帧: {self.format_time2(actual_start)}")
+        self.console.log(f"视频片段已剪辑并保存到: {output_file}")
+        self.add_timeline_clip(TimelineClip(output_file))  # 在 result_display 区域显示剪辑后的文件
+
+    def on_clip_failed(self, video_path, error):
+        self.console.log(f"剪辑视频时发生错误: {video_path}: {error}")
+
+    def on_clip_progress(self, done, total):
+        if done == total:
+            self.console.reset_progress()
+            self.console.log(f"剪辑队列已完成: {done} 个任务")
 
     def clear_index(self):
         """清除所有生成的 SRT 文件"""
@@ -1170,10 +1544,14 @@ class subtitle_editing(QWidget):
                                      QMessageBox.No)
         if reply == QMessageBox.Yes:
             # 删除所有 .srt 文件
+            subtitle_index = SubtitleIndex()
             for srt_file in srt_files:
-                os.remove(os.path.join(material_folder, srt_file))
+                srt_path = os.path.join(material_folder, srt_file)
+                os.remove(srt_path)
+                subtitle_index.remove_video(srt_path)
                 self.console.log(f"索引文件已删除: {srt_file}")
+            subtitle_index.close()
 
         self.console.log("清除索引操作完成。")
-        self.display_area.clear()  # 清空展示区域的内容
+        self.search_result_model.clear()  # 清空展示区域的内容
         QMessageBox.information(self, "成功", "所有字幕文件已成功清除")
@@ -0,0 +1,81 @@
+# utils/audio_cache.py
+"""
+转写前用 ffmpeg 把视频的音轨提取为 16 kHz 单声道 PCM WAV，并缓存在 cache_dir 下。
+
+Whisper 直接读取缓存的音频数组，不再每次通过自身的 ffmpeg 管道解码整个视频容器；
+换模型或调整参数后重新创建索引时也可以复用缓存。
+"""
+import os
+import uuid
+import wave
+import hashlib
+import threading
+import subprocess
+
+from utils.paths_internal import cache_dir
+from utils.ffmpeg_utils import ffmpeg_path
+
+audio_cache_dir = os.path.join(cache_dir, "cache_audio")
+
+# Whisper 模型要求的采样率
+SAMPLE_RATE = 16000
+
+# 同一个视频在本进程中同时只提取一次，其他线程等待结果
+_extract_locks = {}
+_extract_locks_lock = threading.Lock()
+
+
+def audio_cache_path(video_path):
+    """根据视频路径、大小和修改时间生成缓存文件路径，视频变化后自动失效"""
+    video_path = os.path.abspath(video_path)
+    stat = os.stat(video_path)
+    key = hashlib.blake2b(f"{video_path}|{stat.st_size}|{stat.st_mtime}".encode('utf-8'),
+                          digest_size=8).hexdigest()
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(audio_cache_dir, f"{base_name}_{key}.wav")
+
+
+def extract_audio(video_path):
+    """
+    提取视频音轨为 16 kHz 单声道 16 位 PCM WAV，已缓存时直接返回缓存路径。
+
+    :return: 缓存的 WAV 文件路径
+    """
+    output_path = audio_cache_path(video_path)
+    if os.path.exists(output_path):
+        return output_path
+    with _extract_locks_lock:
+        lock = _extract_locks.setdefault(output_path, threading.Lock())
+    with lock:
+        if os.path.exists(output_path):
+            return output_path
+        return _extract_audio(video_path, output_path)
+
+
+def _extract_audio(video_path, output_path):
+    os.makedirs(audio_cache_dir, exist_ok=True)
+    # 先写入临时文件，完成后再重命名，避免中断时留下不完整的缓存；
+    # 临时文件名各不相同，转写子进程和界面同时提取同一个视频时互不影响
+    temp_path = f"{output_path[:-len('.wav')]}.{uuid.uuid4().hex}.part.wav"
+    command = [
+        ffmpeg_path, "-nostdin", "-y", "-v", "error",
+        "-i", video_path,
+        "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-c:a", "pcm_s16le",
+        temp_path
+    ]
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise RuntimeError(f"提取音频失败: {video_path}\n{result.stderr.decode('utf-8', 'ignore').strip()}")
+    os.replace(temp_path, output_path)
+    return output_path
+
+
+def load_audio(wav_path):
+    """读取缓存的 WAV 文件，返回 Whisper 可直接使用的 float32 数组（取值范围 -1 到 1）"""
+    import numpy as np
+
+    with wave.open(wav_path, 'rb') as f:
+        frames = f.readframes(f.getnframes())
+    return np.frombuffer(frames, np.int16).astype(np.float32) / 32768.0
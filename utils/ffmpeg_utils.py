@@ -0,0 +1,156 @@
+# utils/ffmpeg_utils.py
+"""
+ffmpeg / ffprobe 可执行文件的定位，以及各模块共用的 ffmpeg 调用工具。
+"""
+import os
+import shutil
+import platform
+import threading
+import subprocess
+from collections import deque
+
+from utils.paths_internal import plugins_dir
+from utils.log_manager import log_manager
+
+if platform.system() == "Windows":
+    ffmpeg_path = os.path.join(plugins_dir, "ffmpeg/ffmpeg.exe")
+    ffplay_path = os.path.join(plugins_dir, "ffmpeg/ffplay.exe")
+    ffprobe_path = os.path.join(plugins_dir, "ffmpeg/ffprobe.exe")
+else :  # macOS
+    # 对于 macOS 或 Linux，优先使用系统安装的 ffmpeg 工具
+    ffmpeg_path = shutil.which("ffmpeg")  # 从环境变量中寻找 ffmpeg 可执行文件
+    ffplay_path = shutil.which("ffplay")  # 从环境变量中寻找 ffplay 可执行文件
+    ffprobe_path = shutil.which("ffprobe")  # 从环境变量中寻找 ffprobe 可执行文件
+
+    # 如果未找到系统中的 ffmpeg、ffplay、ffprobe，则使用插件目录中的版本
+    if not ffmpeg_path:
+        ffmpeg_path = "ffmpeg"
+    if not ffplay_path:
+        ffplay_path = "ffplay"
+    if not ffprobe_path:
+        ffprobe_path = "ffprobe"
+
+# 输出检测的路径（写入日志而不是标准输出，命令行模式下标准输出只用于输出结果）
+log_manager.info(f"ffmpeg path: {ffmpeg_path}")
+log_manager.info(f"ffplay path: {ffplay_path}")
+log_manager.info(f"ffprobe path: {ffprobe_path}")
+
+
+class FFmpegCancelled(Exception):
+    """ffmpeg 任务被用户取消"""
+
+
+class FFmpegRunner:
+    """
+    运行 ffmpeg 命令并实时解析进度。
+
+    启动时追加 -progress pipe:1，从标准输出逐行读取 out_time / speed 等键值，
+    通过回调汇报进度；cancel() 先让 ffmpeg 自行退出，超时后再终止进程。
+    同一个实例可以依次执行多条命令，取消后后续命令不再执行。
+    """
+
+    def __init__(self, on_progress=None):
+        """
+        :param on_progress: 进度回调 on_progress(percent, speed, out_time)，在执行命令的线程中调用；
+                            percent 为 0-100，无法得知总时长时为 None；speed 为 ffmpeg 报告的倍速，如 "2.5x"
+        """
+        self.on_progress = on_progress
+        self.process = None
+        self.cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def command_duration(command):
+        """从命令中的 -t 参数读取输出时长（秒）"""
+        if "-t" in command:
+            try:
+                return float(command[command.index("-t") + 1])
+            except (IndexError, ValueError):
+                return None
+        return None
+
+    def run(self, command, duration=None):
+        """
+        执行一条 ffmpeg 命令，失败时抛出 subprocess.CalledProcessError，被取消时抛出 FFmpegCancelled。
+
+        :param duration: 输出的总时长（秒），用于计算百分比；为空时尝试从 -t 参数读取
+        """
+        if self.cancelled.is_set():
+            raise FFmpegCancelled()
+        if duration is None:
+            duration = self.command_duration(command)
+
+        command = [command[0], "-progress", "pipe:1", "-nostats", *command[1:]]
+        with self._lock:
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            stderr=subprocess.PIPE)
+        process = self.process
+
+        # 在单独的线程中读取 stderr，避免管道写满阻塞 ffmpeg，只保留最后几行用于报错
+        stderr_tail = deque(maxlen=20)
+        stderr_thread = threading.Thread(target=self._drain, args=(process.stderr, stderr_tail), daemon=True)
+        stderr_thread.start()
+
+        status = {}
+        for raw_line in process.stdout:
+            key, _, value = raw_line.decode('utf-8', 'ignore').strip().partition('=')
+            status[key] = value
+            if key == 'progress':
+                self._report(status, duration)
+
+        process.wait()
+        stderr_thread.join()
+        with self._lock:
+            self.process = None
+
+        if self.cancelled.is_set():
+            raise FFmpegCancelled()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, command, stderr='\n'.join(stderr_tail))
+
+    @staticmethod
+    def _drain(stream, tail):
+        for line in stream:
+            tail.append(line.decode('utf-8', 'ignore').rstrip())
+
+    def _report(self, status, duration):
+        if self.on_progress is None:
+            return
+        # out_time_us 和 out_time_ms 的单位都是微秒（后者是 ffmpeg 的历史遗留命名）
+        out_time_us = status.get('out_time_us') or status.get('out_time_ms')
+        try:
+            out_time = max(int(out_time_us), 0) / 1000000
+        except (TypeError, ValueError):
+            return
+        percent = None
+        if duration:
+            percent = 100.0 if status.get('progress') == 'end' else min(out_time / duration * 100, 100.0)
+        self.on_progress(percent, status.get('speed', '').strip(), out_time)
+
+    def cancel(self, timeout=3):
+        """
+        取消当前及后续命令：先发送 q 让 ffmpeg 正常退出，超时后终止进程。
+        不会阻塞调用方，可以直接在界面线程中调用。
+        """
+        self.cancelled.set()
+        with self._lock:
+            process = self.process
+        if process is None or process.poll() is not None:
+            return
+        try:
+            process.stdin.write(b'q')
+            process.stdin.flush()
+        except OSError:
+            pass
+        threading.Thread(target=self._terminate, args=(process, timeout), daemon=True).start()
+
+    @staticmethod
+    def _terminate(process, timeout):
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.terminate()
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
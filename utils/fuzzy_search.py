@@ -0,0 +1,144 @@
+# utils/fuzzy_search.py
+"""
+模糊字幕搜索：繁简统一、拼音和编辑距离。
+
+Whisper 转写的中文经常出现同音字错误（例如把“剪辑”写成“剪级”），精确匹配会漏掉这些字幕。
+建立索引时为每条字幕保存一个“读音键”：先用 opencc 统一为简体并转小写，再把汉字转换为无声调拼音，
+其余字符逐个保留，用空格连接，例如 “剪辑 OK” -> “jian ji o k”。
+倒排表按相邻两个音节建立，搜索时先找出共享足够多音节组合的候选字幕，
+再计算关键字与字幕中最相近片段的编辑距离（按音节计），在允许的错误数以内的结果按距离排序。
+
+拼音转换使用可选依赖 pypinyin，未安装时退化为逐字比较，仍然支持繁简统一和编辑距离。
+"""
+import threading
+import importlib.util
+
+_converter = None
+_converter_lock = threading.Lock()
+
+
+def fold_text(text):
+    """繁体转简体并转为小写"""
+    global _converter
+    if _converter is None:
+        with _converter_lock:
+            if _converter is None:
+                import opencc  # 延迟导入，只在建立索引或模糊搜索时加载
+                _converter = opencc.OpenCC('t2s')
+    return _converter.convert(text).lower()
+
+
+def phonetic_scheme():
+    """读音键的生成方式，安装或卸载 pypinyin 后索引中的读音键需要重新生成"""
+    return 'pinyin' if importlib.util.find_spec('pypinyin') is not None else 'chars'
+
+
+def syllables(text):
+    """
+    把文本转换为音节序列：汉字为无声调拼音，其余字符逐个保留，空白被忽略。
+
+    :param text: 已经 fold_text 处理过的文本
+    """
+    try:
+        from pypinyin import lazy_pinyin
+    except ImportError:
+        return [ch for ch in text if not ch.isspace()]
+    # 非汉字部分原样返回为一整段，这里拆成单个字符，使中英文混合的文本也能按字符计算编辑距离
+    tokens = lazy_pinyin(text, errors=lambda chars: list(chars))
+    return [token for token in tokens if token and not token.isspace()]
+
+
+def phonetic_key(text):
+    """字幕或关键字的读音键，音节之间用空格分隔"""
+    return ' '.join(syllables(fold_text(text)))
+
+
+def phonetic_terms(tokens):
+    """读音键的倒排词项：相邻两个音节的组合"""
+    return {f"{tokens[i]} {tokens[i + 1]}" for i in range(len(tokens) - 1)}
+
+
+def max_errors(length):
+    """关键字有 length 个音节时允许的编辑距离，大约每三个音节允许一处错误，少于三个音节时不允许错误"""
+    return length // 3
+
+
+def substring_distance(pattern, tokens):
+    """
+    计算 pattern 与 tokens 中最相近的连续片段之间的编辑距离（插入、删除、替换均计 1）。
+
+    与普通编辑距离的区别是 pattern 可以从 tokens 的任意位置开始、在任意位置结束。
+    """
+    if not pattern:
+        return 0
+    previous = [0] * (len(tokens) + 1)  # 第 0 行全为 0：匹配可以从任意位置开始
+    for i, expected in enumerate(pattern, 1):
+        current = [i] + [0] * len(tokens)
+        for j, token in enumerate(tokens, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (token != expected))
+        previous = current
+    return min(previous)
+
+
+class FuzzyQuery:
+    """预先处理好的模糊搜索关键字"""
+
+    def __init__(self, keyword):
+        self.lowered = keyword.strip().lower()
+        self.folded = fold_text(keyword.strip())
+        self.tokens = syllables(self.folded)
+        self.terms = phonetic_terms(self.tokens)
+        self.max_errors = max_errors(len(self.tokens))
+        # 每处错误最多影响两个相邻音节组合，候选字幕至少要共享这么多个组合
+        self.min_shared_terms = max(1, len(self.terms) - 2 * self.max_errors)
+
+    def __bool__(self):
+        return bool(self.tokens)
+
+    def contains(self, text_lower):
+        """文本中直接包含关键字（原样或繁简统一后）"""
+        return self.lowered in text_lower or self.folded in text_lower
+
+    def is_candidate(self, text_lower, text_tokens):
+        """
+        与索引中的筛选条件相同：直接包含关键字，或共享至少 min_shared_terms 个音节组合（单音节关键字要求包含该音节）。
+        多音字的读音随上下文变化（如“银行”中的“行”读 hang），直接包含关键字的字幕不能只按读音筛选。
+        """
+        if self.contains(text_lower):
+            return True
+        if not self.terms:
+            return self.tokens[0] in text_tokens
+        return len(self.terms & phonetic_terms(text_tokens)) >= self.min_shared_terms
+
+    def distance(self, text_lower, text_tokens):
+        """
+        字幕与关键字的距离，越小越相关：文本中直接包含关键字时为 0，
+        否则为读音上的编辑距离加 1（同音字为 1），不是候选字幕或超出允许的错误数时返回 None。
+
+        :param text_lower: 转为小写的字幕文本
+        :param text_tokens: 字幕的音节序列，即读音键按空格拆分
+        """
+        if self.contains(text_lower):
+            return 0
+        if not self.is_candidate(text_lower, text_tokens):
+            return None
+        distance = substring_distance(self.tokens, text_tokens)
+        return distance + 1 if distance <= self.max_errors else None
+
+
+def rank_texts(keyword, texts):
+    """
+    对一组文本做模糊匹配，返回按相关度排序的序号列表。
+
+    :param texts: 可迭代的 (小写文本, 音节序列)
+    """
+    query = FuzzyQuery(keyword)
+    if not query:
+        return []
+    scored = []
+    for index, (folded, tokens) in enumerate(texts):
+        distance = query.distance(folded, tokens)
+        if distance is not None:
+            scored.append((distance, index))
+    scored.sort()
+    return [index for _, index in scored]
@@ -0,0 +1,89 @@
+# utils/index_manifest.py
+"""
+记录每个视频生成字幕时的输入信息，重新创建索引时跳过输入未变化的视频。
+
+清单保存在 cache_dir 下，键为视频的绝对路径，值包含文件大小、修改时间、
+部分内容哈希以及生成字幕时使用的模型名、时间偏移和是否启用语音活动检测。
+"""
+import os
+import json
+import hashlib
+
+from utils.paths_internal import cache_dir
+
+manifest_path = os.path.join(cache_dir, "subtitle_manifest.json")
+
+# 部分哈希时从文件头、中、尾各读取的字节数
+SAMPLE_SIZE = 1024 * 1024
+
+
+def partial_hash(path, size=None, sample_size=SAMPLE_SIZE):
+    """读取文件头、中、尾三段内容计算哈希，避免读取整个大视频文件"""
+    if size is None:
+        size = os.path.getsize(path)
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, 'rb') as f:
+        if size <= sample_size * 3:
+            digest.update(f.read())
+        else:
+            for offset in (0, (size - sample_size) // 2, size - sample_size):
+                f.seek(offset)
+                digest.update(f.read(sample_size))
+    return digest.hexdigest()
+
+
+class IndexManifest:
+    """字幕生成清单"""
+
+    def __init__(self, path=manifest_path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                # 清单损坏时当作空清单处理，相当于全部重新生成
+                self.entries = {}
+
+    def is_up_to_date(self, video_path, subtitle_path, model_name, offset_ms, vad=False):
+        """判断视频的字幕是否已经由相同输入生成过"""
+        entry = self.entries.get(os.path.abspath(video_path))
+        if entry is None or not os.path.exists(subtitle_path):
+            return False
+        if entry.get('model') != model_name or entry.get('offset_ms') != offset_ms \
+                or entry.get('vad', False) != vad:
+            return False
+
+        stat = os.stat(video_path)
+        if entry.get('size') != stat.st_size:
+            return False
+        if entry.get('mtime') == stat.st_mtime:
+            return True
+
+        # 修改时间变化（例如文件被复制）但内容相同时，仍视为未变化，并刷新修改时间
+        if entry.get('hash') == partial_hash(video_path, stat.st_size):
+            entry['mtime'] = stat.st_mtime
+            self.save()
+            return True
+        return False
+
+    def record(self, video_path, model_name, offset_ms, vad=False):
+        """记录一个视频的字幕已经生成，并立即写入磁盘，避免任务中断后丢失进度"""
+        stat = os.stat(video_path)
+        self.entries[os.path.abspath(video_path)] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'hash': partial_hash(video_path, stat.st_size),
+            'model': model_name,
+            'offset_ms': offset_ms,
+            'vad': vad,
+        }
+        self.save()
+
+    def save(self):
+        """先写入临时文件再替换，避免写到一半时清单损坏"""
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
@@ -0,0 +1,152 @@
+# utils/indexer.py
+"""
+创建索引：为视频生成字幕并写入搜索索引。
+
+界面中的 SubtitleWorker 和命令行共用这里的逻辑，不依赖 Qt。
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.subtitle_index import SubtitleIndex, VIDEO_EXTENSIONS
+from utils.index_manifest import IndexManifest
+from utils.transcriber import transcribe_to_file, subtitle_path_for, create_transcribe_pool, submit_transcribe, \
+    DEFAULT_OFFSET_MS
+from utils.model_registry import get_model
+from utils.audio_cache import extract_audio
+from utils.settings import SEMANTIC_SEARCH
+
+
+def find_videos(folder):
+    """列出文件夹中的视频文件（不递归），按文件名排序"""
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder)
+                  if os.path.splitext(f)[1].lower() in VIDEO_EXTENSIONS)
+
+
+class SubtitleIndexer:
+    """为一批视频生成字幕，跳过输入未变化的视频，完成一个就更新一个的索引"""
+
+    def __init__(self, model_name, output_format='srt', workers=1, offset_ms=DEFAULT_OFFSET_MS, vad=False,
+                 log=print, on_progress=None):
+        """
+        :param workers: 大于 1 时使用进程池并行转写
+        :param vad: 是否跳过静音，只转写语音区间
+        :param log: 日志输出函数
+        :param on_progress: 进度回调 on_progress(已完成数, 总数)
+        """
+        self.model_name = model_name
+        self.output_format = output_format
+        self.workers = max(1, workers)
+        self.offset_ms = offset_ms
+        self.vad = vad
+        self.log = log
+        self.on_progress = on_progress
+        self.manifest = None
+        self.semantic_index = None
+        self.results = None
+
+    def index_videos(self, video_paths):
+        """
+        处理所有视频，视频可以来自不同的文件夹。
+
+        :return: 结果汇总 {'total', 'skipped', 'done': [(视频, 字幕)], 'failed': [(视频, 错误信息)]}
+        """
+        self.results = {'total': len(video_paths), 'skipped': 0, 'done': [], 'failed': []}
+        subtitle_index = SubtitleIndex()  # 字幕生成后增量更新搜索索引
+        if SEMANTIC_SEARCH and self.output_format in ('srt', 'vtt'):
+            # 安装了 sentence-transformers 时同时计算语义搜索用的向量
+            from utils.semantic_index import SemanticIndex, semantic_search_available
+            if semantic_search_available():
+                self.semantic_index = SemanticIndex()
+        try:
+            # 跳过输入（文件内容、模型、时间偏移）未变化且字幕仍存在的视频
+            self.manifest = IndexManifest()
+            jobs = []
+            for video_path in video_paths:
+                subtitle_path = subtitle_path_for(video_path, self.output_format)
+                if not self.manifest.is_up_to_date(video_path, subtitle_path, self.model_name, self.offset_ms,
+                                                   self.vad):
+                    jobs.append((video_path, subtitle_path))
+
+            self.results['skipped'] = len(video_paths) - len(jobs)
+            if self.results['skipped']:
+                self.log(f"跳过 {self.results['skipped']} 个未变化的视频")
+            if not jobs:
+                self.report(0, 0)
+                return self.results
+
+            self.log("正在加载模型...")
+            if self.workers > 1 and len(jobs) > 1:
+                self.run_parallel(jobs, subtitle_index)
+            else:
+                self.run_sequential(jobs, subtitle_index)
+        finally:
+            subtitle_index.close()
+            if self.semantic_index is not None:
+                self.semantic_index.close()
+                self.semantic_index = None
+        return self.results
+
+    def report(self, done, total):
+        if self.on_progress is not None:
+            self.on_progress(done, total)
+
+    def run_sequential(self, jobs, subtitle_index):
+        """在当前线程中逐个转写"""
+        model = get_model(self.model_name)  # 从模型缓存获取，已加载过时无需等待
+        self.log(f"模型加载完成")
+
+        total_files = len(jobs)
+        # 在后台线程中依次提取音频，使下一个文件的解码与当前文件的转写重叠进行
+        extractor = ThreadPoolExecutor(max_workers=1)
+        try:
+            audio_futures = [extractor.submit(extract_audio, video_path) for video_path, _ in jobs]
+            for index, (video_path, subtitle_path) in enumerate(jobs):
+                try:
+                    # 生成字幕并保存
+                    transcribe_to_file(model, video_path, subtitle_path, self.output_format, self.offset_ms,
+                                       audio_futures[index].result(), self.vad)
+                except Exception as e:
+                    self.on_subtitle_failed(video_path, e, index + 1, total_files)
+                    continue
+                self.on_subtitle_done(video_path, subtitle_path, subtitle_index, index + 1, total_files)
+        finally:
+            extractor.shutdown(wait=False, cancel_futures=True)
+
+    def run_parallel(self, jobs, subtitle_index):
+        """把不同视频的转写分配到多个进程，每个进程只加载一次模型"""
+        workers = min(self.workers, len(jobs))
+        self.log(f"使用 {workers} 个进程并行转写")
+        total_files = len(jobs)
+        done = 0
+        with create_transcribe_pool(self.model_name, workers) as pool:
+            futures = {submit_transcribe(pool, video_path, subtitle_path, self.output_format, self.offset_ms,
+                                         self.vad): video_path
+                       for video_path, subtitle_path in jobs}
+            for future in as_completed(futures):
+                done += 1
+                try:
+                    video_path, subtitle_path = future.result()
+                except Exception as e:
+                    self.on_subtitle_failed(futures[future], e, done, total_files)
+                    continue
+                self.on_subtitle_done(video_path, subtitle_path, subtitle_index, done, total_files)
+
+    def on_subtitle_done(self, video_path, subtitle_path, subtitle_index, done, total_files):
+        """单个视频字幕生成完成后更新索引并汇报进度"""
+        if self.output_format in ('srt', 'vtt'):
+            subtitle_index.update_video(subtitle_path, video_path)
+        if self.semantic_index is not None:
+            try:
+                self.semantic_index.update_video(subtitle_path, video_path)
+            except Exception as e:
+                # 向量只用于语义搜索，失败时不影响字幕和普通搜索，搜索时会重新补充
+                self.log(f"计算语义向量失败: {subtitle_path}: {str(e)}")
+        self.manifest.record(video_path, self.model_name, self.offset_ms, self.vad)
+        self.results['done'].append((video_path, subtitle_path))
+        self.report(done, total_files)
+        self.log(f"已完成 {done}/{total_files}: {subtitle_path}")
+
+    def on_subtitle_failed(self, video_path, error, done, total_files):
+        self.results['failed'].append((video_path, str(error)))
+        self.report(done, total_files)
+        self.log(f"处理时发生错误: {video_path}: {str(error)}")
@@ -0,0 +1,120 @@
+# utils/jump_cut.py
+"""
+根据字幕自动剪掉停顿（跳剪）。
+
+以字幕时间为依据：每条字幕前后各留一点余量，间隔小于阈值的相邻字幕合并为一个保留区间，
+其余部分（停顿、没有说话的空档）全部剪掉；可选地先去掉只包含语气词的字幕（“嗯”“啊”“那个”等）。
+保留区间的计算全部用 NumPy 向量化完成，几小时的视频也可以立即算出结果。
+导出时把保留区间转换为时间线，用时间线的精确导出运行一次 ffmpeg，只解码编码一次。
+"""
+import os
+import re
+
+from utils.probe_cache import get_duration
+from utils.settings import JUMP_CUT_MAX_GAP_MS, JUMP_CUT_PADDING_MS, JUMP_CUT_FILLER_WORDS
+from utils.subtitle_parser import CueTable, find_subtitle_file
+from utils.timeline import Timeline, TimelineClip, export_timeline
+
+# 匹配语气词字幕时忽略的标点和空白
+_filler_separators = r'\s,.!?;:，。！？；：、…~～\-'
+
+
+def filler_pattern(filler_words=JUMP_CUT_FILLER_WORDS):
+    """整条字幕只由语气词、标点和空白组成时匹配"""
+    words = '|'.join(re.escape(word) for word in sorted(filler_words, key=len, reverse=True))
+    return re.compile(rf'^(?:{words}|[{_filler_separators}])+$', re.IGNORECASE)
+
+
+def filler_mask(cues, filler_words=JUMP_CUT_FILLER_WORDS):
+    """返回布尔数组，第 i 个元素表示第 i 条字幕是否只包含语气词"""
+    import numpy as np
+
+    pattern = filler_pattern(filler_words)
+    return np.fromiter((bool(pattern.match(cues.text(i))) for i in range(len(cues))), dtype=bool, count=len(cues))
+
+
+def keep_ranges(starts, ends, max_gap_ms=JUMP_CUT_MAX_GAP_MS, padding_ms=JUMP_CUT_PADDING_MS, duration_ms=None):
+    """
+    把字幕区间合并为保留区间。
+
+    :param starts: 字幕开始时间（毫秒）数组
+    :param ends: 字幕结束时间（毫秒）数组
+    :param max_gap_ms: 加上余量后间隔不超过该值的相邻区间合并为一个
+    :param padding_ms: 每条字幕前后保留的余量
+    :param duration_ms: 视频时长，区间不会超出视频结尾
+    :return: (区间开始数组, 区间结束数组)，按时间排序且互不重叠
+    """
+    import numpy as np
+
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    if not len(starts):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    order = np.argsort(starts, kind='stable')
+    starts = np.maximum(starts[order] - padding_ms, 0)
+    ends = ends[order] + padding_ms
+    if duration_ms is not None:
+        ends = np.minimum(ends, duration_ms)
+
+    # 字幕可能互相重叠，用到目前为止的最大结束时间判断下一条字幕与前面区间的间隔
+    running_end = np.maximum.accumulate(ends)
+    new_range = np.empty(len(starts), dtype=bool)
+    new_range[0] = True
+    new_range[1:] = starts[1:] - running_end[:-1] > max_gap_ms
+    first = np.flatnonzero(new_range)
+    last = np.append(first[1:] - 1, len(starts) - 1)
+    range_starts, range_ends = starts[first], running_end[last]
+    valid = range_ends > range_starts
+    return range_starts[valid], range_ends[valid]
+
+
+def jump_cut_ranges(cues, drop_fillers=False, max_gap_ms=JUMP_CUT_MAX_GAP_MS, padding_ms=JUMP_CUT_PADDING_MS,
+                    duration_ms=None, filler_words=JUMP_CUT_FILLER_WORDS):
+    """根据 CueTable 计算保留区间，可选地先去掉语气词字幕"""
+    import numpy as np
+
+    # CueTable 的时间列是 array('i')，可以直接作为 NumPy 数组使用，无需复制
+    starts = np.frombuffer(cues.starts, dtype=np.int32) if len(cues) else np.empty(0, dtype=np.int32)
+    ends = np.frombuffer(cues.ends, dtype=np.int32) if len(cues) else np.empty(0, dtype=np.int32)
+    if drop_fillers and len(cues):
+        keep = ~filler_mask(cues, filler_words)
+        starts, ends = starts[keep], ends[keep]
+    return keep_ranges(starts, ends, max_gap_ms, padding_ms, duration_ms)
+
+
+def jump_cut_timeline(video_path, range_starts, range_ends):
+    """把保留区间转换为时间线，可以加入界面上的时间线继续编辑"""
+    return Timeline(TimelineClip(video_path, int(start), int(end)) for start, end in zip(range_starts, range_ends))
+
+
+def jump_cut_output_path(video_path, output_folder):
+    base = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(output_folder, f"{base}_jumpcut.mp4")
+
+
+def export_jump_cut(video_path, output_folder, drop_fillers=False, max_gap_ms=JUMP_CUT_MAX_GAP_MS,
+                    padding_ms=JUMP_CUT_PADDING_MS, run=None, log=print):
+    """
+    剪掉视频中没有字幕的部分并导出为新文件，视频需要有同名的字幕文件。
+
+    :param run: 执行命令的函数 run(command, 总时长秒数)，默认使用 FFmpegRunner.run
+    :return: (输出文件路径, 剪掉的时长毫秒)
+    """
+    subtitle_file = find_subtitle_file(video_path)
+    if subtitle_file is None:
+        raise ValueError(f"没有找到字幕文件，请先创建索引: {video_path}")
+    duration = get_duration(video_path)
+    duration_ms = int(duration * 1000) if duration else None
+
+    range_starts, range_ends = jump_cut_ranges(CueTable.load(subtitle_file), drop_fillers, max_gap_ms, padding_ms,
+                                               duration_ms)
+    if not len(range_starts):
+        raise ValueError(f"字幕中没有可保留的片段: {video_path}")
+    kept_ms = int((range_ends - range_starts).sum())
+    log(f"保留 {len(range_starts)} 个片段，共 {kept_ms / 1000:.1f} 秒")
+
+    # 与时间线导出使用同一套精确导出：画面按帧、声音按采样截取，片段再多也不会音画不同步，可变帧率的视频也适用
+    output_file = export_timeline(jump_cut_timeline(video_path, range_starts, range_ends),
+                                  jump_cut_output_path(video_path, output_folder), run=run, log=log)
+    removed_ms = duration_ms - kept_ms if duration_ms else 0
+    return output_file, removed_ms
@@ -0,0 +1,112 @@
+# utils/model_registry.py
+"""
+进程级的 Whisper 模型缓存。
+
+模型按 (名称, 设备) 缓存，应用运行期间只加载一次；连续创建索引时直接复用已加载的模型。
+超过内存预算时按最近最少使用（LRU）的顺序释放模型。
+"""
+import gc
+import threading
+from collections import OrderedDict
+
+from utils.log_manager import log_manager
+from utils.settings import MODEL_MEMORY_BUDGET_MB
+
+_models = OrderedDict()  # (名称, 设备) -> 模型，越靠后越是最近使用
+_sizes = {}  # (名称, 设备) -> 占用内存（MB）
+_lock = threading.Lock()
+_load_locks = {}  # 每个模型一把加载锁，避免多个线程同时加载同一个模型
+
+memory_budget_mb = MODEL_MEMORY_BUDGET_MB
+
+
+def default_device():
+    """有可用的 GPU 时使用 cuda，否则使用 cpu"""
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def model_size_mb(model):
+    """根据参数和缓冲区估算模型占用的内存"""
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors) / (1024 * 1024)
+
+
+def get_model(name, device=None):
+    """获取已加载的模型，不存在时加载并放入缓存"""
+    if device is None:
+        device = default_device()
+    key = (name, device)
+
+    with _lock:
+        if key in _models:
+            _models.move_to_end(key)
+            return _models[key]
+        load_lock = _load_locks.setdefault(key, threading.Lock())
+
+    with load_lock:
+        with _lock:
+            # 等待期间可能已被其他线程加载
+            if key in _models:
+                _models.move_to_end(key)
+                return _models[key]
+
+        import whisper
+        log_manager.info(f"加载 Whisper 模型: {name} ({device})")
+        model = whisper.load_model(name, device=device)
+
+        with _lock:
+            _models[key] = model
+            _sizes[key] = model_size_mb(model)
+            _evict(keep=key)
+        return model
+
+
+def _evict(keep):
+    """超过内存预算时释放最久未使用的模型（调用方需持有 _lock）"""
+    evicted = False
+    while sum(_sizes.values()) > memory_budget_mb and len(_models) > 1:
+        key = next(k for k in _models if k != keep)
+        del _models[key]
+        del _sizes[key]
+        log_manager.info(f"释放 Whisper 模型: {key[0]} ({key[1]})")
+        evicted = True
+    if evicted:
+        _release_memory()
+
+
+def _release_memory():
+    gc.collect()
+    import torch
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def set_memory_budget(budget_mb):
+    """调整内存预算，立即按新预算释放多余的模型"""
+    global memory_budget_mb
+    with _lock:
+        memory_budget_mb = budget_mb
+        if _models:
+            _evict(keep=next(reversed(_models)))
+
+
+def clear():
+    """释放所有已缓存的模型"""
+    with _lock:
+        _models.clear()
+        _sizes.clear()
+    _release_memory()
+
+
+def warm_up(name, device=None):
+    """在后台线程中预先加载模型，不阻塞界面启动"""
+    def load():
+        try:
+            get_model(name, device)
+        except Exception as e:
+            log_manager.error(f"预加载模型失败: {str(e)}")
+
+    thread = threading.Thread(target=load, name="whisper-warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,236 @@
+# utils/probe_cache.py
+"""
+ffprobe 元数据缓存。
+
+每个媒体文件的时长、编码、分辨率、帧率、码率和关键帧列表保存在 cache_dir 下的 SQLite 数据库中，
+以 路径 + 修改时间 + 文件大小 作为键，文件变化后自动重新探测。
+打开素材文件夹时并行预先探测所有文件，之后的剪辑、合并无需再启动 ffprobe 进程。
+"""
+import os
+import json
+import sqlite3
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.paths_internal import cache_dir
+from utils.ffmpeg_utils import ffprobe_path
+
+probe_db_path = os.path.join(cache_dir, "probe_cache.db")
+
+
+def _parse_rate(rate):
+    """把 ffprobe 的 "30000/1001" 形式的帧率转换为浮点数"""
+    try:
+        numerator, _, denominator = rate.partition('/')
+        return float(numerator) / float(denominator or 1)
+    except (AttributeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def probe_streams(path):
+    """运行 ffprobe 读取封装格式和音视频流的信息"""
+    command = [ffprobe_path, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path]
+    data = json.loads(subprocess.check_output(command).decode('utf-8', 'ignore'))
+    fmt = data.get('format', {})
+    streams = data.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'
+                  and not s.get('disposition', {}).get('attached_pic')), None)
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+
+    info = {
+        'format_name': fmt.get('format_name'),
+        'duration': float(fmt['duration']) if fmt.get('duration') else None,
+        'bit_rate': _to_int(fmt.get('bit_rate')),
+        'video': None,
+        'audio': None,
+    }
+    if video:
+        info['video'] = {
+            'codec_name': video.get('codec_name'),
+            'profile': video.get('profile'),
+            'pix_fmt': video.get('pix_fmt'),
+            'width': video.get('width'),
+            'height': video.get('height'),
+            'r_frame_rate': video.get('r_frame_rate'),
+            'fps': _parse_rate(video.get('avg_frame_rate')) or _parse_rate(video.get('r_frame_rate')),
+            'time_base': video.get('time_base'),
+            'start_time': float(video['start_time']) if video.get('start_time') else None,
+            'bit_rate': _to_int(video.get('bit_rate')),
+        }
+    if audio:
+        info['audio'] = {
+            'codec_name': audio.get('codec_name'),
+            'sample_rate': _to_int(audio.get('sample_rate')),
+            'channels': audio.get('channels'),
+            'bit_rate': _to_int(audio.get('bit_rate')),
+        }
+    return info
+
+
+def probe_keyframes(path):
+    """使用 ffprobe 读取视频流中关键帧的时间点（秒），只解析封装不解码"""
+    command = [
+        ffprobe_path, "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", path
+    ]
+    output = subprocess.check_output(command).decode('utf-8', 'ignore')
+    keyframes = []
+    for line in output.splitlines():
+        pts_time, _, flags = line.partition(',')
+        if 'K' in flags and pts_time not in ('', 'N/A'):
+            keyframes.append(float(pts_time))
+    keyframes.sort()
+    return keyframes
+
+
+class ProbeCache:
+    """线程安全的媒体信息缓存"""
+
+    def __init__(self, db_path=probe_db_path):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS probes (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime REAL NOT NULL,
+                    data TEXT NOT NULL
+                )
+            """)
+            self.conn.commit()
+
+    def _load(self, path, stat):
+        with self.lock:
+            row = self.conn.execute("SELECT size, mtime, data FROM probes WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+            return json.loads(row[2])
+        return None
+
+    def _store(self, path, stat, info):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO probes (path, size, mtime, data) VALUES (?, ?, ?, ?)",
+                              (path, stat.st_size, stat.st_mtime, json.dumps(info)))
+            self.conn.commit()
+
+    def get(self, path, keyframes=False):
+        """
+        获取媒体信息，缓存失效时运行 ffprobe 并写入缓存。
+
+        :param keyframes: 是否需要关键帧列表（需要完整读取一遍文件，只在首次需要时探测）
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        info = self._load(path, stat)
+        changed = False
+        if info is None:
+            info = probe_streams(path)
+            info['keyframes'] = None
+            changed = True
+        if keyframes and info.get('keyframes') is None:
+            info['keyframes'] = probe_keyframes(path) if info.get('video') else []
+            changed = True
+        if changed:
+            self._store(path, stat, info)
+        return info
+
+    def populate(self, paths, max_workers=4, on_done=None, cancelled=None):
+        """
+        并行探测多个文件（包括关键帧），已缓存的文件直接跳过。
+
+        :param on_done: 每个文件完成后的回调 on_done(路径, 信息, 错误信息)，在工作线程中调用
+        :param cancelled: 返回 True 时不再探测尚未开始的文件
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.get, path, True): path for path in paths}
+            for future in as_completed(futures):
+                if cancelled is not None and cancelled():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                path = futures[future]
+                try:
+                    info, error = future.result(), None
+                except Exception as e:
+                    info, error = None, str(e)
+                if on_done is not None:
+                    on_done(path, info, error)
+
+
+_probe_cache = None
+_probe_cache_lock = threading.Lock()
+
+
+def get_probe_cache():
+    """获取进程内共享的缓存实例"""
+    global _probe_cache
+    with _probe_cache_lock:
+        if _probe_cache is None:
+            _probe_cache = ProbeCache()
+        return _probe_cache
+
+
+def get_media_info(path, keyframes=False):
+    return get_probe_cache().get(path, keyframes)
+
+
+def get_duration(path):
+    """获取时长（秒），失败时返回 None"""
+    try:
+        return get_media_info(path)['duration']
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return None
+
+
+def get_resolution(path):
+    """获取视频分辨率，返回类似 "1920x1080" 的字符串，失败时返回 None"""
+    try:
+        video = get_media_info(path)['video']
+    except (OSError, ValueError, subprocess.CalledProcessError):
+        return None
+    if not video or not video.get('width'):
+        return None
+    return f"{video['width']}x{video['height']}"
+
+
+def get_keyframes(path):
+    """获取关键帧时间列表（秒）"""
+    return get_media_info(path, keyframes=True)['keyframes']
+
+
+def close_probe_cache():
+    """关闭共享的缓存数据库连接（例如清空缓存目录之前），下次使用时自动重新打开"""
+    global _probe_cache
+    with _probe_cache_lock:
+        if _probe_cache is not None:
+            _probe_cache.conn.close()
+            _probe_cache = None
+
+
+def describe_media_info(info):
+    """把媒体信息格式化为一行简短的说明"""
+    parts = []
+    if info.get('duration') is not None:
+        minutes, seconds = divmod(int(info['duration']), 60)
+        parts.append(f"时长 {minutes:02}:{seconds:02}")
+    video = info.get('video')
+    if video:
+        parts.append(f"{video.get('width')}x{video.get('height')}")
+        parts.append(video.get('codec_name') or '')
+        if video.get('fps'):
+            parts.append(f"{video['fps']:.2f}fps")
+    if info.get('bit_rate'):
+        parts.append(f"{info['bit_rate'] / 1000000:.1f} Mbps")
+    if info.get('audio'):
+        parts.append(f"音频 {info['audio'].get('codec_name')}")
+    return " | ".join(p for p in parts if p)
@@ -0,0 +1,180 @@
+# utils/proxy_media.py
+"""
+预览用的代理文件。
+
+4K、HEVC 等高码率素材直接交给 QMediaPlayer 播放时，拖动进度条和播放字幕片段会明显卡顿。
+打开素材文件夹后在后台用有限的并发数把这类素材转码为低分辨率的 H.264 代理文件：
+关键帧间隔很短且不使用 B 帧，任意位置跳转时只需解码几帧；保留源文件的帧时间戳（包括非零的起始时间和可变帧率），
+代理文件中的任意时间与源文件中的同一时间对应同一画面，生成后检查时长和起始时间都与源文件一致。
+代理文件只用于预览，剪辑、合并、截图等仍然使用源文件。
+"""
+import os
+import uuid
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from utils.paths_internal import cache_dir
+from utils.ffmpeg_utils import ffmpeg_path, FFmpegRunner, FFmpegCancelled
+from utils.probe_cache import get_media_info, probe_streams
+from utils.settings import PROXY_MEDIA, PROXY_HEIGHT, PROXY_GOP, PROXY_MIN_HEIGHT, PROXY_WORKERS
+
+proxy_cache_dir = os.path.join(cache_dir, "cache_proxy")
+
+# 解码开销大、需要生成代理文件的编码
+HEAVY_CODECS = {'hevc', 'h265', 'vp9', 'av1', 'prores', 'dnxhd'}
+# 代理文件与源文件允许的时长差（秒），超出时认为转码不完整
+DURATION_TOLERANCE = 0.5
+# 代理文件与源文件视频流起始时间允许的差（秒），超出时预览画面会与剪辑结果错位
+START_TOLERANCE = 0.05
+
+
+def proxy_path(video_path):
+    """根据视频路径、大小、修改时间和转码参数生成代理文件路径，视频变化后自动失效"""
+    video_path = os.path.abspath(video_path)
+    stat = os.stat(video_path)
+    # copyts 表示保留源文件时间戳的代理文件，之前生成的未保留时间戳的代理文件随之失效
+    key = hashlib.blake2b(f"{video_path}|{stat.st_size}|{stat.st_mtime}|{PROXY_HEIGHT}|{PROXY_GOP}|copyts"
+                          .encode('utf-8'), digest_size=8).hexdigest()
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(proxy_cache_dir, f"{base_name}_{key}.mp4")
+
+
+def needs_proxy(video_path):
+    """分辨率高于 PROXY_MIN_HEIGHT 或使用解码开销大的编码时需要代理文件"""
+    video = get_media_info(video_path).get('video')
+    if not video:
+        return False
+    return (video.get('height') or 0) > PROXY_MIN_HEIGHT or video.get('codec_name') in HEAVY_CODECS
+
+
+def build_proxy_command(video_path, output_path):
+    """
+    生成代理文件的 ffmpeg 命令：缩小分辨率，短关键帧间隔，不使用 B 帧。
+    -copyts 保留输入的时间戳（不把起始时间移到 0），-vsync passthrough 不为凑成固定帧率而复制或丢弃帧
+    """
+    return [
+        ffmpeg_path, "-nostdin", "-y", "-i", video_path, "-copyts", "-vsync", "passthrough",
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-vf", f"scale=-2:'min({PROXY_HEIGHT},ih)'", "-pix_fmt", "yuv420p",
+        "-c:v", "libx264", "-preset", "veryfast", "-tune", "fastdecode", "-crf", "28",
+        "-g", str(PROXY_GOP), "-bf", "0",
+        "-c:a", "aac", "-b:a", "128k", "-movflags", "+faststart", output_path
+    ]
+
+
+def video_start_time(info):
+    """媒体信息中视频流的起始时间（秒），没有记录时为 0"""
+    return (info.get('video') or {}).get('start_time') or 0.0
+
+
+def get_proxy(video_path):
+    """返回已生成的代理文件路径，没有时返回 None"""
+    try:
+        path = proxy_path(video_path)
+    except OSError:
+        return None
+    return path if os.path.exists(path) else None
+
+
+def preview_source(video_path):
+    """预览时实际播放的文件：启用代理且代理文件已生成时为代理文件，否则为源文件"""
+    if PROXY_MEDIA:
+        return get_proxy(video_path) or video_path
+    return video_path
+
+
+def build_proxy(video_path, run=None):
+    """
+    转码生成代理文件，已存在时直接返回。
+
+    :param run: 执行命令的函数 run(command, 总时长秒数)，默认使用 FFmpegRunner.run
+    :return: 代理文件路径
+    """
+    output_path = proxy_path(video_path)
+    if os.path.exists(output_path):
+        return output_path
+    if run is None:
+        run = FFmpegRunner().run
+    source_info = get_media_info(video_path)
+    duration = source_info.get('duration')
+
+    os.makedirs(proxy_cache_dir, exist_ok=True)
+    # 先写入临时文件，完成并检查时长后再重命名，中断时不会留下不完整的代理文件
+    temp_path = f"{output_path[:-len('.mp4')]}.{uuid.uuid4().hex}.part.mp4"
+    try:
+        run(build_proxy_command(video_path, temp_path), duration)
+        # 临时文件不写入探测缓存
+        proxy_info = probe_streams(temp_path)
+        proxy_duration = proxy_info.get('duration')
+        if duration and (proxy_duration is None or abs(proxy_duration - duration) > DURATION_TOLERANCE):
+            raise RuntimeError(f"代理文件时长与源文件不一致（{proxy_duration} / {duration} 秒）")
+        source_start = video_start_time(source_info) if 'start_time' in (source_info.get('video') or {}) \
+            else video_start_time(probe_streams(video_path))  # 旧版本的探测缓存中没有起始时间
+        proxy_start = video_start_time(proxy_info)
+        if abs(proxy_start - source_start) > START_TOLERANCE:
+            raise RuntimeError(f"代理文件起始时间与源文件不一致（{proxy_start} / {source_start} 秒）")
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return output_path
+
+
+class ProxyBuilder:
+    """用固定大小的线程池并行生成代理文件，可以随时取消"""
+
+    def __init__(self, max_workers=PROXY_WORKERS):
+        self.max_workers = max_workers
+        self.cancelled = threading.Event()
+        self.runners = set()
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled.set()
+        with self._lock:
+            runners = list(self.runners)
+        for runner in runners:
+            runner.cancel()
+
+    def _build(self, video_path):
+        runner = FFmpegRunner()
+        with self._lock:
+            self.runners.add(runner)
+        if self.cancelled.is_set():
+            runner.cancel()  # 取消发生在加入 runners 之前时，run() 会立即抛出 FFmpegCancelled
+        try:
+            return build_proxy(video_path, runner.run)
+        finally:
+            with self._lock:
+                self.runners.discard(runner)
+
+    def build_all(self, video_paths, on_done=None):
+        """
+        为需要代理的视频生成代理文件，不需要代理或已经生成的视频会被跳过。
+
+        :param on_done: 每个视频完成后调用 on_done(视频路径, 代理文件路径, 错误信息)，在工作线程中调用
+        """
+        pending = []
+        for video_path in video_paths:
+            try:
+                if needs_proxy(video_path) and get_proxy(video_path) is None:
+                    pending.append(video_path)
+            except Exception as e:
+                if on_done is not None:
+                    on_done(video_path, None, str(e))
+        if not pending:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._build, path): path for path in pending}
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    proxy, error = future.result(), None
+                except FFmpegCancelled:
+                    continue
+                except Exception as e:
+                    proxy, error = None, str(e)
+                if on_done is not None:
+                    on_done(path, proxy, error)
@@ -0,0 +1,109 @@
+# utils/scene_detect.py
+"""
+镜头切换检测，用于把剪辑点对齐到镜头边界。
+
+每个视频只运行一次 ffmpeg：先把画面缩小到 SCENE_SCAN_WIDTH 宽再计算 scene 分数（相邻帧的差异），
+分数超过阈值的帧由 showinfo 输出时间，即镜头切换点。已生成预览代理文件时直接解码代理文件，时间与源文件一致。
+结果保存在 cache_dir 下，之后每次剪辑只需在有序列表中二分查找最近的切换点，不再解码视频。
+"""
+import os
+import re
+import json
+import uuid
+import bisect
+import hashlib
+import threading
+import subprocess
+
+from utils.paths_internal import cache_dir
+from utils.ffmpeg_utils import ffmpeg_path
+from utils.proxy_media import get_proxy
+from utils.settings import SCENE_THRESHOLD, SCENE_SNAP_MS
+
+scene_cache_dir = os.path.join(cache_dir, "cache_scenes")
+
+# 计算 scene 分数前把画面缩小到的宽度，分辨率越低越快
+SCENE_SCAN_WIDTH = 320
+
+_pts_time_pattern = re.compile(r'\bpts_time:\s*([\d.]+)')
+
+# 同一个视频同时只检测一次，其他线程等待结果
+_detect_locks = {}
+_detect_locks_lock = threading.Lock()
+
+
+def scene_cache_path(video_path):
+    """根据视频路径、大小、修改时间和检测参数生成缓存文件路径，视频变化后自动失效"""
+    video_path = os.path.abspath(video_path)
+    stat = os.stat(video_path)
+    key = hashlib.blake2b(f"{video_path}|{stat.st_size}|{stat.st_mtime}|{SCENE_THRESHOLD}|{SCENE_SCAN_WIDTH}"
+                          .encode('utf-8'), digest_size=8).hexdigest()
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(scene_cache_dir, f"{base_name}_{key}.json")
+
+
+def build_scene_command(video_path, threshold=SCENE_THRESHOLD):
+    """生成镜头检测的 ffmpeg 命令，不输出文件，只在 stderr 中输出切换帧的信息"""
+    video_filter = f"scale={SCENE_SCAN_WIDTH}:-2,select='gt(scene,{threshold})',showinfo"
+    return [ffmpeg_path, "-nostdin", "-i", video_path, "-an", "-sn", "-dn", "-vf", video_filter,
+            "-f", "null", "-"]
+
+
+def load_scenes(video_path):
+    """读取已缓存的镜头切换时间列表（毫秒），没有缓存时返回 None"""
+    path = scene_cache_path(video_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['scenes']
+
+
+def detect_scenes(video_path, threshold=SCENE_THRESHOLD):
+    """运行一次 ffmpeg 检测镜头切换并写入缓存，返回按时间排序的切换时间列表（毫秒）"""
+    source = get_proxy(video_path) or video_path
+    result = subprocess.run(build_scene_command(source, threshold), stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+    stderr = result.stderr.decode('utf-8', 'ignore')
+    if result.returncode != 0:
+        raise RuntimeError(f"镜头检测失败: {video_path}\n{stderr.strip()[-2000:]}")
+    scenes = sorted({int(float(value) * 1000) for value in _pts_time_pattern.findall(stderr)})
+
+    os.makedirs(scene_cache_dir, exist_ok=True)
+    path = scene_cache_path(video_path)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'scenes': scenes}, f)
+    os.replace(temp_path, path)
+    return scenes
+
+
+def get_scenes(video_path):
+    """读取镜头切换缓存，没有缓存时检测；多个线程请求同一个视频时只检测一次"""
+    scenes = load_scenes(video_path)
+    if scenes is not None:
+        return scenes
+    key = os.path.abspath(video_path)
+    with _detect_locks_lock:
+        lock = _detect_locks.setdefault(key, threading.Lock())
+    with lock:
+        scenes = load_scenes(video_path)
+        return scenes if scenes is not None else detect_scenes(video_path)
+
+
+def snap_time(scenes, ms, tolerance_ms=SCENE_SNAP_MS):
+    """返回距离 ms 最近且不超过 tolerance_ms 的镜头切换时间，没有时返回 ms"""
+    index = bisect.bisect_left(scenes, ms)
+    candidates = scenes[max(0, index - 1):index + 1]
+    if not candidates:
+        return ms
+    nearest = min(candidates, key=lambda scene: abs(scene - ms))
+    return nearest if abs(nearest - ms) <= tolerance_ms else ms
+
+
+def snap_range(scenes, start_ms, end_ms, tolerance_ms=SCENE_SNAP_MS):
+    """把片段的开始和结束时间分别对齐到附近的镜头切换点，对齐后片段为空时保持原来的时间"""
+    snapped_start = snap_time(scenes, start_ms, tolerance_ms)
+    snapped_end = snap_time(scenes, end_ms, tolerance_ms)
+    if snapped_start >= snapped_end:
+        return start_ms, end_ms
+    return snapped_start, snapped_end
@@ -0,0 +1,300 @@
+# utils/semantic_index.py
+"""
+字幕语义搜索的本地向量索引。
+
+按内容而不是字面搜索，例如“讲价格的那一段”。建立索引时把相邻的几条字幕合并为一个窗口，
+用本地 CPU 上运行的小型句向量模型（可选依赖 sentence-transformers）编码为单位向量。
+向量按行追加写入 cache_dir 下的 float32 矩阵文件，搜索时以内存映射方式读取，
+用 NumPy 分块计算与查询向量的余弦相似度并取前 k 个，每个结果都带有可直接剪辑的视频和起止时间。
+
+窗口的元数据（所在文件、起止时间、文本、对应的矩阵行号）保存在同目录的 SQLite 数据库中。
+字幕文件重新生成后旧窗口只从数据库中删除，矩阵中留下的无效行在超过一半时整理压缩。
+"""
+import os
+import sqlite3
+import threading
+import importlib.util
+
+from utils.paths_internal import cache_dir
+from utils.log_manager import log_manager
+from utils.settings import SEMANTIC_MODEL, SEMANTIC_WINDOW, SEMANTIC_STRIDE
+from utils.subtitle_parser import iter_cues, list_subtitle_files
+from utils.subtitle_index import find_video_for_subtitle
+
+semantic_index_dir = os.path.join(cache_dir, "semantic_index")
+
+# 每次从内存映射中读取并计算相似度的行数，限制搜索时的内存占用
+SCORE_CHUNK_ROWS = 65536
+
+_embedders = {}
+_embedder_lock = threading.Lock()
+
+# 追加向量、提交对应的元数据、压缩和读取矩阵都在这个锁内进行：
+# 建立索引的线程和搜索前补建索引的线程使用各自的实例，不加锁时会计算出相同的起始行号，
+# 或在另一个实例追加、映射矩阵文件时替换它。计算向量较慢，在锁外进行
+_vectors_lock = threading.RLock()
+
+
+def semantic_search_available():
+    """是否安装了 sentence-transformers"""
+    return importlib.util.find_spec('sentence_transformers') is not None
+
+
+def get_embedder(model_name=SEMANTIC_MODEL):
+    """加载句向量模型，进程内只加载一次"""
+    with _embedder_lock:
+        if model_name not in _embedders:
+            from sentence_transformers import SentenceTransformer
+            log_manager.info(f"加载句向量模型: {model_name}")
+            _embedders[model_name] = SentenceTransformer(model_name, device='cpu')
+        return _embedders[model_name]
+
+
+def embed_texts(texts, model_name=SEMANTIC_MODEL):
+    """把文本编码为 float32 单位向量矩阵，每行一个文本"""
+    import numpy as np
+
+    vectors = get_embedder(model_name).encode(list(texts), batch_size=64, convert_to_numpy=True,
+                                              normalize_embeddings=True, show_progress_bar=False)
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def cue_windows(cues, window=SEMANTIC_WINDOW, stride=SEMANTIC_STRIDE):
+    """
+    把字幕合并为相邻的窗口，一句话常被拆成几条字幕，合并后语义更完整。
+
+    :param cues: [(开始毫秒, 结束毫秒, 文本), ...]
+    :return: [(开始毫秒, 结束毫秒, 合并后的文本), ...]，最后一个窗口总是包含最后一条字幕
+    """
+    windows = []
+    for first in range(0, len(cues), max(1, stride)):
+        group = cues[first:first + window]
+        windows.append((group[0][0], group[-1][1], ' '.join(text for _, _, text in group)))
+        if first + window >= len(cues):
+            break
+    return windows
+
+
+class SemanticIndex:
+    """字幕窗口的向量索引，每个线程应使用各自的实例，同一进程中的实例共用一个矩阵文件锁"""
+
+    def __init__(self, index_dir=semantic_index_dir, model_name=SEMANTIC_MODEL):
+        os.makedirs(index_dir, exist_ok=True)
+        self.model_name = model_name
+        self.vectors_path = os.path.join(index_dir, "vectors.f32")
+        self.conn = sqlite3.connect(os.path.join(index_dir, "windows.db"))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.create_tables()
+
+    def create_tables(self):
+        """创建元数据表；更换模型后向量维度和含义都会变化，丢弃旧索引"""
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                srt_path TEXT PRIMARY KEY,
+                folder TEXT NOT NULL,
+                video_path TEXT NOT NULL,
+                srt_mtime REAL NOT NULL,
+                srt_size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS files_folder ON files(folder);
+            CREATE TABLE IF NOT EXISTS windows (
+                row INTEGER PRIMARY KEY,
+                srt_path TEXT NOT NULL,
+                start_ms INTEGER NOT NULL,
+                end_ms INTEGER NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS windows_file ON windows(srt_path);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        with _vectors_lock:
+            if self.get_meta('model') != self.model_name:
+                self.reset()
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def reset(self):
+        """清空索引"""
+        with _vectors_lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM files")
+                self.conn.execute("DELETE FROM windows")
+                self.conn.execute("DELETE FROM meta")
+                self.set_meta('model', self.model_name)
+            if os.path.exists(self.vectors_path):
+                os.remove(self.vectors_path)
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def normalize_folder(folder):
+        return os.path.normcase(os.path.abspath(folder))
+
+    def dimension(self):
+        value = self.get_meta('dim')
+        return int(value) if value else None
+
+    def allocated_rows(self):
+        """矩阵文件中的总行数（包括已失效的行）"""
+        dim = self.dimension()
+        if not dim or not os.path.exists(self.vectors_path):
+            return 0
+        return os.path.getsize(self.vectors_path) // (dim * 4)
+
+    def load_vectors(self):
+        """以只读内存映射方式打开向量矩阵，没有数据时返回 None"""
+        import numpy as np
+
+        rows = self.allocated_rows()
+        if not rows:
+            return None
+        return np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(rows, self.dimension()))
+
+    def update_video(self, srt_path, video_path=None):
+        """（重新）为单个字幕文件建立向量，返回窗口数"""
+        srt_path = os.path.abspath(srt_path)
+        if video_path is None:
+            video_path = find_video_for_subtitle(srt_path)
+        stat = os.stat(srt_path)
+        windows = cue_windows(list(iter_cues(srt_path)))
+
+        vectors = embed_texts([text for _, _, text in windows], self.model_name) if windows else None
+        with _vectors_lock:
+            # 先追加向量再提交元数据：中途失败只会在矩阵末尾留下无人引用的行
+            first_row = self.allocated_rows()
+            if vectors is not None:
+                if self.dimension() is None:
+                    with self.conn:
+                        self.set_meta('dim', vectors.shape[1])
+                with open(self.vectors_path, 'ab') as f:
+                    f.write(vectors.tobytes())
+
+            with self.conn:
+                self.conn.execute("DELETE FROM windows WHERE srt_path = ?", (srt_path,))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO files (srt_path, folder, video_path, srt_mtime, srt_size) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (srt_path, self.normalize_folder(os.path.dirname(srt_path)), os.path.abspath(video_path),
+                     stat.st_mtime, stat.st_size))
+                self.conn.executemany(
+                    "INSERT INTO windows (row, srt_path, start_ms, end_ms, text) VALUES (?, ?, ?, ?, ?)",
+                    [(first_row + i, srt_path, start, end, text) for i, (start, end, text) in enumerate(windows)])
+        return len(windows)
+
+    def remove_video(self, srt_path):
+        srt_path = os.path.abspath(srt_path)
+        with _vectors_lock, self.conn:
+            self.conn.execute("DELETE FROM windows WHERE srt_path = ?", (srt_path,))
+            self.conn.execute("DELETE FROM files WHERE srt_path = ?", (srt_path,))
+
+    def sync_folder(self, folder):
+        """
+        让向量索引与素材文件夹中的字幕文件保持一致，只为新增或修改过的文件计算向量。
+
+        :return: (更新的文件数, 移除的文件数)
+        """
+        folder_key = self.normalize_folder(folder)
+        indexed = {srt_path: (mtime, size) for srt_path, mtime, size in self.conn.execute(
+            "SELECT srt_path, srt_mtime, srt_size FROM files WHERE folder = ?", (folder_key,))}
+
+        updated = 0
+        present = set()
+        for srt_path in list_subtitle_files(folder):
+            present.add(srt_path)
+            stat = os.stat(srt_path)
+            if indexed.get(srt_path) != (stat.st_mtime, stat.st_size):
+                self.update_video(srt_path)
+                updated += 1
+
+        removed = [srt_path for srt_path in indexed if srt_path not in present]
+        for srt_path in removed:
+            self.remove_video(srt_path)
+        if updated or removed:
+            self.compact_if_needed()
+        return updated, len(removed)
+
+    def compact_if_needed(self):
+        """无效行超过一半时重写矩阵文件，只保留仍被引用的行"""
+        with _vectors_lock:
+            self._compact_if_needed()
+
+    def _compact_if_needed(self):
+        import numpy as np
+
+        allocated = self.allocated_rows()
+        live = self.conn.execute("SELECT COUNT(*) FROM windows").fetchone()[0]
+        if allocated == 0 or live * 2 > allocated:
+            return
+        vectors = self.load_vectors()
+        rows = [row for row, in self.conn.execute("SELECT row FROM windows ORDER BY row")]
+        tmp_path = self.vectors_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            for begin in range(0, len(rows), SCORE_CHUNK_ROWS):
+                f.write(np.ascontiguousarray(vectors[rows[begin:begin + SCORE_CHUNK_ROWS]]).tobytes())
+        del vectors  # Windows 上必须先关闭内存映射才能替换文件
+        with self.conn:
+            self.conn.executemany("UPDATE windows SET row = ? WHERE row = ?",
+                                  [(new_row, old_row) for new_row, old_row in enumerate(rows)])
+            os.replace(tmp_path, self.vectors_path)
+        log_manager.info(f"向量索引已压缩: {allocated} -> {len(rows)} 行")
+
+    def search(self, query, folder, limit=50, with_scores=False):
+        """
+        按语义相似度搜索文件夹中的字幕窗口。
+
+        :param with_scores: 在每个结果的最后加上相似度，用于合并多个文件夹的结果
+        :return: 按相似度从高到低排序的 [(视频路径, 字幕路径, 窗口文本, 开始毫秒, 结束毫秒), ...]
+        """
+        query = query.strip()
+        if not query or not self.allocated_rows():
+            return []
+        query_vector = embed_texts([query], self.model_name)[0]
+        # 读取行号、计算相似度和查询结果期间矩阵不能被压缩或追加
+        with _vectors_lock:
+            return self._search(query_vector, folder, limit, with_scores)
+
+    def _search(self, query_vector, folder, limit, with_scores=False):
+        import numpy as np
+
+        vectors = self.load_vectors()
+        if vectors is None:
+            return []
+        rows = np.fromiter((row for row, in self.conn.execute(
+            "SELECT w.row FROM windows w JOIN files f ON f.srt_path = w.srt_path WHERE f.folder = ? ORDER BY w.row",
+            (self.normalize_folder(folder),))), dtype=np.int64)
+        if not len(rows):
+            return []
+
+        limit = min(limit or len(rows), len(rows))
+        # 分块计算余弦相似度（向量已归一化，点积即余弦），每块只保留前 limit 个候选
+        best_rows, best_scores = [], []
+        for begin in range(0, len(rows), SCORE_CHUNK_ROWS):
+            chunk_rows = rows[begin:begin + SCORE_CHUNK_ROWS]
+            scores = vectors[chunk_rows] @ query_vector
+            if len(scores) > limit:
+                top = np.argpartition(-scores, limit - 1)[:limit]
+                chunk_rows, scores = chunk_rows[top], scores[top]
+            best_rows.append(chunk_rows)
+            best_scores.append(scores)
+        best_rows = np.concatenate(best_rows)
+        best_scores = np.concatenate(best_scores)
+        order = np.argsort(-best_scores, kind='stable')[:limit]
+
+        matches = []
+        for row, score in zip(best_rows[order].tolist(), best_scores[order].tolist()):
+            video_path, srt_path, text, start_ms, end_ms = self.conn.execute("""
+                SELECT f.video_path, w.srt_path, w.text, w.start_ms, w.end_ms
+                FROM windows w JOIN files f ON f.srt_path = w.srt_path WHERE w.row = ?
+            """, (row,)).fetchone()
+            match = (video_path, srt_path, text, start_ms, end_ms)
+            matches.append(match + (score,) if with_scores else match)
+        return matches
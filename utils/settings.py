@@ -2,3 +2,58 @@
 APP_NAME = "胡剪"
 WINDOW_SIZE = (1080, 760)
 DEFAULT_THEME = "light"
+
+# 创建索引时并行转写的进程数，1 表示在单个线程中逐个转写
+# 每个进程都会加载一份 Whisper 模型，请根据 CPU 核数和内存大小调整
+SUBTITLE_WORKERS = 1
+
+# 创建索引时是否先做语音活动检测，只转写有人声的部分（适合大段静音的空镜素材）
+SUBTITLE_VAD = False
+
+# 默认使用的 Whisper 模型
+DEFAULT_MODEL = "base"
+# 启动时是否在后台预加载默认模型，使第一次创建索引无需等待模型加载
+WARM_UP_MODEL = True
+# 缓存的 Whisper 模型占用内存上限（MB），超出后按最近最少使用的顺序释放
+MODEL_MEMORY_BUDGET_MB = 4096
+
+# 剪辑队列默认同时运行的 ffmpeg 进程数，以及界面上允许设置的最大值
+CLIP_MAX_WORKERS = 2
+CLIP_WORKERS_LIMIT = 8
+
+# 字幕搜索最多显示的结果数，0 表示不限制；结果按批次逐步显示，每批之间至少间隔的秒数
+SEARCH_RESULT_LIMIT = 5000
+SEARCH_BATCH_INTERVAL = 0.05
+
+# 语义搜索（需要安装 sentence-transformers）：句向量模型、每个窗口合并的字幕条数和窗口步长、返回的结果数
+# 创建索引时如果已安装 sentence-transformers 且 SEMANTIC_SEARCH 为 True，同时为字幕计算向量
+SEMANTIC_SEARCH = True
+SEMANTIC_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+SEMANTIC_WINDOW = 3
+SEMANTIC_STRIDE = 2
+SEMANTIC_TOP_K = 50
+
+# 自动剪掉停顿：间隔不超过该值（毫秒）的相邻字幕合并为一个片段；每条字幕前后保留的余量（毫秒）
+JUMP_CUT_MAX_GAP_MS = 600
+JUMP_CUT_PADDING_MS = 150
+# 勾选“去掉语气词”时，只由这些词组成的字幕会被剪掉
+JUMP_CUT_FILLER_WORDS = ('嗯', '啊', '呃', '额', '哦', '唉', '那个', '这个', '就是', '然后', 'um', 'uh', 'er', 'ah')
+
+# 打开素材文件夹后是否在后台为所有素材预先计算音频波形（与转写共用音频缓存）
+WAVEFORM_PRECOMPUTE = True
+
+# 缩略图胶片条缓存的总大小上限（MB），超出后删除最久未使用的胶片条
+THUMBNAIL_CACHE_MB = 200
+
+# 预览代理：打开素材文件夹后在后台把高于 PROXY_MIN_HEIGHT 或 HEVC 等编码的素材转码为低分辨率代理文件，
+# 预览时自动播放代理文件，剪辑合并仍使用源文件；代理文件的高度、关键帧间隔（帧）和同时转码的进程数
+PROXY_MEDIA = False
+PROXY_MIN_HEIGHT = 1080
+PROXY_HEIGHT = 540
+PROXY_GOP = 12
+PROXY_WORKERS = 2
+
+# 镜头切换检测：scene 分数（0-1）超过阈值的帧视为镜头切换；勾选“对齐镜头”时，
+# 剪辑的开始和结束时间会对齐到该范围（毫秒）内最近的镜头切换点
+SCENE_THRESHOLD = 0.3
+SCENE_SNAP_MS = 1000
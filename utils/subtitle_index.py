@@ -0,0 +1,315 @@
+# utils/subtitle_index.py
+"""
+跨视频字幕搜索的持久化倒排索引。
+
+索引保存在 cache_dir 下的 SQLite 数据库中，每条字幕（cue）按字符二元组（bigram）切词，
+对中文等无空格分隔的文字同样适用。倒排表把每个词项映射到 (视频, 字幕开始, 字幕结束)，
+单个视频的字幕重新生成后只需更新该视频对应的记录。
+模糊搜索使用另一张按读音键（见 utils/fuzzy_search.py）的音节组合建立的倒排表。
+"""
+import os
+import sqlite3
+
+from utils.paths_internal import cache_dir
+from utils.subtitle_parser import iter_cues, list_subtitle_files
+from utils.fuzzy_search import phonetic_key, phonetic_terms, FuzzyQuery, phonetic_scheme
+
+# 索引数据库存放路径
+index_db_path = os.path.join(cache_dir, "subtitle_index.db")
+# 表结构版本，变化时丢弃旧索引，下次同步文件夹时重新建立
+SCHEMA_VERSION = 2
+
+# 搜索模式
+SEARCH_MODE_EXACT = 'exact'
+SEARCH_MODE_FUZZY = 'fuzzy'
+SEARCH_MODE_SEMANTIC = 'semantic'
+
+SEARCH_MODE_NAMES = {
+    SEARCH_MODE_EXACT: '精确',
+    SEARCH_MODE_FUZZY: '模糊',
+    SEARCH_MODE_SEMANTIC: '语义',
+}
+
+# 与字幕同名的视频文件可能的扩展名，按优先级排列
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.mkv', '.avi')
+
+def find_video_for_subtitle(srt_path):
+    """根据字幕路径查找同名视频文件，找不到时默认使用 .mp4"""
+    base = os.path.splitext(srt_path)[0]
+    for ext in VIDEO_EXTENSIONS:
+        for candidate in (base + ext, base + ext.upper()):
+            if os.path.exists(candidate):
+                return candidate
+    return base + '.mp4'
+
+
+def normalize_text(text):
+    """统一大小写，用于建立索引和匹配"""
+    return text.lower()
+
+
+def tokenize(text):
+    """
+    对文本进行切词：使用相邻两个字符组成的二元组，跳过包含空白的组合。
+
+    :param text: 已经规范化的文本
+    :return: 去重后的词项集合
+    """
+    return {text[i:i + 2] for i in range(len(text) - 1)
+            if not text[i].isspace() and not text[i + 1].isspace()}
+
+
+class SubtitleIndex:
+    """字幕倒排索引，每个线程应使用各自的实例"""
+
+    def __init__(self, db_path=index_db_path):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.create_tables()
+
+    def create_tables(self):
+        """创建索引所需的表；表结构或读音键的生成方式变化时丢弃旧索引"""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION or self.stored_phonetic_scheme() not in (None, phonetic_scheme()):
+            self.conn.executescript("""
+                DROP TABLE IF EXISTS videos;
+                DROP TABLE IF EXISTS cues;
+                DROP TABLE IF EXISTS postings;
+                DROP TABLE IF EXISTS phonetic_postings;
+                DROP TABLE IF EXISTS meta;
+            """)
+        self.conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS videos (
+                id INTEGER PRIMARY KEY,
+                folder TEXT NOT NULL,
+                video_path TEXT NOT NULL,
+                srt_path TEXT NOT NULL UNIQUE,
+                srt_mtime REAL NOT NULL,
+                srt_size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS videos_folder ON videos(folder);
+            CREATE TABLE IF NOT EXISTS cues (
+                id INTEGER PRIMARY KEY,
+                video_id INTEGER NOT NULL,
+                start_ms INTEGER NOT NULL,
+                end_ms INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                norm TEXT NOT NULL,
+                phonetic TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS cues_video ON cues(video_id);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                cue_id INTEGER NOT NULL,
+                PRIMARY KEY (term, cue_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS phonetic_postings (
+                term TEXT NOT NULL,
+                cue_id INTEGER NOT NULL,
+                PRIMARY KEY (term, cue_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            PRAGMA user_version = {SCHEMA_VERSION};
+        """)
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('phonetic_scheme', ?)",
+                              (phonetic_scheme(),))
+
+    def stored_phonetic_scheme(self):
+        """旧索引建立时读音键的生成方式，没有记录时返回 None"""
+        try:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'phonetic_scheme'").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row[0] if row else None
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def normalize_folder(folder):
+        return os.path.normcase(os.path.abspath(folder))
+
+    def update_video(self, srt_path, video_path=None):
+        """（重新）索引单个字幕文件，只影响该视频的记录"""
+        srt_path = os.path.abspath(srt_path)
+        if video_path is None:
+            video_path = find_video_for_subtitle(srt_path)
+        stat = os.stat(srt_path)
+        cues = list(iter_cues(srt_path))
+
+        with self.conn:
+            self._delete_video(srt_path)
+            cursor = self.conn.execute(
+                "INSERT INTO videos (folder, video_path, srt_path, srt_mtime, srt_size) VALUES (?, ?, ?, ?, ?)",
+                (self.normalize_folder(os.path.dirname(srt_path)), os.path.abspath(video_path), srt_path,
+                 stat.st_mtime, stat.st_size))
+            video_id = cursor.lastrowid
+            for start_ms, end_ms, text in cues:
+                norm = normalize_text(text)
+                phonetic = phonetic_key(text)
+                cue_id = self.conn.execute(
+                    "INSERT INTO cues (video_id, start_ms, end_ms, text, norm, phonetic) VALUES (?, ?, ?, ?, ?, ?)",
+                    (video_id, start_ms, end_ms, text, norm, phonetic)).lastrowid
+                self.conn.executemany("INSERT OR IGNORE INTO postings (term, cue_id) VALUES (?, ?)",
+                                      [(term, cue_id) for term in tokenize(norm)])
+                self.conn.executemany("INSERT OR IGNORE INTO phonetic_postings (term, cue_id) VALUES (?, ?)",
+                                      [(term, cue_id) for term in phonetic_terms(phonetic.split())])
+        return len(cues)
+
+    def remove_video(self, srt_path):
+        """从索引中移除单个字幕文件"""
+        with self.conn:
+            self._delete_video(os.path.abspath(srt_path))
+
+    def _delete_video(self, srt_path):
+        row = self.conn.execute("SELECT id FROM videos WHERE srt_path = ?", (srt_path,)).fetchone()
+        if row is None:
+            return
+        video_id = row[0]
+        # 按旧文本重新计算词项后逐条删除，避免为 postings 额外建立 cue_id 索引
+        for cue_id, norm, phonetic in self.conn.execute("SELECT id, norm, phonetic FROM cues WHERE video_id = ?",
+                                                        (video_id,)).fetchall():
+            self.conn.executemany("DELETE FROM postings WHERE term = ? AND cue_id = ?",
+                                  [(term, cue_id) for term in tokenize(norm)])
+            self.conn.executemany("DELETE FROM phonetic_postings WHERE term = ? AND cue_id = ?",
+                                  [(term, cue_id) for term in phonetic_terms(phonetic.split())])
+        self.conn.execute("DELETE FROM cues WHERE video_id = ?", (video_id,))
+        self.conn.execute("DELETE FROM videos WHERE id = ?", (video_id,))
+
+    def sync_folder(self, folder):
+        """
+        让索引与素材文件夹中的 .srt / .vtt 文件保持一致：新增或修改过的文件重新索引，已删除的文件移出索引。
+        同名的 .srt 和 .vtt 只索引 .srt。
+
+        :return: (更新的文件数, 移除的文件数)
+        """
+        folder_key = self.normalize_folder(folder)
+        indexed = {srt_path: (mtime, size) for srt_path, mtime, size in self.conn.execute(
+            "SELECT srt_path, srt_mtime, srt_size FROM videos WHERE folder = ?", (folder_key,))}
+
+        updated = 0
+        present = set()
+        for srt_path in list_subtitle_files(folder):
+            present.add(srt_path)
+            stat = os.stat(srt_path)
+            if indexed.get(srt_path) != (stat.st_mtime, stat.st_size):
+                self.update_video(srt_path)
+                updated += 1
+
+        removed = [srt_path for srt_path in indexed if srt_path not in present]
+        for srt_path in removed:
+            self.remove_video(srt_path)
+        return updated, len(removed)
+
+    def video_count(self, folder):
+        """返回文件夹中已索引的视频数量"""
+        return self.conn.execute("SELECT COUNT(*) FROM videos WHERE folder = ?",
+                                 (self.normalize_folder(folder),)).fetchone()[0]
+
+    def search(self, keyword, folder, limit=0):
+        """
+        在文件夹已索引的字幕中搜索关键字（不区分大小写的子串匹配）。
+
+        :param limit: 最多返回的结果数，0 表示不限制
+        :return: [(视频路径, 字幕路径, 字幕文本, 开始毫秒, 结束毫秒), ...]
+        """
+        return [match for batch in self.iter_search(keyword, folder, limit) for match in batch]
+
+    def iter_search(self, keyword, folder, limit=0):
+        """
+        按字幕文件顺序逐个视频搜索，每搜索完一个视频就返回该视频的匹配结果，
+        调用方无需等待整个文件夹搜索完成即可显示结果，也可以随时停止迭代。
+
+        :param limit: 最多返回的结果数，0 表示不限制
+        :return: 生成器，每次返回一个视频的 [(视频路径, 字幕路径, 字幕文本, 开始毫秒, 结束毫秒), ...]
+        """
+        norm = normalize_text(keyword.strip())
+        if not norm:
+            return
+        terms = sorted(tokenize(norm))
+        if terms:
+            # 先用倒排表求交集得到候选字幕，再做子串校验排除词项顺序不同的情况；
+            # 同一视频的字幕在一个事务中插入，cue_id 基本连续，按范围查找可以直接使用倒排表的主键
+            candidates = " INTERSECT ".join(
+                "SELECT cue_id FROM postings WHERE term = ? AND cue_id BETWEEN ? AND ?" for _ in terms)
+            cue_filter = f"id IN ({candidates}) AND "
+        else:
+            # 单个字符的关键字没有二元组，直接在规范化文本上扫描
+            cue_filter = ""
+
+        videos = self.conn.execute("SELECT id, video_path, srt_path FROM videos WHERE folder = ? ORDER BY srt_path",
+                                   (self.normalize_folder(folder),)).fetchall()
+        found = 0
+        for video_id, video_path, srt_path in videos:
+            params = []
+            if terms:
+                first_id, last_id = self.conn.execute("SELECT MIN(id), MAX(id) FROM cues WHERE video_id = ?",
+                                                      (video_id,)).fetchone()
+                if first_id is None:
+                    continue
+                for term in terms:
+                    params.extend((term, first_id, last_id))
+            params.extend((video_id, norm))
+            rows = self.conn.execute(f"""
+                SELECT text, start_ms, end_ms FROM cues
+                WHERE {cue_filter}video_id = ? AND instr(norm, ?) > 0
+                ORDER BY start_ms
+            """, params).fetchall()
+            if not rows:
+                continue
+            if limit:
+                rows = rows[:limit - found]
+            found += len(rows)
+            yield [(video_path, srt_path, text, start_ms, end_ms) for text, start_ms, end_ms in rows]
+            if limit and found >= limit:
+                return
+
+    def fuzzy_search(self, keyword, folder, limit=0):
+        """
+        模糊搜索：容忍同音字、繁简差异和少量错字，结果按相关度排序（距离相同时按文件和时间排序）。
+
+        :param limit: 最多返回的结果数，0 表示不限制
+        :return: [(视频路径, 字幕路径, 字幕文本, 开始毫秒, 结束毫秒), ...]
+        """
+        query = FuzzyQuery(keyword)
+        if not query:
+            return []
+        params = [self.normalize_folder(folder)]
+        if query.terms:
+            # 用音节组合的倒排表找出共享足够多组合的候选字幕，只对候选字幕计算编辑距离
+            placeholders = ", ".join("?" for _ in query.terms)
+            candidates = f"""
+                SELECT cue_id FROM phonetic_postings WHERE term IN ({placeholders})
+                GROUP BY cue_id HAVING COUNT(*) >= ?
+            """
+            cue_filter = f"c.id IN ({candidates})"
+            params.extend(sorted(query.terms))
+            params.append(query.min_shared_terms)
+        else:
+            # 只有一个音节的关键字没有音节组合，直接在读音键上扫描
+            cue_filter = "instr(' ' || c.phonetic || ' ', ?) > 0"
+            params.append(f" {query.tokens[0]} ")
+        # 直接包含关键字的字幕总是候选：多音字在字幕中的读音可能与单独查询时不同
+        cue_filter = f"({cue_filter} OR instr(c.norm, ?) > 0 OR instr(c.norm, ?) > 0)"
+        params.extend([query.lowered, query.folded])
+
+        rows = self.conn.execute(f"""
+            SELECT v.video_path, v.srt_path, c.text, c.start_ms, c.end_ms, c.norm, c.phonetic
+            FROM cues c JOIN videos v ON v.id = c.video_id
+            WHERE v.folder = ? AND {cue_filter}
+        """, params)
+        scored = []
+        for video_path, srt_path, text, start_ms, end_ms, norm, phonetic in rows:
+            distance = query.distance(norm, phonetic.split())
+            if distance is not None:
+                scored.append((distance, srt_path, start_ms, (video_path, srt_path, text, start_ms, end_ms)))
+        scored.sort(key=lambda item: item[:3])
+        if limit:
+            scored = scored[:limit]
+        return [match for *_, match in scored]
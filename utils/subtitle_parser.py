@@ -0,0 +1,212 @@
+# utils/subtitle_parser.py
+"""
+SRT / VTT 字幕解析。
+
+逐行流式读取，不假设每条字幕固定占 4 行，支持多行字幕、CRLF、BOM、VTT 的文件头、
+NOTE/STYLE 块、字幕标识和时间行后的显示设置。
+解析结果保存在紧凑的列式结构 CueTable 中：开始、结束时间为整数数组，
+所有文本拼接为一个字符串并用偏移量定位，长字幕文件也只占用很少的内存。
+"""
+import os
+import re
+import bisect
+from array import array
+
+from utils.fuzzy_search import phonetic_key, rank_texts
+
+SUBTITLE_EXTENSIONS = ('.srt', '.vtt')
+
+# 支持 HH:MM:SS,mmm、HH:MM:SS.mmm 以及 VTT 中省略小时的 MM:SS.mmm
+_timestamp_pattern = re.compile(r'(?:(\d+):)?(\d{1,2}):(\d{2})[,.](\d{1,3})')
+# 字幕文本中的格式标签，如 <i>、</b>、<c.yellow>、<v 张三>、<00:00:01.000>
+_tag_pattern = re.compile(r'<[^>]*>')
+
+
+def timestamp_to_ms(time_str):
+    """将 HH:MM:SS,mmm（或 HH:MM:SS.mmm、MM:SS.mmm）格式的时间转换为毫秒"""
+    match = _timestamp_pattern.search(time_str)
+    if not match:
+        raise ValueError(f"无法解析时间戳: {time_str}")
+    hours, minutes, seconds, milliseconds = match.groups()
+    return (int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)) * 1000 + int(milliseconds.ljust(3, '0'))
+
+
+def parse_timing(line):
+    """解析时间行，返回 (开始毫秒, 结束毫秒)，时间后面的 VTT 显示设置会被忽略"""
+    start, _, rest = line.partition('-->')
+    end = rest.split()[0] if rest.split() else rest
+    return timestamp_to_ms(start), timestamp_to_ms(end)
+
+
+def _is_timing(line):
+    try:
+        parse_timing(line)
+        return True
+    except ValueError:
+        return False
+
+
+def iter_cues(path):
+    """逐条读取 SRT / VTT 字幕，返回 (开始毫秒, 结束毫秒, 文本)，多行字幕用空格连接"""
+    with open(path, 'r', encoding='utf-8-sig', errors='replace') as f:
+        timing = None
+        text_lines = []
+        skip_block = False  # VTT 的 WEBVTT 文件头、NOTE、STYLE、REGION 块
+        for line in f:
+            line = line.strip()
+            if not line:
+                if timing and text_lines:
+                    yield timing[0], timing[1], ' '.join(text_lines)
+                timing, text_lines, skip_block = None, [], False
+            elif skip_block:
+                continue
+            elif timing is None:
+                if '-->' in line:
+                    try:
+                        timing = parse_timing(line)
+                    except ValueError:
+                        skip_block = True  # 时间行损坏时跳过这一条字幕
+                elif line.startswith(('WEBVTT', 'NOTE', 'STYLE', 'REGION')):
+                    skip_block = True
+                # 其余为 SRT 序号或 VTT 字幕标识，忽略
+            elif '-->' in line and _is_timing(line):
+                # 缺少空行分隔的下一条字幕：结束当前字幕，去掉误读为文本的序号
+                if text_lines and text_lines[-1].isdigit():
+                    text_lines.pop()
+                if text_lines:
+                    yield timing[0], timing[1], ' '.join(text_lines)
+                timing, text_lines = parse_timing(line), []
+            else:
+                text = _tag_pattern.sub('', line).strip() if '<' in line else line
+                if text:
+                    text_lines.append(text)
+        if timing and text_lines:
+            yield timing[0], timing[1], ' '.join(text_lines)
+
+
+class CueTable:
+    """
+    列式存储的字幕列表。
+
+    starts / ends 为毫秒数组，第 i 条字幕的文本为 text_buffer[offsets[i]:offsets[i + 1]]。
+    """
+
+    def __init__(self):
+        self.starts = array('i')
+        self.ends = array('i')
+        self.offsets = array('q', [0])
+        self.text_buffer = ''
+        self._pieces = []
+        self._folded = None  # 小写文本及其偏移量，第一次搜索时生成
+        self._phonetic = None  # 每条字幕的音节序列，第一次模糊搜索时生成
+
+    @classmethod
+    def from_cues(cls, cues):
+        table = cls()
+        for start, end, text in cues:
+            table.append(start, end, text)
+        table.finish()
+        return table
+
+    @classmethod
+    def load(cls, path):
+        """从字幕文件读取"""
+        return cls.from_cues(iter_cues(path))
+
+    def append(self, start, end, text):
+        self.starts.append(start)
+        self.ends.append(end)
+        self._pieces.append(text)
+        self.offsets.append(self.offsets[-1] + len(text))
+
+    def finish(self):
+        """添加完成后把文本合并为一个字符串，并保证按开始时间排序（index_at 依赖有序的 starts）"""
+        if self._pieces:
+            self.text_buffer += ''.join(self._pieces)
+            self._pieces = []
+        self._folded = None
+        self._phonetic = None
+        if any(self.starts[i] > self.starts[i + 1] for i in range(len(self.starts) - 1)):
+            cues = sorted(self, key=lambda cue: cue[0])
+            self.__init__()
+            for start, end, text in cues:
+                self.append(start, end, text)
+            self.finish()
+
+    def __len__(self):
+        return len(self.starts)
+
+    def text(self, index):
+        return self.text_buffer[self.offsets[index]:self.offsets[index + 1]]
+
+    def __getitem__(self, index):
+        return self.starts[index], self.ends[index], self.text(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def index_at(self, position):
+        """二分查找指定时间（毫秒）所在的字幕，返回序号，不在任何字幕内时返回 -1"""
+        index = bisect.bisect_right(self.starts, position) - 1
+        if index >= 0 and position <= self.ends[index]:
+            return index
+        return -1
+
+    def find(self, keyword):
+        """返回文本中包含关键字（不区分大小写）的字幕序号列表"""
+        keyword = keyword.lower()
+        if not keyword or not len(self):
+            return []
+        if self._folded is None:
+            # 小写后长度可能变化，因此单独记录偏移量；字幕之间用换行分隔，避免跨字幕匹配
+            folded = [self.text(i).lower() + '\n' for i in range(len(self))]
+            offsets = array('q', [0])
+            for piece in folded:
+                offsets.append(offsets[-1] + len(piece))
+            self._folded = (''.join(folded), offsets)
+
+        buffer, offsets = self._folded
+        matches = []
+        position = buffer.find(keyword)
+        while position != -1:
+            index = bisect.bisect_right(offsets, position) - 1
+            matches.append(index)
+            # 同一条字幕只记录一次，从下一条字幕开始继续查找
+            position = buffer.find(keyword, offsets[index + 1])
+        return matches
+
+    def find_fuzzy(self, keyword):
+        """模糊查找，容忍同音字、繁简差异和少量错字，返回按相关度排序的字幕序号列表"""
+        if not len(self):
+            return []
+        if self._phonetic is None:
+            self._phonetic = [phonetic_key(self.text(i)).split() for i in range(len(self))]
+        return rank_texts(keyword, ((self.text(i).lower(), self._phonetic[i]) for i in range(len(self))))
+
+
+def list_subtitle_files(folder):
+    """
+    列出文件夹中的字幕文件。同名的 .srt 和 .vtt 只保留 find_subtitle_file 会选择的一个（按 SUBTITLE_EXTENSIONS 的顺序），
+    索引与字幕面板使用同一个文件，搜索结果不会重复。
+    """
+    chosen = {}  # 不含扩展名的文件名 -> (扩展名优先级, 字幕路径)
+    for name in os.listdir(folder):
+        base, ext = os.path.splitext(name)
+        ext = ext.lower()
+        if ext not in SUBTITLE_EXTENSIONS:
+            continue
+        key = os.path.normcase(base)
+        rank = SUBTITLE_EXTENSIONS.index(ext)
+        if key not in chosen or rank < chosen[key][0]:
+            chosen[key] = (rank, os.path.abspath(os.path.join(folder, name)))
+    return sorted(path for _, path in chosen.values())
+
+
+def find_subtitle_file(video_path):
+    """查找与视频同名的字幕文件，找不到时返回 None"""
+    base = os.path.splitext(video_path)[0]
+    for ext in SUBTITLE_EXTENSIONS:
+        if os.path.exists(base + ext):
+            return base + ext
+    return None
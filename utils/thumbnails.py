@@ -0,0 +1,179 @@
+# utils/thumbnails.py
+"""
+缩略图胶片条（sprite sheet）缓存。
+
+每个视频只运行一次 ffmpeg：解码器只解码关键帧（-skip_frame nokey），select 滤镜按固定间隔挑选关键帧，
+tile 滤镜把所有缩略图拼成一张图片，showinfo 输出每张缩略图的实际时间。
+胶片条和时间列表保存在 cache_dir 下，缓存总大小超过上限时按最近使用时间淘汰（LRU），
+素材列表、搜索结果和进度条悬停预览都从胶片条中截取对应时间最近的缩略图，不再访问源文件。
+"""
+import os
+import re
+import json
+import uuid
+import bisect
+import hashlib
+import subprocess
+
+from utils.paths_internal import cache_dir
+from utils.ffmpeg_utils import ffmpeg_path
+from utils.probe_cache import get_duration
+from utils.settings import THUMBNAIL_CACHE_MB
+
+thumbnail_cache_dir = os.path.join(cache_dir, "cache_thumbnails")
+
+# 缩略图尺寸、每个文件最多的缩略图数量和胶片条每行的缩略图数量
+TILE_WIDTH = 160
+TILE_HEIGHT = 90
+MAX_TILES = 100
+TILE_COLUMNS = 10
+
+_pts_time_pattern = re.compile(r'\bpts_time:\s*([\d.]+)')
+
+
+class SpriteSheet:
+    """一个视频的胶片条：图片路径和每个格子对应的时间（毫秒）"""
+
+    def __init__(self, image_path, times, columns=TILE_COLUMNS, tile_width=TILE_WIDTH, tile_height=TILE_HEIGHT):
+        self.image_path = image_path
+        self.times = times
+        self.columns = columns
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+
+    def __len__(self):
+        return len(self.times)
+
+    def index_at(self, position_ms):
+        """不晚于指定时间的最后一张缩略图的序号"""
+        return max(0, bisect.bisect_right(self.times, position_ms) - 1)
+
+    def tile_rect(self, index):
+        """第 index 张缩略图在胶片条中的位置 (x, y, 宽, 高)"""
+        row, column = divmod(index, self.columns)
+        return column * self.tile_width, row * self.tile_height, self.tile_width, self.tile_height
+
+
+def sprite_cache_base(video_path):
+    """根据视频路径、大小、修改时间和缩略图参数生成缓存文件路径，视频变化后自动失效"""
+    video_path = os.path.abspath(video_path)
+    stat = os.stat(video_path)
+    key = hashlib.blake2b(
+        f"{video_path}|{stat.st_size}|{stat.st_mtime}|{TILE_WIDTH}x{TILE_HEIGHT}|{MAX_TILES}|{TILE_COLUMNS}"
+        .encode('utf-8'), digest_size=8).hexdigest()
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(thumbnail_cache_dir, f"{base_name}_{key}")
+
+
+def build_sprite_command(video_path, interval, output_path):
+    """生成胶片条的 ffmpeg 命令：只解码关键帧，每隔 interval 秒取一帧，缩放后拼接"""
+    rows = -(-MAX_TILES // TILE_COLUMNS)
+    video_filter = (
+        f"select='isnan(prev_selected_t)+gte(t-prev_selected_t,{interval:.3f})',showinfo,"
+        f"scale={TILE_WIDTH}:{TILE_HEIGHT}:force_original_aspect_ratio=decrease,"
+        f"pad={TILE_WIDTH}:{TILE_HEIGHT}:(ow-iw)/2:(oh-ih)/2,tile={TILE_COLUMNS}x{rows}"
+    )
+    return [
+        ffmpeg_path, "-nostdin", "-y", "-skip_frame", "nokey", "-i", video_path,
+        "-an", "-vf", video_filter, "-frames:v", "1", "-q:v", "5", output_path
+    ]
+
+
+def touch(path):
+    """更新访问时间，供 LRU 淘汰使用"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def load_sprite_sheet(video_path):
+    """读取已缓存的胶片条，没有缓存时返回 None"""
+    base = sprite_cache_base(video_path)
+    if not (os.path.exists(base + '.jpg') and os.path.exists(base + '.json')):
+        return None
+    with open(base + '.json', 'r', encoding='utf-8') as f:
+        times = json.load(f)['times']
+    touch(base + '.jpg')
+    touch(base + '.json')
+    return SpriteSheet(base + '.jpg', times)
+
+
+def build_sprite_sheet(video_path):
+    """运行一次 ffmpeg 生成胶片条并写入缓存"""
+    duration = get_duration(video_path)
+    if not duration:
+        raise RuntimeError(f"无法获取视频时长，无法生成缩略图: {video_path}")
+    # 间隔略大于 时长 / 数量，保证缩略图不会超出胶片条的格子数
+    interval = max(duration / MAX_TILES * 1.01, 0.5)
+
+    os.makedirs(thumbnail_cache_dir, exist_ok=True)
+    base = sprite_cache_base(video_path)
+    temp_path = f"{base}.{uuid.uuid4().hex}.part.jpg"
+    result = subprocess.run(build_sprite_command(video_path, interval, temp_path), stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+    stderr = result.stderr.decode('utf-8', 'ignore')
+    if result.returncode != 0 or not os.path.exists(temp_path):
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise RuntimeError(f"生成缩略图失败: {video_path}\n{stderr.strip()[-2000:]}")
+
+    # showinfo 的输出行中 pts_time 为每张缩略图的时间
+    times = [int(float(value) * 1000) for value in _pts_time_pattern.findall(stderr)][:MAX_TILES]
+    os.replace(temp_path, base + '.jpg')
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump({'times': times}, f)
+    evict_thumbnails(keep=base + '.jpg')
+    return SpriteSheet(base + '.jpg', times)
+
+
+def get_sprite_sheet(video_path):
+    """读取胶片条缓存，没有缓存时生成"""
+    return load_sprite_sheet(video_path) or build_sprite_sheet(video_path)
+
+
+def evict_thumbnails(max_bytes=None, keep=None):
+    """
+    缓存总大小超过上限时，按最近使用时间从旧到新删除胶片条。
+
+    :param keep: 不删除的胶片条图片路径，刚生成的胶片条即使单独超出上限也会保留，避免界面反复重新生成
+    """
+    if max_bytes is None:
+        max_bytes = THUMBNAIL_CACHE_MB * 1024 * 1024
+    if not os.path.isdir(thumbnail_cache_dir):
+        return
+    sheets = []
+    total = 0
+    for name in os.listdir(thumbnail_cache_dir):
+        if not name.endswith('.jpg') or name.endswith('.part.jpg'):
+            continue
+        path = os.path.join(thumbnail_cache_dir, name)
+        meta_path = path[:-len('.jpg')] + '.json'
+        try:
+            stat = os.stat(path)
+            size = stat.st_size + (os.path.getsize(meta_path) if os.path.exists(meta_path) else 0)
+        except OSError:
+            continue
+        sheets.append((stat.st_mtime, path, meta_path, size))
+        total += size
+    for _, path, meta_path, size in sorted(sheets):
+        if total <= max_bytes:
+            break
+        if keep is not None and os.path.normcase(path) == os.path.normcase(keep):
+            continue
+        for file_path in (path, meta_path):
+            try:
+                os.remove(file_path)
+            except OSError:
+                pass
+        total -= size
+
+
+def extract_frame(video_path, position_ms, output_path):
+    """解码指定时间的一帧并保存为图片"""
+    command = [ffmpeg_path, "-nostdin", "-y", "-v", "error", "-ss", str(position_ms / 1000), "-i", video_path,
+               "-frames:v", "1", "-q:v", "2", output_path]
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"截图失败: {video_path}\n{result.stderr.decode('utf-8', 'ignore').strip()}")
+    return output_path
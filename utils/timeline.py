@@ -0,0 +1,274 @@
+# utils/timeline.py
+"""
+虚拟时间线。
+
+时间线只记录 (源文件, 入点, 出点) 的有序列表，剪辑时不再生成中间文件，
+预览时直接在源文件中跳转播放，导出时用一次 ffmpeg 从源文件生成最终视频：
+- 精确导出：同一源文件中相邻的片段合并为一路输入（-ss/-t 定位，select 按帧、atrim 按采样只保留片段内的部分），经 concat 滤镜拼接，只编码一次
+- 快速导出：concat 封装的 inpoint/outpoint 直接复制源文件码流，不编码
+时间线可以保存为 JSON 工程文件，之后重新打开继续编辑。
+"""
+import os
+import json
+import uuid
+import shutil
+
+from utils.paths_internal import cache_dir
+from utils.ffmpeg_utils import ffmpeg_path, FFmpegRunner
+from utils.probe_cache import get_media_info
+from utils.video_merger import stream_signature, concat_quote
+
+PROJECT_VERSION = 1
+
+# 精确导出时统一使用的音频参数
+EXPORT_SAMPLE_RATE = 48000
+# 同一源文件中相邻片段的间隔不超过该值（毫秒）时作为一路输入，间隔更大时重新定位，不解码中间的部分
+RUN_MAX_GAP_MS = 5000
+
+
+class TimelineClip:
+    """时间线上的一个片段，end_ms 为 None 表示到源文件结尾"""
+
+    def __init__(self, source, start_ms=0, end_ms=None):
+        self.source = os.path.abspath(source)
+        self.start_ms = int(start_ms)
+        self.end_ms = None if end_ms is None else int(end_ms)
+
+    def resolved_end_ms(self):
+        """实际的出点，未指定时使用源文件时长"""
+        if self.end_ms is not None:
+            return self.end_ms
+        return int((get_media_info(self.source).get('duration') or 0) * 1000)
+
+    def duration_ms(self):
+        return self.resolved_end_ms() - self.start_ms
+
+    def is_whole_file(self):
+        return self.start_ms == 0 and self.end_ms is None
+
+    def label(self):
+        """列表中显示的文字"""
+        name = os.path.basename(self.source)
+        if self.is_whole_file():
+            return name
+        end = format_ms(self.end_ms) if self.end_ms is not None else "结尾"
+        return f"{name} [{format_ms(self.start_ms)} - {end}]"
+
+    def to_dict(self):
+        return {'source': self.source, 'start_ms': self.start_ms, 'end_ms': self.end_ms}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['source'], data.get('start_ms', 0), data.get('end_ms'))
+
+
+def format_ms(ms):
+    """将毫秒格式化为 HH:MM:SS.mmm"""
+    seconds, milliseconds = divmod(int(ms), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02}:{minutes:02}:{seconds:02}.{milliseconds:03}"
+
+
+class Timeline:
+    """片段的有序列表"""
+
+    def __init__(self, clips=None):
+        self.clips = list(clips or [])
+
+    def __len__(self):
+        return len(self.clips)
+
+    def append(self, clip):
+        self.clips.append(clip)
+
+    def duration_ms(self):
+        return sum(clip.duration_ms() for clip in self.clips)
+
+    def is_whole_files(self):
+        """是否全部是完整的文件（例如旧版本剪辑生成的片段文件），此时可以按文件合并"""
+        return all(clip.is_whole_file() for clip in self.clips)
+
+    def save(self, path):
+        """保存为工程文件，先写入临时文件再替换"""
+        data = {'version': PROJECT_VERSION, 'clips': [clip.to_dict() for clip in self.clips]}
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """读取工程文件，格式不正确时抛出 ValueError"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or 'clips' not in data:
+            raise ValueError(f"不是有效的工程文件: {path}")
+        return cls(TimelineClip.from_dict(item) for item in data['clips'])
+
+
+def can_stream_copy(timeline):
+    """所有源文件的编码参数一致时才能直接复制码流拼接"""
+    signatures = {stream_signature(get_media_info(source)) for source in {c.source for c in timeline.clips}}
+    return len(signatures) == 1
+
+
+def build_copy_export(timeline, work_dir, output_file):
+    """
+    生成快速导出命令：concat 封装通过 inpoint/outpoint 直接从源文件复制码流。
+    入点会落在之前最近的关键帧上，与快速剪辑模式相同。
+    """
+    list_path = os.path.join(work_dir, "timeline.txt")
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for clip in timeline.clips:
+            f.write(f"file {concat_quote(clip.source)}\n")
+            if clip.start_ms:
+                f.write(f"inpoint {clip.start_ms / 1000}\n")
+            if clip.end_ms is not None:
+                f.write(f"outpoint {clip.end_ms / 1000}\n")
+    return [
+        ffmpeg_path, "-y", "-f", "concat", "-safe", "0", "-i", list_path,
+        "-map", "0:v:0", "-map", "0:a:0?", "-c", "copy", "-avoid_negative_ts", "make_zero", output_file
+    ]
+
+
+def source_runs(clips, max_gap_ms=None):
+    """
+    把时间线分成若干段：每段是同一个源文件中连续排列、按时间顺序且互不重叠的片段。
+    相邻片段在源文件中的间隔超过 max_gap_ms 时另起一段，避免为了中间不需要的部分解码整段视频。
+    跳剪生成的时间线中片段间隔很短，整个源文件只需打开一次。
+    """
+    if max_gap_ms is None:
+        max_gap_ms = RUN_MAX_GAP_MS
+    runs = []
+    for clip in clips:
+        previous = runs[-1][-1] if runs else None
+        if previous is not None and previous.source == clip.source and \
+                0 <= clip.start_ms - previous.resolved_end_ms() <= max_gap_ms:
+            runs[-1].append(clip)
+        else:
+            runs.append([clip])
+    return runs
+
+
+def frame_ranges(run, fps):
+    """
+    把一段中各片段的入点和出点换算为帧序号（相对于这一段的开始，左闭右开），
+    不足一帧的片段被丢弃；视频按帧序号选取，音频按同样的帧边界换算为采样数截取。
+    """
+    run_start = run[0].start_ms
+    ranges = []
+    for clip in run:
+        first = round((clip.start_ms - run_start) * fps / 1000)
+        last = round((clip.resolved_end_ms() - run_start) * fps / 1000)
+        if last > first:
+            ranges.append((first, last))
+    return ranges
+
+
+def build_filter_export(timeline, work_dir, output_file):
+    """
+    生成精确导出命令：同一个源文件中相邻的片段作为一路输入（见 source_runs），在源文件中快速定位到第一个片段，
+    统一帧率后按帧序号只保留各片段内的帧；音频按相同的帧边界用 atrim 逐个片段精确到采样截取，
+    每个片段的音频长度与视频一致，片段再多也不会累积音画不同步。统一分辨率和音频参数后
+    用 concat 滤镜拼接，只编码一次。
+    滤镜写入脚本文件，避免片段很多时命令行过长。
+    """
+    first = get_media_info(timeline.clips[0].source).get('video') or {}
+    width, height = first.get('width') or 1920, first.get('height') or 1080
+    fps = round(first.get('fps') or 30, 3)
+
+    command = [ffmpeg_path, "-y"]
+    filters = []
+    pads = []
+    # 输出中已经累计的帧数，用于把帧边界换算为采样边界时不累积舍入误差
+    output_frames = 0
+    for run in source_runs(timeline.clips):
+        ranges = frame_ranges(run, fps)
+        if not ranges:
+            continue
+        index = len(pads)
+        run_start = run[0].start_ms
+        run_end = run[-1].resolved_end_ms()
+        # 多读入两帧，出点取整到帧边界后可能晚于原来的出点，最后一帧不会被 -t 截掉
+        duration = (run_end - run_start) / 1000 + 2 / fps
+        command += ["-ss", str(run_start / 1000), "-t", f"{duration:.3f}", "-i", run[0].source]
+        # 输入定位后时间从 0 开始，fps 滤镜之后第 n 帧的时间为 n / fps
+        selection = '+'.join(f"between(n,{first_frame},{last_frame - 1})" for first_frame, last_frame in ranges)
+        filters.append(
+            f"[{index}:v:0]fps={fps},select='{selection}',setpts=N/{fps}/TB,"
+            f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+            f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,format=yuv420p[v{index}]")
+
+        # 每个片段的音频：从帧边界对应的采样开始，长度等于输出中这些帧所占的采样数
+        trims = []
+        for first_frame, last_frame in ranges:
+            start_sample = round(first_frame * EXPORT_SAMPLE_RATE / fps)
+            samples = round((output_frames + last_frame - first_frame) * EXPORT_SAMPLE_RATE / fps) - \
+                round(output_frames * EXPORT_SAMPLE_RATE / fps)
+            output_frames += last_frame - first_frame
+            trims.append((start_sample, samples))
+        if get_media_info(run[0].source).get('audio'):
+            # async 和 first_pts 按时间戳补齐缺少的采样，采样序号与时间一一对应
+            audio = f"[{index}:a:0]aresample={EXPORT_SAMPLE_RATE}:async=1:first_pts=0,aformat=channel_layouts=stereo"
+            # 源文件结尾处音频不足时用静音补齐
+            chains = [f"atrim=start_sample={start_sample}:end_sample={start_sample + samples},"
+                      f"asetpts=PTS-STARTPTS,apad=whole_len={samples}" for start_sample, samples in trims]
+            if len(chains) == 1:
+                filters.append(f"{audio},{chains[0]}[a{index}]")
+            else:
+                branches = [f"[s{index}_{part}]" for part in range(len(chains))]
+                parts = [f"[a{index}_{part}]" for part in range(len(chains))]
+                filters.append(f"{audio},asplit={len(chains)}{''.join(branches)}")
+                filters.extend(f"{branch}{chain}{part}" for branch, chain, part in zip(branches, chains, parts))
+                filters.append(f"{''.join(parts)}concat=n={len(parts)}:v=0:a=1[a{index}]")
+        else:
+            # 没有音频的源文件补一段等长的静音
+            samples = sum(samples for _, samples in trims)
+            filters.append(f"anullsrc=r={EXPORT_SAMPLE_RATE}:cl=stereo,atrim=end_sample={samples}[a{index}]")
+        pads.append(f"[v{index}][a{index}]")
+    if not pads:
+        raise ValueError("时间线中的片段都不足一帧")
+    filters.append(f"{''.join(pads)}concat=n={len(pads)}:v=1:a=1[outv][outa]")
+
+    script_path = os.path.join(work_dir, "filter.txt")
+    with open(script_path, 'w', encoding='utf-8') as f:
+        f.write(";\n".join(filters))
+    return command + [
+        "-filter_complex_script", script_path, "-map", "[outv]", "-map", "[outa]",
+        "-c:v", "libx264", "-preset", "fast", "-crf", "23",
+        "-c:a", "aac", "-b:a", "192k", output_file
+    ]
+
+
+def export_timeline(timeline, output_file, stream_copy=False, run=None, log=print):
+    """
+    用一次 ffmpeg 把时间线导出为视频文件。
+
+    :param stream_copy: 尝试直接复制码流（源文件编码参数不一致时自动改为精确导出）
+    :param run: 执行命令的函数 run(command, 总时长秒数)，默认使用 FFmpegRunner.run
+    :return: 输出文件路径
+    """
+    if run is None:
+        run = FFmpegRunner().run
+    if not timeline.clips:
+        raise ValueError("时间线为空")
+    if stream_copy and not can_stream_copy(timeline):
+        log("源文件编码参数不一致，无法直接复制码流，改为精确导出")
+        stream_copy = False
+
+    work_dir = os.path.join(cache_dir, "cache_video_files", f"timeline_{uuid.uuid4().hex}")
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        build = build_copy_export if stream_copy else build_filter_export
+        command = build(timeline, work_dir, output_file)
+        log(f"执行导出命令: {' '.join(command)}")
+        run(command, timeline.duration_ms() / 1000 or None)
+    except BaseException:
+        # 失败或取消时删除不完整的输出文件
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        raise
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return output_file
@@ -0,0 +1,138 @@
+# utils/transcriber.py
+"""
+不依赖 Qt 的字幕生成逻辑，既可在 QThread 中直接调用，也可作为进程池中的任务运行。
+"""
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.audio_cache import extract_audio, load_audio
+
+# 默认的字幕时间偏移（毫秒）
+DEFAULT_OFFSET_MS = 960
+
+
+def format_time(seconds):
+    """格式化时间为字幕格式"""
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    milliseconds = int((seconds % 1) * 1000)
+    seconds = int(seconds)
+    return f"{int(hours):02}:{int(minutes):02}:{seconds:02},{milliseconds:03}"
+
+
+def adjust_subtitle_time(subtitles, offset_ms):
+    """
+    调整字幕的时间戳，可以向前或向后偏移。
+
+    :param subtitles: Whisper 模型生成的字幕结果
+    :param offset_ms: 偏移时间，单位为毫秒。正数表示向后（延迟），负数表示向前（提前）。
+                      建议范围：-1000 到 1000 毫秒（即最多提前或延迟 1 秒）。
+    :return: 调整后的字幕
+    """
+    # 确保偏移值在合理范围内（避免过大偏移）
+    if offset_ms < -1000 or offset_ms > 1000:
+        raise ValueError("偏移时间应在 -1000 到 1000 毫秒之间")
+
+    for segment in subtitles['segments']:
+        # 秒转毫秒后偏移，确保时间戳不低于 0，再转回秒
+        segment['start'] = max(segment['start'] * 1000 + offset_ms, 0) / 1000
+        segment['end'] = max(segment['end'] * 1000 + offset_ms, 0) / 1000
+
+    return subtitles
+
+
+def subtitle_path_for(video_path, output_format):
+    """返回与视频同名的字幕文件路径"""
+    return os.path.splitext(video_path)[0] + f'.{output_format}'
+
+
+def transcribe_audio(model, audio, vad=False):
+    """
+    转写音频数组。
+
+    :param vad: 是否先做语音活动检测，只转写语音区间，再把时间戳映射回原始时间轴
+    """
+    if not vad:
+        return model.transcribe(audio, language="zh")  # 当模型认为视频中无语音时，不生成字幕。默认0.5灵敏度适中
+
+    from utils.vad import detect_speech_regions, compact_audio, remap_segments
+
+    regions = detect_speech_regions(audio)
+    if not regions:
+        return {'text': '', 'segments': []}
+    speech, time_map = compact_audio(audio, regions)
+    return remap_segments(model.transcribe(speech, language="zh"), time_map)
+
+
+def transcribe_to_file(model, video_path, output_path, output_format='srt', offset_ms=DEFAULT_OFFSET_MS,
+                       audio_path=None, vad=False):
+    """
+    从视频生成字幕并保存为指定格式。
+
+    :param audio_path: 已提取的 16 kHz 音频缓存路径，为空时在此处提取（已缓存则直接复用）
+    :param vad: 是否跳过静音部分，只转写检测到的语音区间
+    """
+    import opencc
+
+    if audio_path is None:
+        audio_path = extract_audio(video_path)
+    subtitles = transcribe_audio(model, load_audio(audio_path), vad)
+    result = adjust_subtitle_time(subtitles, offset_ms=offset_ms)
+
+    # 创建转换器
+    converter = opencc.OpenCC('t2s')  # 't2s' 表示繁体转简体，'s2t' 表示简体转繁体
+
+    lines = []
+    for i, segment in enumerate(result['segments']):
+        start = format_time(segment['start'])
+        end = format_time(segment['end'])
+        text = converter.convert(segment['text'])
+        if output_format in ('srt', 'vtt'):
+            lines.append(f"{i + 1}\n{start} --> {end}\n{text}\n\n")
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+    return output_path
+
+
+# ---------------- 进程池并行转写 ----------------
+
+# 每个工作进程只加载一次模型，保存在进程级全局变量中
+_worker_model = None
+
+
+def _init_worker(model_name, torch_threads):
+    """工作进程初始化：限制 torch 线程数，避免多个进程争抢 CPU，然后加载模型"""
+    global _worker_model
+    import torch
+    from utils.model_registry import get_model
+
+    torch.set_num_threads(torch_threads)
+    _worker_model = get_model(model_name)
+
+
+def _transcribe_in_worker(video_path, output_path, output_format, offset_ms, vad):
+    transcribe_to_file(_worker_model, video_path, output_path, output_format, offset_ms, vad=vad)
+    return video_path, output_path
+
+
+def create_transcribe_pool(model_name, workers):
+    """
+    创建并行转写用的进程池。
+
+    使用 spawn 方式启动子进程，避免在带有 Qt 线程的进程中 fork；
+    每个进程分到的 torch 线程数为 CPU 核数 / 进程数。
+    """
+    torch_threads = max(1, (os.cpu_count() or 1) // workers)
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(model_name, torch_threads),
+    )
+
+
+def submit_transcribe(pool, video_path, output_path, output_format='srt', offset_ms=DEFAULT_OFFSET_MS, vad=False):
+    """向进程池提交一个视频的转写任务，future 的结果为 (视频路径, 字幕路径)"""
+    return pool.submit(_transcribe_in_worker, video_path, output_path, output_format, offset_ms, vad)
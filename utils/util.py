@@ -1,6 +1,5 @@
 import os
 import os
-import gradio as gr  # Gradio 库，用于展示信息和警告
 import platform  # 用于检测操作系统
 import sys  # 用于系统相关的操作，例如输出错误信息
 import subprocess  # 用于执行系统命令
@@ -28,6 +27,12 @@ def listfiles(dirname):
 
 
 
+def _gradio():
+    """Gradio 库较大，只在需要弹出提示时才导入"""
+    import gradio as gr
+    return gr
+
+
 def open_folder(path):
     """Open a folder in the file manager of the respective OS."""
 
@@ -36,7 +41,7 @@ def open_folder(path):
         # 如果路径不存在，打印并通过 Gradio 提示用户
         msg = f'Folder "{path}" does not exist. After you save an image, the folder will be created.'
         print(msg)  # 打印消息到控制台
-        gr.Info(msg)  # Gradio 信息弹出
+        _gradio().Info(msg)  # Gradio 信息弹出
         return
 
     # 检查路径是否是一个目录
@@ -49,7 +54,7 @@ This could be an error or a malicious attempt to run code on your computer.
 Requested path was: {path}
 """
         print(msg, file=sys.stderr)  # 打印警告到标准错误输出
-        gr.Warning(msg)  # Gradio 警告弹出
+        _gradio().Warning(msg)  # Gradio 警告弹出
         return
 
     # 规范化路径，避免路径中出现奇怪的符号或格式问题
@@ -0,0 +1,108 @@
+# utils/vad.py
+"""
+基于短时能量的语音活动检测（VAD）。
+
+转写前先找出音频中的语音区间，只把这些区间拼接起来交给 Whisper，
+再把识别结果的时间戳映射回原始时间轴，适合大段静音的空镜素材。
+"""
+import bisect
+
+import numpy as np
+
+from utils.audio_cache import SAMPLE_RATE
+
+
+def _true_runs(mask):
+    """返回布尔数组中连续 True 区间的起止下标（左闭右开）"""
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    diff = np.diff(padded)
+    return np.flatnonzero(diff == 1), np.flatnonzero(diff == -1)
+
+
+def detect_speech_regions(audio, sample_rate=SAMPLE_RATE, frame_ms=30, threshold_db=None,
+                          min_speech_ms=250, min_silence_ms=800, padding_ms=300):
+    """
+    检测音频中的语音区间。
+
+    :param audio: float32 单声道音频数组，取值范围 -1 到 1
+    :param threshold_db: 判定为语音的能量阈值（dBFS），为空时根据底噪自动估计
+    :param min_speech_ms: 短于该时长的能量突起视为噪声
+    :param min_silence_ms: 短于该时长的停顿不拆分区间
+    :param padding_ms: 每个区间前后额外保留的时长，避免截断字头字尾
+    :return: [(开始采样点, 结束采样点), ...]
+    """
+    frame_len = int(sample_rate * frame_ms / 1000)
+    frame_count = len(audio) // frame_len
+    if frame_count == 0:
+        return []
+
+    # 按帧计算均方根能量（dBFS）
+    frames = audio[:frame_count * frame_len].reshape(frame_count, frame_len)
+    rms = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=1))
+    energy_db = 20 * np.log10(rms + 1e-10)
+
+    if threshold_db is None:
+        # 以最安静的 10% 帧估计底噪，阈值限定在 -55 到 -35 dBFS 之间
+        noise_floor = np.percentile(energy_db, 10)
+        threshold_db = float(np.clip(noise_floor + 12, -55, -35))
+
+    starts, ends = _true_runs(energy_db > threshold_db)
+
+    # 去掉过短的能量突起
+    keep = (ends - starts) * frame_ms >= min_speech_ms
+    starts, ends = starts[keep], ends[keep]
+    if len(starts) == 0:
+        return []
+
+    # 前后补齐，再合并间隔过短（包括补齐后重叠）的区间
+    pad = padding_ms // frame_ms
+    starts = np.maximum(starts - pad, 0)
+    ends = np.minimum(ends + pad, frame_count)
+    gap_ok = (starts[1:] - ends[:-1]) * frame_ms >= min_silence_ms
+    starts = starts[np.concatenate(([True], gap_ok))]
+    ends = ends[np.concatenate((gap_ok, [True]))]
+
+    # 最后一段延伸到音频末尾不足一帧的部分
+    ends = ends * frame_len
+    if ends[-1] == frame_count * frame_len:
+        ends[-1] = len(audio)
+    return list(zip((starts * frame_len).tolist(), ends.tolist()))
+
+
+def compact_audio(audio, regions, sample_rate=SAMPLE_RATE):
+    """
+    把语音区间拼接成一段紧凑的音频。
+
+    :return: (拼接后的音频, 时间映射表)，映射表每项为 (拼接后开始秒数, 原始开始秒数, 时长秒数)
+    """
+    pieces = []
+    time_map = []
+    position = 0
+    for start, end in regions:
+        pieces.append(audio[start:end])
+        time_map.append((position / sample_rate, start / sample_rate, (end - start) / sample_rate))
+        position += end - start
+    return np.concatenate(pieces), time_map
+
+
+def map_to_source(seconds, time_map, is_end=False):
+    """
+    把拼接音频中的时间点映射回原始时间轴。
+
+    :param is_end: 是否为结束时间；恰好落在两个区间交界处的结束时间归入前一个区间
+    """
+    compact_starts = [item[0] for item in time_map]
+    if is_end:
+        index = bisect.bisect_left(compact_starts, seconds) - 1
+    else:
+        index = bisect.bisect_right(compact_starts, seconds) - 1
+    compact_start, source_start, duration = time_map[max(index, 0)]
+    return source_start + min(max(seconds - compact_start, 0), duration)
+
+
+def remap_segments(result, time_map):
+    """就地把 Whisper 识别结果中各段的时间戳映射回原始时间轴"""
+    for segment in result['segments']:
+        segment['start'] = map_to_source(segment['start'], time_map)
+        segment['end'] = map_to_source(segment['end'], time_map, is_end=True)
+    return result
@@ -0,0 +1,211 @@
+# utils/video_clip.py
+"""
+视频片段剪辑。
+
+支持三种模式：
+- reencode: 使用 libx264 重新编码，边界精确但速度较慢（原有方式）
+- copy: 起点吸附到前一个关键帧后直接复制码流，几乎瞬间完成
+- smart: 只重新编码两端不完整的 GOP，中间部分直接复制码流，边界精确且速度快
+"""
+import os
+import shutil
+import uuid
+import bisect
+import subprocess
+
+from utils.paths_internal import cache_dir
+from utils.ffmpeg_utils import ffmpeg_path
+from utils.probe_cache import get_keyframes, get_media_info
+
+CLIP_MODE_REENCODE = 'reencode'
+CLIP_MODE_COPY = 'copy'
+CLIP_MODE_SMART = 'smart'
+
+# 界面上显示的模式名称
+CLIP_MODE_NAMES = {
+    CLIP_MODE_REENCODE: '精确剪辑（重新编码）',
+    CLIP_MODE_COPY: '快速剪辑（关键帧对齐）',
+    CLIP_MODE_SMART: '智能剪辑（仅编码边界）',
+}
+
+# 智能剪辑时可以匹配原视频参数重新编码的视频格式
+SMART_CUT_ENCODERS = {'h264': 'libx264', 'hevc': 'libx265'}
+
+# 距离关键帧小于该值（秒）时视为恰好落在关键帧上
+KEYFRAME_EPSILON = 0.001
+
+
+# 剪辑片段默认存放的缓存文件夹
+video_clips_folder = os.path.join(cache_dir, "cache_video_fragment")
+
+
+def run_command(command):
+    """默认的命令执行方式，失败时抛出 subprocess.CalledProcessError"""
+    subprocess.run(command, check=True)
+
+
+def format_ms_for_filename(ms):
+    """将毫秒转换为可用于文件名的 HH-MM-SS_mmm 格式"""
+    seconds, milliseconds = divmod(int(ms), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02}-{minutes:02}-{seconds:02}_{milliseconds:03}"
+
+
+def clip_output_path(video_path, start_time, end_time, folder=video_clips_folder, reserved=()):
+    """
+    生成剪辑片段的输出路径，文件已存在或已被其他任务占用时添加 (1), (2), (3)... 以避免覆盖。
+
+    :param reserved: 已分配给尚未完成的任务的路径
+    """
+    os.makedirs(folder, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
+    stem = f"single_{base_name}_{format_ms_for_filename(start_time)}_to_{format_ms_for_filename(end_time)}"
+    output_file = os.path.join(folder, f"{stem}.mp4")
+    counter = 1
+    while os.path.exists(output_file) or output_file in reserved:
+        output_file = os.path.join(folder, f"{stem}({counter}).mp4")
+        counter += 1
+    return output_file
+
+
+def previous_keyframe(keyframes, seconds):
+    """返回不晚于指定时间的最后一个关键帧"""
+    index = bisect.bisect_right(keyframes, seconds + KEYFRAME_EPSILON) - 1
+    return keyframes[index] if index >= 0 else 0.0
+
+
+def next_keyframe(keyframes, seconds):
+    """返回不早于指定时间的第一个关键帧，没有时返回 None"""
+    index = bisect.bisect_left(keyframes, seconds - KEYFRAME_EPSILON)
+    return keyframes[index] if index < len(keyframes) else None
+
+
+def build_reencode_command(video_path, start, duration, output_file, output_format=None, video_encoder="libx264",
+                           extra_video_args=()):
+    """生成重新编码剪辑的命令，时间单位为秒"""
+    command = [
+        ffmpeg_path, "-y",  # -y 表示覆盖输出文件
+        "-ss", str(start),  # 开始时间，提前指定位置
+        "-i", video_path,  # 输入视频路径
+        "-t", str(duration),  # 持续时间
+        "-map", "0:v:0", "-map", "0:a:0?",  # 第一路视频和第一路音频（如果有）
+        "-c:v", video_encoder,  # 视频编码器
+        "-preset", "fast",  # 编码速度，fast 为较快速度与质量平衡
+        "-crf", "23",  # CRF 值越低质量越好，23 是默认值
+        *extra_video_args,
+        "-c:a", "aac",  # 使用 AAC 进行音频编码
+        "-b:a", "192k",  # 音频比特率为 192 kbps
+    ]
+    if output_format:
+        command += ["-f", output_format]
+    return command + [output_file]
+
+
+def build_copy_command(video_path, start, duration, output_file, output_format=None, copy_audio=True):
+    """
+    生成直接复制码流剪辑的命令，时间单位为秒。
+
+    :param copy_audio: 为 False 时音频重新编码为 AAC（音频编码开销很小），便于与其他片段拼接
+    """
+    audio_args = ["-c:a", "copy"] if copy_audio else ["-c:a", "aac", "-b:a", "192k"]
+    command = [
+        ffmpeg_path, "-y",
+        "-ss", str(start),
+        "-i", video_path,
+        "-t", str(duration),
+        "-map", "0:v:0", "-map", "0:a:0?",
+        "-c:v", "copy", *audio_args,
+        "-avoid_negative_ts", "make_zero",
+    ]
+    if output_format:
+        command += ["-f", output_format]
+    return command + [output_file]
+
+
+def clip_video(video_path, start_time, end_time, output_file, mode=CLIP_MODE_REENCODE, run=run_command,
+               keyframes=None):
+    """
+    剪辑视频片段。
+
+    :param start_time: 开始时间（毫秒）
+    :param end_time: 结束时间（毫秒）
+    :param mode: 剪辑模式，见 CLIP_MODE_*
+    :param run: 执行 ffmpeg 命令的函数，失败时应抛出异常
+    :param keyframes: 已知的关键帧时间列表（秒），为空时从媒体信息缓存读取
+    :return: 实际剪辑的 (开始毫秒, 结束毫秒)；快速剪辑模式下开始时间会吸附到关键帧
+    """
+    start = start_time / 1000
+    end = end_time / 1000
+
+    if mode == CLIP_MODE_REENCODE:
+        run(build_reencode_command(video_path, start, end - start, output_file))
+        return start_time, end_time
+
+    if keyframes is None:
+        keyframes = get_keyframes(video_path)
+
+    if mode == CLIP_MODE_COPY:
+        # 复制码流只能从关键帧开始，起点吸附到前一个关键帧以保证包含所选内容
+        snapped_start = previous_keyframe(keyframes, start)
+        run(build_copy_command(video_path, snapped_start, end - snapped_start, output_file))
+        return round(snapped_start * 1000), end_time
+
+    if mode == CLIP_MODE_SMART:
+        smart_cut(video_path, start, end, output_file, keyframes, run)
+        return start_time, end_time
+
+    raise ValueError(f"未知的剪辑模式: {mode}")
+
+
+def smart_cut(video_path, start, end, output_file, keyframes, run=run_command):
+    """
+    智能剪辑：开头到第一个关键帧、最后一个关键帧到结尾这两段按原视频参数重新编码，
+    中间完整的 GOP 直接复制码流，最后用 concat 封装无损拼接。
+    """
+    info = get_media_info(video_path)['video'] or {}
+    encoder = SMART_CUT_ENCODERS.get(info.get('codec_name'))
+    inner_start = next_keyframe(keyframes, start)
+    inner_end = previous_keyframe(keyframes, end)
+
+    # 编码格式无法匹配或区间内没有完整的 GOP 时，退回到整段重新编码
+    if encoder is None or inner_start is None or inner_end - inner_start <= KEYFRAME_EPSILON:
+        run(build_reencode_command(video_path, start, end - start, output_file))
+        return
+
+    match_args = []
+    if info.get('pix_fmt'):
+        match_args += ["-pix_fmt", info['pix_fmt']]
+    profile = (info.get('profile') or '').lower()
+    if encoder == 'libx264' and profile in ('baseline', 'main', 'high'):
+        match_args += ["-profile:v", profile]
+
+    work_dir = os.path.join(cache_dir, "cache_video_files", f"smart_cut_{uuid.uuid4().hex}")
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        # 中间片段使用 MPEG-TS 封装，参数集随码流内嵌，拼接后解码器可以在边界处切换
+        parts = []
+        if inner_start - start > KEYFRAME_EPSILON:
+            head = os.path.join(work_dir, "head.ts")
+            run(build_reencode_command(video_path, start, inner_start - start, head, "mpegts", encoder, match_args))
+            parts.append(head)
+
+        middle = os.path.join(work_dir, "middle.ts")
+        run(build_copy_command(video_path, inner_start, inner_end - inner_start, middle, "mpegts", copy_audio=False))
+        parts.append(middle)
+
+        if end - inner_end > KEYFRAME_EPSILON:
+            tail = os.path.join(work_dir, "tail.ts")
+            run(build_reencode_command(video_path, inner_end, end - inner_end, tail, "mpegts", encoder, match_args))
+            parts.append(tail)
+
+        list_path = os.path.join(work_dir, "parts.txt")
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for part in parts:
+                f.write(f"file '{part}'\n")
+        run([
+            ffmpeg_path, "-y", "-f", "concat", "-safe", "0", "-i", list_path,
+            "-c", "copy", "-bsf:a", "aac_adtstoasc", output_file
+        ])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,253 @@
+# utils/video_merger.py
+"""
+视频合并。
+
+合并前自动探测每个输入的编码、profile、分辨率、帧率、时间基和音频参数，
+以占总时长最多的参数组合作为目标：参数一致的片段直接复制码流，
+只有不一致的片段才并行转码为目标参数，最后用 concat 封装一次性拼接。
+"""
+import os
+import uuid
+import shutil
+import datetime
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.paths_internal import cache_dir
+from utils.ffmpeg_utils import ffmpeg_path, FFmpegRunner, FFmpegCancelled
+from utils.probe_cache import get_media_info
+
+ACTION_COPY = 'copy'  # 直接复制码流
+ACTION_TRANSCODE = 'transcode'  # 转码为目标参数
+
+# 可以按目标参数重新编码的视频、音频格式
+VIDEO_ENCODERS = {'h264': 'libx264', 'hevc': 'libx265'}
+AUDIO_ENCODERS = {'aac': 'aac', 'mp3': 'libmp3lame', 'opus': 'libopus'}
+
+# 无法匹配原有编码格式时使用的通用目标参数
+FALLBACK_VIDEO_CODEC = 'h264'
+FALLBACK_AUDIO_CODEC = 'aac'
+
+
+def stream_signature(info):
+    """提取决定能否直接拼接的参数：(视频参数, 音频参数)"""
+    video = info.get('video')
+    audio = info.get('audio')
+    video_sig = None
+    if video:
+        video_sig = (video.get('codec_name'), video.get('profile'), video.get('pix_fmt'),
+                     video.get('width'), video.get('height'), round(video.get('fps') or 0, 2))
+    audio_sig = None
+    if audio:
+        audio_sig = (audio.get('codec_name'), audio.get('sample_rate'), audio.get('channels'))
+    return video_sig, audio_sig
+
+
+class MergePlan:
+    """合并计划：每个输入对应的处理方式和目标参数"""
+
+    def __init__(self, file_list, infos, target):
+        self.file_list = file_list
+        self.infos = infos
+        self.target = target  # (视频参数, 音频参数)
+        self.actions = [ACTION_COPY if stream_signature(info) == target else ACTION_TRANSCODE for info in infos]
+        # 时间基不同的片段虽然可以复制码流，但需要经过 MPEG-TS 统一时间基后再拼接
+        time_bases = {(info.get('video') or {}).get('time_base') for info in infos}
+        self.needs_remux = ACTION_TRANSCODE in self.actions or len(time_bases) > 1
+
+    @property
+    def transcode_count(self):
+        return self.actions.count(ACTION_TRANSCODE)
+
+    def describe(self):
+        copy_count = len(self.actions) - self.transcode_count
+        return f"合并计划: {copy_count} 个片段直接复制，{self.transcode_count} 个片段需要转码"
+
+
+def plan_merge(file_list):
+    """探测所有输入并生成合并计划"""
+    infos = [get_media_info(video) for video in file_list]
+
+    # 以总时长最多的参数组合作为目标，尽量减少需要转码的内容
+    # （时长相同时 Counter 保持插入顺序，max 返回最先出现的组合）
+    weights = Counter()
+    for info in infos:
+        weights[stream_signature(info)] += info.get('duration') or 0
+    target = max(weights, key=weights.get)
+
+    video_sig, audio_sig = target
+    # 目标编码格式无法重新编码时，退回到通用参数并全部转码
+    if video_sig and video_sig[0] not in VIDEO_ENCODERS:
+        video_sig = (FALLBACK_VIDEO_CODEC, None) + video_sig[2:]
+    if audio_sig and audio_sig[0] not in AUDIO_ENCODERS:
+        audio_sig = (FALLBACK_AUDIO_CODEC,) + audio_sig[1:]
+    return MergePlan(file_list, infos, (video_sig, audio_sig))
+
+
+def build_transcode_command(video_path, info, target, output_file):
+    """生成把单个片段转码为目标参数的命令，输出为 MPEG-TS"""
+    video_sig, audio_sig = target
+    command = [ffmpeg_path, "-y", "-i", video_path]
+    has_audio = info.get('audio') is not None
+    if audio_sig and not has_audio:
+        # 目标带有音频而该片段没有时，补一段静音，保证拼接后音视频对齐
+        command += ["-f", "lavfi", "-i", f"anullsrc=r={audio_sig[1]}:cl={'mono' if audio_sig[2] == 1 else 'stereo'}"]
+
+    if video_sig:
+        command += ["-map", "0:v:0"]
+        codec, profile, pix_fmt, width, height, fps = video_sig
+        # 等比缩放后补黑边到目标分辨率
+        video_filter = (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1")
+        command += ["-vf", video_filter, "-c:v", VIDEO_ENCODERS[codec], "-preset", "fast", "-crf", "23"]
+        if fps:
+            command += ["-r", str(fps)]
+        if pix_fmt:
+            command += ["-pix_fmt", pix_fmt]
+        if codec == 'h264' and (profile or '').lower() in ('baseline', 'main', 'high'):
+            command += ["-profile:v", profile.lower()]
+
+    if audio_sig:
+        command += ["-map", "0:a:0"] if has_audio else ["-map", "1:a:0", "-shortest"]
+        codec, sample_rate, channels = audio_sig
+        command += ["-c:a", AUDIO_ENCODERS[codec], "-b:a", "192k"]
+        if sample_rate:
+            command += ["-ar", str(sample_rate)]
+        if channels:
+            command += ["-ac", str(channels)]
+    else:
+        command += ["-an"]
+    return command + ["-f", "mpegts", output_file]
+
+
+def build_remux_command(video_path, output_file):
+    """生成不转码、只转换为 MPEG-TS 封装的命令（参数集内嵌到码流中，时间基统一为 90kHz）"""
+    return [ffmpeg_path, "-y", "-i", video_path, "-map", "0:v:0", "-map", "0:a:0?", "-c", "copy",
+            "-f", "mpegts", output_file]
+
+
+def merged_output_path(output_folder, count):
+    """合并结果的文件名，包含片段数量和时间戳"""
+    timestamp = datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    return os.path.join(output_folder, f"merged_{count}_videos_{timestamp}.mp4")
+
+
+def concat_quote(path):
+    """按 concat 封装的语法给路径加引号，路径中的单引号需要转义"""
+    return "'" + path.replace("'", "'\\''") + "'"
+
+
+def write_concat_list(file_list, list_path):
+    """生成 concat 封装使用的文件列表"""
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for video in file_list:
+            f.write(f"file {concat_quote(video)}\n")
+    return list_path
+
+
+class VideoMerger:
+    """按合并计划执行合并，支持进度汇报和取消"""
+
+    def __init__(self, log=print, on_progress=None, max_workers=2):
+        """
+        :param log: 日志输出函数，在后台线程中调用时应传入信号的 emit
+        :param on_progress: 进度回调 on_progress(percent, speed)
+        :param max_workers: 同时转码的片段数量
+        """
+        self.log = log
+        self.on_progress = on_progress
+        self.max_workers = max_workers
+        self.runners = []
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+
+    def new_runner(self, on_progress=None):
+        runner = FFmpegRunner(on_progress)
+        with self.lock:
+            self.runners.append(runner)
+        if self.cancelled.is_set():
+            runner.cancel()
+        return runner
+
+    def cancel(self):
+        """取消所有正在进行和尚未开始的 ffmpeg 任务"""
+        self.cancelled.set()
+        with self.lock:
+            runners = list(self.runners)
+        for runner in runners:
+            runner.cancel()
+
+    def report(self, percent, speed=""):
+        if self.on_progress is not None:
+            self.on_progress(percent, speed)
+
+    def merge_videos(self, file_list, output_folder):
+        """
+        合并视频文件。
+
+        :return: 输出文件路径
+        """
+        output_file = merged_output_path(output_folder, len(file_list))
+
+        plan = plan_merge(file_list)
+        self.log(plan.describe())
+
+        work_dir = os.path.join(cache_dir, "cache_video_files", f"merge_{uuid.uuid4().hex}")
+        os.makedirs(work_dir, exist_ok=True)
+        try:
+            if plan.needs_remux:
+                inputs = self.prepare_parts(plan, work_dir)
+            else:
+                inputs = file_list
+            list_path = write_concat_list(inputs, os.path.join(work_dir, "file_list.txt"))
+
+            command = [ffmpeg_path, "-y", "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy"]
+            if plan.needs_remux and plan.target[1] and plan.target[1][0] == 'aac':
+                command += ["-bsf:a", "aac_adtstoasc"]  # MPEG-TS 中的 AAC 转回 MP4 需要的格式
+            command.append(output_file)
+
+            total = sum(info.get('duration') or 0 for info in plan.infos)
+            self.log(f"执行合并命令: {' '.join(command)}")
+            self.new_runner(lambda percent, speed, _: self.report(
+                90 + (percent or 0) / 10 if plan.needs_remux else percent, speed)).run(command, total or None)
+        except FFmpegCancelled:
+            # 删除取消时残留的不完整文件
+            if os.path.exists(output_file):
+                os.remove(output_file)
+            raise
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        return output_file
+
+    def prepare_parts(self, plan, work_dir):
+        """并行把每个片段转码或转封装为 MPEG-TS，进度占总进度的前 90%"""
+        durations = [info.get('duration') or 0 for info in plan.infos]
+        total = sum(durations) or 1
+        done_seconds = {}
+
+        def job(index):
+            video = plan.file_list[index]
+            part = os.path.join(work_dir, f"part_{index:04}.ts")
+            if plan.actions[index] == ACTION_TRANSCODE:
+                command = build_transcode_command(video, plan.infos[index], plan.target, part)
+            else:
+                command = build_remux_command(video, part)
+            self.log(f"执行命令: {' '.join(command)}")
+
+            def on_progress(_, speed, out_time):
+                done_seconds[index] = min(out_time, durations[index])
+                self.report(sum(done_seconds.values()) / total * 90, speed)
+
+            self.new_runner(on_progress).run(command, durations[index] or None)
+            done_seconds[index] = durations[index]
+            return part
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(job, index) for index in range(len(plan.file_list))]
+            try:
+                return [future.result() for future in futures]
+            except Exception:
+                # 一个片段失败后取消其余片段
+                self.cancel()
+                raise
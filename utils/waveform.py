@@ -0,0 +1,197 @@
+# utils/waveform.py
+"""
+音频波形和响度的预计算缓存。
+
+每个视频的音轨只解码一次（复用 audio_cache 中转写用的 16 kHz 单声道 WAV），
+计算多级的最小/最大峰值金字塔：第 0 级每 BASE_BUCKET 个采样一个 (最小值, 最大值)，
+之后每一级把上一级的 LEVEL_FACTOR 个桶合并为一个；另外按 RMS_WINDOW_MS 的窗口计算 RMS 响度（dBFS）。
+结果保存为 cache_dir 下的 .npy 文件，读取时使用内存映射，任意缩放级别下绘制波形都只读取需要的一小段数据，
+不再访问源文件。
+"""
+import os
+import json
+import wave
+import uuid
+
+from utils.paths_internal import cache_dir
+from utils.audio_cache import extract_audio, audio_cache_path, SAMPLE_RATE
+
+waveform_cache_dir = os.path.join(cache_dir, "cache_waveform")
+
+# 第 0 级每个桶包含的采样数（16 kHz 下为 16 毫秒）
+BASE_BUCKET = 256
+# 相邻两级之间桶大小的倍数
+LEVEL_FACTOR = 4
+# RMS 响度的窗口长度
+RMS_WINDOW_MS = 100
+# 每次从 WAV 文件读取的采样数，必须是 BASE_BUCKET 和 RMS 窗口的公倍数
+READ_BLOCK = BASE_BUCKET * 1600 * 4
+# 静音的 RMS 响度下限（dBFS）
+SILENCE_DB = -90.0
+
+
+def waveform_cache_base(video_path):
+    """缓存文件路径的公共部分，与音频缓存使用相同的键，视频变化后自动失效"""
+    name = os.path.splitext(os.path.basename(audio_cache_path(video_path)))[0]
+    return os.path.join(waveform_cache_dir, name)
+
+
+def _reduce(mins, maxs, factor):
+    """把每 factor 个桶合并为一个，最后不足 factor 个的桶也单独合并"""
+    import numpy as np
+
+    starts = np.arange(0, len(mins), factor)
+    return np.minimum.reduceat(mins, starts), np.maximum.reduceat(maxs, starts)
+
+
+class Waveform:
+    """
+    已加载的波形缓存。
+
+    peaks 为 (桶数, 2) 的 int16 数组，按级别依次存放每一级的 (最小值, 最大值)，
+    level_offsets[k] 为第 k 级在 peaks 中的起始行；rms 为每个窗口的响度（dBFS，float32）。
+    """
+
+    def __init__(self, peaks, level_offsets, rms, sample_count):
+        self.peaks = peaks
+        self.level_offsets = level_offsets
+        self.rms = rms
+        self.sample_count = sample_count
+
+    def duration_ms(self):
+        return self.sample_count * 1000 // SAMPLE_RATE
+
+    def level(self, index):
+        """返回第 index 级的峰值数组"""
+        return self.peaks[self.level_offsets[index]:self.level_offsets[index + 1]]
+
+    def level_count(self):
+        return len(self.level_offsets) - 1
+
+    def peaks_for_range(self, start_ms, end_ms, columns):
+        """
+        计算 [start_ms, end_ms) 区间在 columns 列上显示的波形。
+
+        选择每个桶不超过一列宽度的最粗级别，只读取区间内的桶再合并到每一列。
+        :return: (最小值数组, 最大值数组)，取值范围 -1 到 1；没有数据的列为 0
+        """
+        import numpy as np
+
+        columns = max(1, int(columns))
+        samples_per_column = max(1.0, (end_ms - start_ms) * SAMPLE_RATE / 1000 / columns)
+        level = 0
+        while level + 1 < self.level_count() and BASE_BUCKET * LEVEL_FACTOR ** (level + 1) <= samples_per_column:
+            level += 1
+        bucket = BASE_BUCKET * LEVEL_FACTOR ** level
+        data = self.level(level)
+
+        # 每一列对应的桶序号范围
+        edges = np.linspace(start_ms, end_ms, columns + 1) * SAMPLE_RATE / 1000 / bucket
+        edges = np.clip(edges.astype(np.int64), 0, len(data))
+        first, last = edges[0], max(edges[-1], edges[0] + 1)
+        chunk = np.asarray(data[first:min(last, len(data))], dtype=np.float32) / 32768.0
+        mins = np.zeros(columns, dtype=np.float32)
+        maxs = np.zeros(columns, dtype=np.float32)
+        if not len(chunk):
+            return mins, maxs
+        starts = np.minimum(edges[:-1] - first, len(chunk) - 1)
+        # 放大到一个桶比一列还宽时，相邻的列会落在同一个桶上
+        valid = edges[:-1] < len(data)
+        mins[valid] = np.minimum.reduceat(chunk[:, 0], starts)[valid]
+        maxs[valid] = np.maximum.reduceat(chunk[:, 1], starts)[valid]
+        return mins, maxs
+
+    def rms_for_range(self, start_ms, end_ms, columns):
+        """计算区间内每一列的最大 RMS 响度（dBFS）"""
+        import numpy as np
+
+        columns = max(1, int(columns))
+        edges = np.linspace(start_ms, end_ms, columns + 1) / RMS_WINDOW_MS
+        edges = np.clip(edges.astype(np.int64), 0, len(self.rms))
+        result = np.full(columns, SILENCE_DB, dtype=np.float32)
+        if edges[0] >= len(self.rms):
+            return result
+        chunk = np.asarray(self.rms[edges[0]:max(edges[-1], edges[0] + 1)])
+        starts = np.minimum(edges[:-1] - edges[0], len(chunk) - 1)
+        valid = edges[:-1] < len(self.rms)
+        result[valid] = np.maximum.reduceat(chunk, starts)[valid]
+        return result
+
+
+def load_waveform(video_path):
+    """读取已缓存的波形，没有缓存时返回 None"""
+    import numpy as np
+
+    base = waveform_cache_base(video_path)
+    if not os.path.exists(base + '.json'):
+        return None
+    with open(base + '.json', 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if (meta.get('base_bucket'), meta.get('level_factor'), meta.get('rms_window_ms')) != \
+            (BASE_BUCKET, LEVEL_FACTOR, RMS_WINDOW_MS):
+        return None  # 参数变化后重新计算
+    peaks = np.load(base + '.peaks.npy', mmap_mode='r')
+    rms = np.load(base + '.rms.npy', mmap_mode='r')
+    return Waveform(peaks, meta['level_offsets'], rms, meta['sample_count'])
+
+
+def build_waveform(video_path):
+    """解码音频并计算波形缓存，返回 Waveform"""
+    import numpy as np
+
+    wav_path = extract_audio(video_path)
+    rms_window = SAMPLE_RATE * RMS_WINDOW_MS // 1000
+    base_mins, base_maxs, rms = [], [], []
+    sample_count = 0
+    with wave.open(wav_path, 'rb') as f:
+        while True:
+            samples = np.frombuffer(f.readframes(READ_BLOCK), dtype=np.int16)
+            if not len(samples):
+                break
+            sample_count += len(samples)
+            starts = np.arange(0, len(samples), BASE_BUCKET)
+            base_mins.append(np.minimum.reduceat(samples, starts))
+            base_maxs.append(np.maximum.reduceat(samples, starts))
+            squares = samples.astype(np.float64) ** 2
+            window_starts = np.arange(0, len(samples), rms_window)
+            counts = np.diff(np.append(window_starts, len(samples)))
+            mean_square = np.add.reduceat(squares, window_starts) / counts
+            rms.append(10 * np.log10(np.maximum(mean_square / 32768.0 ** 2, 10 ** (SILENCE_DB / 10))))
+
+    empty = np.empty(0, dtype=np.int16)
+    mins = np.concatenate(base_mins) if base_mins else empty
+    maxs = np.concatenate(base_maxs) if base_maxs else empty
+    levels = [(mins, maxs)]
+    while len(levels[-1][0]) > 1:
+        levels.append(_reduce(*levels[-1], LEVEL_FACTOR))
+    level_offsets = [0]
+    for level_mins, _ in levels:
+        level_offsets.append(level_offsets[-1] + len(level_mins))
+
+    os.makedirs(waveform_cache_dir, exist_ok=True)
+    base = waveform_cache_base(video_path)
+    # 先写入临时文件再重命名，元数据最后写入，中断时不会留下不完整的缓存；
+    # 临时文件名各不相同，界面和后台任务同时计算同一个视频时互不影响
+    token = uuid.uuid4().hex
+    peaks_tmp = f"{base}.peaks.{token}.tmp.npy"
+    rms_tmp = f"{base}.rms.{token}.tmp.npy"
+    meta_tmp = f"{base}.{token}.tmp.json"
+    peaks = np.lib.format.open_memmap(peaks_tmp, mode='w+', dtype=np.int16, shape=(level_offsets[-1], 2))
+    for (level_mins, level_maxs), offset in zip(levels, level_offsets):
+        peaks[offset:offset + len(level_mins), 0] = level_mins
+        peaks[offset:offset + len(level_mins), 1] = level_maxs
+    peaks.flush()
+    del peaks
+    os.replace(peaks_tmp, base + '.peaks.npy')
+    np.save(rms_tmp, np.concatenate(rms).astype(np.float32) if rms else np.empty(0, np.float32))
+    os.replace(rms_tmp, base + '.rms.npy')
+    with open(meta_tmp, 'w', encoding='utf-8') as f:
+        json.dump({'level_offsets': level_offsets, 'sample_count': sample_count, 'base_bucket': BASE_BUCKET,
+                   'level_factor': LEVEL_FACTOR, 'rms_window_ms': RMS_WINDOW_MS}, f)
+    os.replace(meta_tmp, base + '.json')
+    return load_waveform(video_path)
+
+
+def get_waveform(video_path):
+    """读取波形缓存，没有缓存时计算"""
+    return load_waveform(video_path) or build_waveform(video_path)